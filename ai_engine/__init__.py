@@ -1,5 +1,25 @@
 # Re-export from inner package so "from ai_engine import process_invoice" works
 # when PYTHONPATH includes the repo root (parent of this folder).
-from .ai_engine import process_invoice, InvoiceExtractResult
+from .ai_engine import (
+    process_invoice,
+    process_invoice_async,
+    process_invoice_batch,
+    process_invoices_async,
+    InvoiceExtractResult,
+    close_http_clients,
+    aclose_http_clients,
+    get_llm_metrics,
+    CircuitOpenError,
+)
 
-__all__ = ["process_invoice", "InvoiceExtractResult"]
+__all__ = [
+    "process_invoice",
+    "process_invoice_async",
+    "process_invoice_batch",
+    "process_invoices_async",
+    "InvoiceExtractResult",
+    "close_http_clients",
+    "aclose_http_clients",
+    "get_llm_metrics",
+    "CircuitOpenError",
+]
@@ -1,9 +1,28 @@
 """
 BharatLedger AI Engine — standalone invoice processing package.
-Single entry point: process_invoice(file_path | bytes) -> InvoiceExtractResult.
+Single entry point: process_invoice(file_path | bytes) -> InvoiceExtractResult
+(process_invoice_async / process_invoices_async for async callers, process_invoice_batch
+for packing many small invoices into shared LLM requests).
 """
 
-from .invoice_processor import process_invoice
+from .http_client import aclose_http_clients, close_http_clients
+from .invoice_processor import (
+    process_invoice,
+    process_invoice_async,
+    process_invoice_batch,
+    process_invoices_async,
+)
+from .rate_limit import CircuitOpenError, get_llm_metrics
 from .types import InvoiceExtractResult
 
-__all__ = ["process_invoice", "InvoiceExtractResult"]
+__all__ = [
+    "process_invoice",
+    "process_invoice_async",
+    "process_invoice_batch",
+    "process_invoices_async",
+    "InvoiceExtractResult",
+    "close_http_clients",
+    "aclose_http_clients",
+    "get_llm_metrics",
+    "CircuitOpenError",
+]
@@ -1,10 +1,22 @@
 """
 HSN/SAC keywords -> expense category + default GST rate.
 Used to categorize line items and suggest GST when not on invoice.
+An HSN/SAC code found in the rate master (hsn_master) decides first; the keyword table
+below covers items without a known code. The table is compiled once: description keywords
+into one word-boundary regex, HSN/SAC codes into a prefix trie (longest prefix wins), so
+categorising is one regex scan plus a few dict lookups per item, and categorize_many()
+scans a whole batch in one pass.
 """
 
 from __future__ import annotations
 
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Generic, Iterable, TypeVar
+
+from .hsn_master import get_hsn_master
+
 # Map (keyword in description or HSN) -> (category_name, default_gst_rate)
 # Order matters: more specific HSN/categories first (e.g. 998314 before 9983)
 HSN_TO_CATEGORY_AND_RATE: list[tuple[list[str], str, float]] = [
@@ -25,14 +37,125 @@ HSN_TO_CATEGORY_AND_RATE: list[tuple[list[str], str, float]] = [
 DEFAULT_CATEGORY = "General"
 DEFAULT_GST_RATE = 18.0
 
+T = TypeVar("T")
+
+
+class PrefixTrie(Generic[T]):
+    """Digit trie over HSN/SAC codes: longest() returns the value of the longest stored prefix."""
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+
+    def insert(self, code: str, value: T, replace: bool = True) -> None:
+        node = self._root
+        for ch in code:
+            node = node.setdefault(ch, {})
+        if replace or "" not in node:
+            node[""] = value  # "" never collides with a digit key
+
+    def longest(self, code: str) -> tuple[str, T] | None:
+        """(matched prefix, value) for the longest stored prefix of `code`, or None."""
+        node = self._root
+        found = None
+        for i, ch in enumerate(code):
+            node = node.get(ch)
+            if node is None:
+                break
+            if "" in node:
+                found = (code[: i + 1], node[""])
+        return found
+
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+def hsn_digits(hsn_sac: str) -> str:
+    """'HSN 8471 30 10' -> '84713010'."""
+    return _NON_DIGIT.sub("", hsn_sac or "")
+
+
+class _Compiled:
+    """HSN_TO_CATEGORY_AND_RATE compiled: rule index by keyword, keyword regex, HSN trie."""
+
+    def __init__(self, table: list[tuple[list[str], str, float]]) -> None:
+        self.rules = [(category, rate) for _, category, rate in table]
+        self.rule_of: dict[str, int] = {}
+        self.hsn: PrefixTrie[int] = PrefixTrie()
+        for idx, (keywords, _, _) in enumerate(table):
+            for kw in keywords:
+                if kw.isdigit():
+                    self.hsn.insert(kw, idx, replace=False)  # first rule listing a code keeps it
+                else:
+                    self.rule_of.setdefault(kw.lower(), idx)
+        # Longest keywords first so "hotel stay" wins over a shorter overlapping word;
+        # an optional plural suffix keeps "medicines"/"pens" matching without "pen" matching "expenses"
+        words = sorted(self.rule_of, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")(?:e?s)?\b")
+
+    def rule_for_text(self, text: str) -> int | None:
+        """Earliest table rule whose keyword occurs as a word in (lower-cased) text."""
+        best = None
+        for m in self.pattern.finditer(text):
+            idx = self.rule_of[m.group(1)]
+            if best is None or idx < best:
+                best = idx
+        return best
+
+    def rule_for_hsn(self, hsn_sac: str) -> int | None:
+        hit = self.hsn.longest(hsn_digits(hsn_sac))
+        return hit[1] if hit else None
+
+    def result(self, idx: int | None) -> tuple[str, float]:
+        return self.rules[idx] if idx is not None else (DEFAULT_CATEGORY, DEFAULT_GST_RATE)
+
+
+@lru_cache(maxsize=1)
+def _compiled() -> _Compiled:
+    return _Compiled(HSN_TO_CATEGORY_AND_RATE)
+
 
 def get_category_and_rate(description: str, hsn_sac: str) -> tuple[str, float]:
     """
     Return (category_name, gst_rate) for a line item.
-    Uses description and HSN/SAC to match; defaults to GENERAL and 18%.
+    The HSN/SAC master row for the longest prefix of the code decides when there is one,
+    then a table code that is a prefix of it (longest prefix wins); otherwise the first
+    table rule with a keyword in the description, matched as a whole word. Defaults to
+    GENERAL and 18%.
+    """
+    master = get_hsn_master()
+    entry = master.lookup(hsn_sac) if master and hsn_sac else None
+    if entry is not None:
+        return entry.category, entry.rate
+    c = _compiled()
+    idx = c.rule_for_hsn(hsn_sac)
+    if idx is None:
+        idx = c.rule_for_text(description.lower())
+    return c.result(idx)
+
+
+def categorize_many(items: Iterable[tuple[str, str]]) -> list[tuple[str, float]]:
+    """
+    get_category_and_rate for many (description, hsn_sac) pairs: all codes are resolved by
+    one master query and the remaining descriptions are scanned in a single regex pass
+    over their joined text, so thousands of line items cost one query and one C-level
+    scan rather than one Python loop per item.
     """
-    combined = f"{description} {hsn_sac}".lower()
-    for keywords, category, rate in HSN_TO_CATEGORY_AND_RATE:
-        if any(kw in combined for kw in keywords):
-            return category, rate
-    return DEFAULT_CATEGORY, DEFAULT_GST_RATE
+    c = _compiled()
+    pairs = list(items)
+    master = get_hsn_master()
+    entries = master.lookup_many([hsn for _, hsn in pairs]) if master else [None] * len(pairs)
+    rule: list[int | None] = [c.rule_for_hsn(hsn) if entry is None else None for (_, hsn), entry in zip(pairs, entries)]
+    pending = [i for i, idx in enumerate(rule) if idx is None and entries[i] is None]
+    if pending:
+        texts = [pairs[i][0].lower() for i in pending]
+        starts: list[int] = []
+        pos = 0
+        for text in texts:
+            starts.append(pos)
+            pos += len(text) + 1  # "\n" separator: a word boundary, never inside a keyword
+        for m in c.pattern.finditer("\n".join(texts)):
+            i = pending[bisect_right(starts, m.start()) - 1]
+            idx = c.rule_of[m.group(1)]
+            if rule[i] is None or idx < rule[i]:
+                rule[i] = idx
+    return [c.result(idx) if entry is None else (entry.category, entry.rate) for idx, entry in zip(rule, entries)]
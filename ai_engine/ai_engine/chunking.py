@@ -0,0 +1,114 @@
+"""
+Chunked extraction plan for long invoices.
+Invoices whose item rows do not fit one prompt are split into a header text (vendor,
+buyer, invoice and totals lines, sent once for the header fields) and item chunks cut
+on page and table boundaries, each carrying the table's column header line. The LLM
+reads the chunks in parallel; their line items are merged here.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from .prompt_compaction import (
+    CHARS_PER_TOKEN,
+    clean_lines,
+    get_token_budget,
+    is_item_row,
+    is_key_line,
+    is_totals_line,
+)
+
+DEFAULT_CHUNK_WORKERS = 4
+# A chunk that is at least this full is closed at the next page break rather than filled up
+PAGE_BREAK_FILL = 0.5
+
+_TABLE_HEADER_WORD = re.compile(
+    r"\b(description|particulars|items?|hsn|sac|qty|quantity|rate|price|amount|taxable|uom|unit)\b", re.IGNORECASE
+)
+
+
+@dataclass
+class ChunkPlan:
+    header: str  # everything except item rows: header fields and stated totals
+    chunks: list[str] = field(default_factory=list)  # item rows, each with the table header line
+
+
+def chunking_enabled() -> bool:
+    return os.environ.get("LLM_CHUNKED", "1").lower() in ("1", "true", "yes", "on")
+
+
+def get_chunk_workers() -> int:
+    """LLM_CHUNK_WORKERS: chunk requests in flight at once (default 4)."""
+    try:
+        return max(1, int(os.environ.get("LLM_CHUNK_WORKERS", DEFAULT_CHUNK_WORKERS)))
+    except ValueError:
+        return DEFAULT_CHUNK_WORKERS
+
+
+def _is_table_header(line: str) -> bool:
+    return len({m.lower() for m in _TABLE_HEADER_WORD.findall(line)}) >= 3 and not is_item_row(line)
+
+
+def plan_chunks(text: str, token_budget: int | None = None) -> ChunkPlan | None:
+    """
+    Split `text` for chunked extraction; None when the cleaned text fits one prompt.
+    Item rows keep their continuation lines (wrapped descriptions) and are packed into
+    chunks of at most the token budget, closing a chunk at a page break once it is half full.
+    """
+    budget = (token_budget or get_token_budget()) * CHARS_PER_TOKEN
+    lines = clean_lines(text, keep_breaks=True)
+    if sum(len(line) + 1 for line in lines) <= budget:
+        return None
+
+    header: list[str] = []
+    table_header = ""
+    units: list[tuple[list[str], bool]] = []  # (item row + continuation lines, starts after a page break)
+    in_items = False
+    page_break = False
+    for line in lines:
+        if not line:
+            page_break = True
+            continue
+        if _is_table_header(line):
+            table_header = table_header or line
+            in_items = True
+        elif is_item_row(line):
+            units.append(([line], page_break))
+            in_items = True
+        elif is_totals_line(line):
+            header.append(line)
+            in_items = False
+        elif in_items and units and not is_key_line(line):
+            units[-1][0].append(line)  # wrapped description of the previous item
+        else:
+            header.append(line)
+        page_break = False
+
+    if not units:
+        return None
+    room = max(budget - len(table_header) - 1, budget // 2)
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for unit, after_break in units:
+        size = sum(len(line) + 1 for line in unit)
+        if current and (used + size > room or (after_break and used >= room * PAGE_BREAK_FILL)):
+            chunks.append("\n".join(([table_header] if table_header else []) + current))
+            current, used = [], 0
+        current.extend(unit)
+        used += size
+    if current:
+        chunks.append("\n".join(([table_header] if table_header else []) + current))
+    return ChunkPlan(header="\n".join(header), chunks=chunks)
+
+
+def merge_line_items(parts: list[list[Any]]) -> list[Any]:
+    """
+    Concatenate per-chunk line items in chunk order. Chunks do not overlap (every item row
+    goes to exactly one chunk), so identical items at a seam are genuine repeats and are kept.
+    """
+    return [item for part in parts for item in part or []]
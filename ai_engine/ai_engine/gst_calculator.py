@@ -1,11 +1,12 @@
 """
 GST calculation: taxable value + rate + intra/inter-state -> CGST, SGST, IGST.
+One line at a time; gst_engine.calculate_gst_columns does many lines with the same rules.
 """
 
 from __future__ import annotations
 
+from .gst_engine import line_gst_paise, normalize_gst_rate, to_paise
 from .types import GSTBreakdown
-from .gst_rates import is_valid_gst_rate
 
 
 def calculate_gst(
@@ -18,17 +19,8 @@ def calculate_gst(
     Compute GST breakdown for a line item.
     - Intra-state: CGST + SGST (half each of rate)
     - Inter-state: IGST (full rate)
+    Amounts are rounded half away from zero to the paisa (see gst_engine).
     """
-    if not is_valid_gst_rate(gst_rate):
-        gst_rate = round(gst_rate)  # allow nearest rate for flexibility
-        if gst_rate not in (0, 5, 12, 18, 28):
-            gst_rate = 18  # fallback
-
-    base = taxable_value * quantity
-    gst_amount = round(base * (gst_rate / 100), 2)
-
-    if is_inter_state:
-        return GSTBreakdown(cgst=0.0, sgst=0.0, igst=gst_amount)
-    else:
-        half = round(gst_amount / 2, 2)
-        return GSTBreakdown(cgst=half, sgst=half, igst=0.0)
+    base = to_paise(taxable_value * quantity)
+    cgst, sgst, igst = line_gst_paise(base, normalize_gst_rate(gst_rate), is_inter_state)
+    return GSTBreakdown(cgst=cgst / 100, sgst=sgst / 100, igst=igst / 100)
@@ -0,0 +1,176 @@
+"""
+Column-wise GST computation in integer paise, shared by the pipeline (gst_calculator,
+invoice_processor) and the backend (gst_utils), so every path rounds the same way:
+- base = taxable value x qty, rounded half away from zero to the paisa
+- IGST = base x rate, CGST = SGST = base x rate / 2, each rounded half away from zero
+- rates outside the standard and special slabs snap to the nearest whole standard rate,
+  else 18%
+Columns are computed with NumPy when it is installed (`pip install -e "ai_engine[numpy]"`)
+and with the same integer arithmetic in plain Python otherwise; small batches always take
+the plain path, which is faster below NUMPY_MIN_ROWS rows.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from .gst_rates import GST_RATES, SPECIAL_GST_RATES
+
+try:
+    import numpy as np
+except ImportError:  # optional: the plain-Python path gives identical results
+    np = None
+
+FALLBACK_GST_RATE = 18.0
+NUMPY_MIN_ROWS = 64
+_VALID_RATES = tuple(float(r) for r in GST_RATES + SPECIAL_GST_RATES)
+
+
+def normalize_gst_rate(rate: float) -> float:
+    """A slab rate as is; otherwise the nearest whole standard rate, else 18%."""
+    rate = float(rate or 0)
+    if rate in _VALID_RATES:
+        return rate
+    return float(round(rate)) if round(rate) in GST_RATES else FALLBACK_GST_RATE
+
+
+def to_paise(rupees: float) -> int:
+    """Half away from zero; rounding to 6 places first absorbs float noise (1.005 -> 101)."""
+    cents = round(abs(rupees) * 100, 6)
+    paise = int(cents + 0.5)
+    return -paise if rupees < 0 else paise
+
+
+def _div_half_up(n: int, d: int) -> int:
+    q = (abs(n) + d // 2) // d
+    return -q if n < 0 else q
+
+
+def line_gst_paise(base_paise: int, rate: float, is_inter_state: bool) -> tuple[int, int, int]:
+    """(cgst, sgst, igst) in paise for one line with an already normalised rate."""
+    scaled = base_paise * round(rate * 100)  # rate in basis points: 0.25% stays exact
+    if is_inter_state:
+        return 0, 0, _div_half_up(scaled, 10_000)
+    half = _div_half_up(scaled, 20_000)
+    return half, half, 0
+
+
+@dataclass
+class GSTColumns:
+    """Per-line amounts in paise: int64 NumPy arrays, or lists of int without NumPy."""
+
+    taxable: Any
+    cgst: Any
+    sgst: Any
+    igst: Any
+
+    def __len__(self) -> int:
+        return len(self.taxable)
+
+    def _paise(self, column: str) -> Any:
+        if column == "gst":
+            if _is_array(self.cgst):
+                return self.cgst + self.sgst + self.igst
+            return [c + s + i for c, s, i in zip(self.cgst, self.sgst, self.igst)]
+        if column == "total":
+            gst = self._paise("gst")
+            if _is_array(gst):
+                return self.taxable + gst
+            return [t + g for t, g in zip(self.taxable, gst)]
+        return getattr(self, column)
+
+    def rupees(self, column: str) -> list[float]:
+        """A column as rupee floats: taxable, cgst, sgst, igst, gst or total."""
+        values = self._paise(column)
+        if _is_array(values):
+            return (values / 100).tolist()
+        return [v / 100 for v in values]
+
+    def totals(self) -> dict[str, float]:
+        """Invoice totals from exact paise sums."""
+        sums = {}
+        for column in ("taxable", "cgst", "sgst", "igst", "gst", "total"):
+            values = self._paise(column)
+            sums[column] = int(values.sum()) if _is_array(values) else sum(values)
+        return {
+            "taxable_value": sums["taxable"] / 100,
+            "cgst": sums["cgst"] / 100,
+            "sgst": sums["sgst"] / 100,
+            "igst": sums["igst"] / 100,
+            "gst_total": sums["gst"] / 100,
+            "grand_total": sums["total"] / 100,
+        }
+
+
+def _is_array(values: Any) -> bool:
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def _column(values: Any, n: int, default: Any) -> Sequence:
+    if values is None:
+        return [default] * n
+    if isinstance(values, (bool, int, float)):
+        return [values] * n
+    return values
+
+
+def calculate_gst_columns(
+    taxable_values: Sequence[float],
+    gst_rates: Sequence[float] | float,
+    is_inter_state: Sequence[bool] | bool,
+    qty: Sequence[float] | float | None = None,
+) -> GSTColumns:
+    """
+    GST for many lines at once. Rates, inter-state flags and qty may be single values
+    applied to every line; qty defaults to 1 (taxable values are line totals).
+    """
+    n = len(taxable_values)
+    rates = _column(gst_rates, n, 0.0)
+    inter = _column(is_inter_state, n, False)
+    qtys = _column(qty, n, 1.0)
+    if np is not None and n >= NUMPY_MIN_ROWS:
+        return _columns_numpy(taxable_values, rates, inter, qtys)
+    taxable, cgst, sgst, igst = [], [], [], []
+    for value, rate, is_inter, q in zip(taxable_values, rates, inter, qtys):
+        base = to_paise(float(value or 0) * float(q if q is not None else 1.0))
+        c, s, i = line_gst_paise(base, normalize_gst_rate(rate), bool(is_inter))
+        taxable.append(base)
+        cgst.append(c)
+        sgst.append(s)
+        igst.append(i)
+    return GSTColumns(taxable, cgst, sgst, igst)
+
+
+def _half_up(n: Any, d: int) -> Any:
+    return np.sign(n) * ((np.abs(n) + d // 2) // d)
+
+
+def _floats(values: Sequence, default: float) -> Any:
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):  # None or blanks among the values
+        array = np.array([float(v) if v not in (None, "") else default for v in values], dtype=np.float64)
+    return np.nan_to_num(array, nan=default)
+
+
+def _columns_numpy(taxable_values: Sequence, rates: Sequence, inter: Sequence, qtys: Sequence) -> GSTColumns:
+    values = _floats(taxable_values, 0.0)
+    q = _floats(qtys, 1.0)
+    amount = values * q
+    base = (np.sign(amount) * np.floor(np.round(np.abs(amount) * 100, 6) + 0.5)).astype(np.int64)
+
+    r = _floats(rates, 0.0)
+    whole = np.round(r)
+    r = np.where(np.isin(r, _VALID_RATES), r, np.where(np.isin(whole, GST_RATES), whole, FALLBACK_GST_RATE))
+    scaled = base * np.rint(r * 100).astype(np.int64)
+
+    flags = np.asarray(inter, dtype=bool)
+    half = _half_up(scaled, 20_000)
+    zero = np.zeros_like(base)
+    return GSTColumns(
+        taxable=base,
+        cgst=np.where(flags, zero, half),
+        sgst=np.where(flags, zero, half),
+        igst=np.where(flags, _half_up(scaled, 10_000), zero),
+    )
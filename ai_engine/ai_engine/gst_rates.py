@@ -5,22 +5,52 @@ Single source for rate constants and intra/inter-state logic.
 
 # Standard GST rates (percent)
 GST_RATES = (0, 5, 12, 18, 28)
+# Special rates: rough diamonds, cut stones, gold and jewellery, job work, composition schemes
+SPECIAL_GST_RATES = (0.1, 0.25, 1, 1.5, 3, 6, 7.5)
 
 # State codes (place of supply) — used for IGST vs CGST+SGST
-# Full list can be extended per GSTN; common ones for validation
+# GSTN state/UT codes: the first two digits of every GSTIN
 STATE_CODES = {
     "01": "Jammu and Kashmir",
     "02": "Himachal Pradesh",
+    "03": "Punjab",
+    "04": "Chandigarh",
+    "05": "Uttarakhand",
+    "06": "Haryana",
     "07": "Delhi",
+    "08": "Rajasthan",
     "09": "Uttar Pradesh",
     "10": "Bihar",
+    "11": "Sikkim",
+    "12": "Arunachal Pradesh",
+    "13": "Nagaland",
+    "14": "Manipur",
+    "15": "Mizoram",
+    "16": "Tripura",
+    "17": "Meghalaya",
+    "18": "Assam",
+    "19": "West Bengal",
+    "20": "Jharkhand",
+    "21": "Odisha",
+    "22": "Chhattisgarh",
+    "23": "Madhya Pradesh",
+    "24": "Gujarat",
+    "25": "Daman and Diu",  # merged into 26 in 2020; still on older GSTINs
+    "26": "Dadra and Nagar Haveli and Daman and Diu",
     "27": "Maharashtra",
+    "28": "Andhra Pradesh (Old)",
+    "29": "Karnataka",
+    "30": "Goa",
+    "31": "Lakshadweep",
+    "32": "Kerala",
     "33": "Tamil Nadu",
+    "34": "Puducherry",
+    "35": "Andaman and Nicobar Islands",
     "36": "Telangana",
     "37": "Andhra Pradesh",
-    "29": "Karnataka",
-    "32": "Kerala",
-    # Add others as needed
+    "38": "Ladakh",
+    "97": "Other Territory",
+    "99": "Centre Jurisdiction",
 }
 
 
@@ -0,0 +1,179 @@
+"""
+HSN/SAC rate master: code prefix -> default GST rate and expense category.
+The source of truth is data/hsn_rates.csv (chapter, heading and sub-heading rows; deeper
+rows override shallower ones). It is compiled into data/hsn_master.sqlite, a read-only
+WITHOUT ROWID table keyed by code, which is opened lazily, memory-mapped and queried by
+longest prefix. lookup_many() resolves all codes of an invoice in one query.
+
+Rebuild the SQLite file after editing the CSV (a test fails while they disagree):
+    python -m ai_engine.ai_engine.hsn_master
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_CSV_PATH = DATA_DIR / "hsn_rates.csv"
+DEFAULT_DB_PATH = DATA_DIR / "hsn_master.sqlite"
+# Codes are 2 (chapter) to 8 (tariff item) digits; shorter or longer input is cut to this
+MIN_CODE_DIGITS = 2
+MAX_CODE_DIGITS = 8
+MMAP_BYTES = 8 * 1024 * 1024
+MEMO_ENTRIES = 4096
+_SQLITE_MAX_PARAMS = 900
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+@dataclass(frozen=True)
+class HSNEntry:
+    code: str  # the matched master row (a prefix of the looked-up code)
+    rate: float
+    category: str
+    description: str
+
+
+def hsn_master_enabled() -> bool:
+    return os.environ.get("HSN_MASTER", "1").lower() in ("1", "true", "yes", "on")
+
+
+def _prefixes(code: str) -> list[str]:
+    """'84713010' -> ['84713010', '8471301', ..., '84'] (longest first)."""
+    digits = _NON_DIGIT.sub("", code or "")[:MAX_CODE_DIGITS]
+    return [digits[:n] for n in range(len(digits), MIN_CODE_DIGITS - 1, -1)]
+
+
+class HSNMaster:
+    """Read-only view of the master file. Thread-safe; lookups are memoised per code."""
+
+    def __init__(self, path: str | Path = DEFAULT_DB_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._memo: dict[str, HSNEntry | None] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # immutable=1: no locking or change detection, the file never changes under us
+            uri = f"{self.path.resolve().as_uri()}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+            self._conn = conn
+        return self._conn
+
+    def _rows(self, prefixes: list[str]) -> dict[str, HSNEntry]:
+        """Master rows for the given exact codes; the caller holds the lock."""
+        found: dict[str, HSNEntry] = {}
+        conn = self._connect()
+        for start in range(0, len(prefixes), _SQLITE_MAX_PARAMS):
+            part = prefixes[start : start + _SQLITE_MAX_PARAMS]
+            marks = ",".join("?" * len(part))
+            for code, rate, category, description in conn.execute(
+                f"SELECT code, rate, category, description FROM hsn WHERE code IN ({marks})", part
+            ):
+                found[code] = HSNEntry(code, rate, category, description)
+        return found
+
+    def lookup(self, hsn_sac: str) -> HSNEntry | None:
+        """Master row for the longest prefix of `hsn_sac` (digits only), or None."""
+        return self.lookup_many([hsn_sac])[0]
+
+    def lookup_many(self, codes: Iterable[str]) -> list[HSNEntry | None]:
+        """lookup() for many codes with a single query for all codes not memoised yet."""
+        codes = list(codes)
+        with self._lock:
+            resolved = {code: self._memo[code] for code in dict.fromkeys(codes) if code in self._memo}
+            pending = {code: _prefixes(code) for code in dict.fromkeys(codes) if code not in resolved}
+            if pending:
+                wanted = sorted({p for prefixes in pending.values() for p in prefixes})
+                rows = self._rows(wanted) if wanted else {}
+                for code, prefixes in pending.items():
+                    resolved[code] = next((rows[p] for p in prefixes if p in rows), None)
+                # The memo is a cache only: results come from `resolved`, so evicting is safe
+                if len(self._memo) + len(pending) > MEMO_ENTRIES:
+                    self._memo.clear()
+                self._memo.update((code, resolved[code]) for code in pending)
+        return [resolved[code] for code in codes]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def read_csv(path: str | Path = DEFAULT_CSV_PATH) -> list[HSNEntry]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return [
+            HSNEntry(row["code"].strip(), float(row["rate"]), row["category"].strip(), row["description"].strip())
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_master(csv_path: str | Path = DEFAULT_CSV_PATH, db_path: str | Path = DEFAULT_DB_PATH) -> int:
+    """Compile the CSV into a fresh SQLite master file; returns the number of rows."""
+    entries = read_csv(csv_path)
+    for entry in entries:
+        if not entry.code.isdigit() or not MIN_CODE_DIGITS <= len(entry.code) <= MAX_CODE_DIGITS:
+            raise ValueError(f"HSN/SAC code must be {MIN_CODE_DIGITS}-{MAX_CODE_DIGITS} digits: {entry.code!r}")
+    db_path = Path(db_path)
+    tmp = db_path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute(
+            "CREATE TABLE hsn (code TEXT PRIMARY KEY, rate REAL NOT NULL, category TEXT NOT NULL, "
+            "description TEXT NOT NULL) WITHOUT ROWID"
+        )
+        conn.executemany("INSERT INTO hsn VALUES (?, ?, ?, ?)", [(e.code, e.rate, e.category, e.description) for e in entries])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, db_path)
+    return len(entries)
+
+
+_master: HSNMaster | None = None
+_master_pid: int | None = None
+_master_lock = threading.Lock()
+
+
+def get_hsn_master() -> HSNMaster | None:
+    """
+    Process-wide master (reopened after a fork), or None when HSN_MASTER=0 or the file is
+    missing. HSN_MASTER_PATH points at another compiled master file.
+    """
+    global _master, _master_pid
+    if not hsn_master_enabled():
+        return None
+    pid = os.getpid()
+    with _master_lock:
+        if _master is None or _master_pid != pid:
+            path = Path(os.environ.get("HSN_MASTER_PATH") or DEFAULT_DB_PATH)
+            if not path.is_file():
+                return None
+            _master = HSNMaster(path)
+            _master_pid = pid
+        return _master
+
+
+def reset_hsn_master() -> None:
+    """Close the master so the next call re-reads the environment."""
+    global _master
+    with _master_lock:
+        if _master is not None:
+            _master.close()
+        _master = None
+
+
+if __name__ == "__main__":
+    print(f"{build_master()} rows -> {DEFAULT_DB_PATH}")
@@ -0,0 +1,107 @@
+"""
+Shared HTTP clients for LLM calls.
+One pooled keep-alive httpx.Client per process and one httpx.AsyncClient per event
+loop, created lazily, so consecutive invoices reuse TCP+TLS connections.
+HTTP/2 is used when the optional h2 package is installed (httpx[http2]).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+
+import httpx
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _http2_enabled() -> bool:
+    """LLM_HTTP2=1 (default) uses HTTP/2 when h2 is importable."""
+    if os.environ.get("LLM_HTTP2", "1").lower() in ("0", "false", "no", "off"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    """LLM_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE, LLM_KEEPALIVE_EXPIRY."""
+    return {
+        "timeout": _env_float("LLM_TIMEOUT", DEFAULT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=int(_env_float("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive_connections=int(_env_float("LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=_env_float("LLM_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY),
+        ),
+        "http2": _http2_enabled(),
+    }
+
+
+_client: httpx.Client | None = None
+_client_pid: int | None = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Process-wide pooled client (httpx.Client is thread-safe). Recreated after a fork,
+    so worker processes never share sockets with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    with _lock:
+        if _client is None or _client.is_closed or _client_pid != pid:
+            _client = httpx.Client(**_client_options())
+            _client_pid = pid
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async client for the running event loop (async clients cannot cross loops)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[loop] = client
+        return client
+
+
+def close_http_clients() -> None:
+    """Close the sync client (registered with atexit; call from app shutdown hooks too)."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None and not client.is_closed:
+        client.close()
+
+
+async def aclose_http_clients() -> None:
+    """Close the sync client and the current event loop's async client."""
+    close_http_clients()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+atexit.register(close_http_clients)
@@ -1,75 +1,413 @@
 """
 Invoice processor: single entry point.
-process_invoice(file_path | bytes) -> InvoiceExtractResult.
+process_invoice(file_path | bytes) -> InvoiceExtractResult, and process_invoice_async /
+process_invoices_async for overlapping many invoices in one event loop.
 Orchestrates OCR -> LLM extract -> category mapping -> GST calculation.
 """
 
 from __future__ import annotations
 
+import asyncio
+import os
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union
+from typing import Any, Iterable, Union
 
-from .category_mappings import get_category_and_rate
-from .gst_calculator import calculate_gst
-from .llm_extractor import extract_from_text, parse_extract_to_result
-from .ocr_service import extract_text
+from .category_mappings import categorize_many, get_category_and_rate
+from .gst_engine import GSTColumns, calculate_gst_columns
+from .json_stream import EventHandler
+from .layout import TableResult, Word, reconstruct_table
+from .llm_extractor import (
+    aextract_from_text,
+    extract_batch,
+    extract_from_text,
+    parse_extract_to_result,
+)
+from .ocr_service import MIN_PAGE_TEXT_CHARS, extract_text, read_input
+from .pdf_tables import extract_pdf_line_items
+from .records import LINE_ITEMS, LineRecord
+from .rule_extractor import (
+    DEFAULT_MIN_CONFIDENCE,
+    KEY_FIELDS,
+    REQUIRED_FIELDS,
+    RuleExtraction,
+    extract_fields,
+)
 from .types import (
     Confidence,
     InvoiceExtractResult,
     LineItem,
+    LLMInfo,
+    OCRInfo,
+    ProcessingInfo,
     Totals,
 )
 
 
-def process_invoice(file_path_or_bytes: Union[str, Path, bytes], content_type: str | None = None) -> InvoiceExtractResult:
+DEFAULT_CONCURRENCY = 8
+# Rupees of round-off allowed between stated and recomputed totals (or 0.5%, if larger)
+TOTALS_TOLERANCE = 1.0
+MISMATCH_CONFIDENCE = 0.5
+
+
+def _totals_agree(expected: float, actual: float) -> bool:
+    return abs(expected - actual) <= max(TOTALS_TOLERANCE, expected * 0.005)
+
+
+def _get_concurrency() -> int:
+    try:
+        return int(os.environ.get("INVOICE_CONCURRENCY", DEFAULT_CONCURRENCY))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+def _layout_enabled() -> bool:
+    return os.environ.get("OCR_LAYOUT", "0").lower() in ("1", "true", "yes", "on")
+
+
+def _pdf_tables_enabled() -> bool:
+    return os.environ.get("PDF_TABLES", "1").lower() in ("1", "true", "yes", "on")
+
+
+def _rules_enabled() -> bool:
+    return os.environ.get("RULE_EXTRACTOR", "1").lower() in ("1", "true", "yes", "on")
+
+
+def _rule_min_confidence() -> float:
+    try:
+        return float(os.environ.get("RULE_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+    except ValueError:
+        return DEFAULT_MIN_CONFIDENCE
+
+
+def _rules_cover_table(rules: RuleExtraction, table: TableResult, threshold: float) -> bool:
     """
-    Process an invoice (image or PDF) and return structured extraction result.
-    - OCR -> raw text
-    - LLM -> extracted fields
-    - Category mapping + GST calculation applied to each line item
+    True when the LLM can be skipped: every required field is certain and the stated
+    taxable value matches the sum of the recovered line items.
     """
-    raw_text = extract_text(file_path_or_bytes, content_type=content_type)
+    if rules.missing(threshold=threshold):
+        return False
+    items_taxable = sum(item.taxable_value for item in table.items)
+    return _totals_agree(float(rules.get("totals.taxable_value") or 0), items_taxable)
+
+
+def _pdf_table(pdf_bytes: bytes) -> TableResult | None:
+    """Native PyMuPDF table fast path; any failure just means 'no table'."""
+    try:
+        return extract_pdf_line_items(pdf_bytes, min_page_text=MIN_PAGE_TEXT_CHARS)
+    except Exception:
+        return None
+
+
+@dataclass
+class _Prepared:
+    """Everything before the LLM call: OCR text, recovered table, rule fields and the LLM request."""
+
+    raw_text: str
+    ocr_info: OCRInfo
+    table: TableResult | None
+    source: str
+    rules: RuleExtraction
+    threshold: float
+    llm_text: str
+    llm_kwargs: dict | None  # None: the rules cover every field, no LLM call
+    llm_keys: list[str]
+    fields_source: str
+    llm_info: LLMInfo = field(default_factory=LLMInfo)
+    # (description, hsn_sac) -> (category, default rate), filled while items stream in
+    categories: dict[tuple[str, str], tuple[str, float]] = field(default_factory=dict)
+
+
+def _prepare(
+    file_path_or_bytes: Union[str, Path, bytes],
+    content_type: str | None,
+    layout: bool | None,
+) -> _Prepared | InvoiceExtractResult:
+    """OCR, table recovery and rule extraction (CPU-bound); returns the final result for blank input."""
+    if layout is None:
+        layout = _layout_enabled()
+    ocr_info = OCRInfo()
+    words: list[Word] | None = [] if layout else None
+    data, is_pdf = read_input(file_path_or_bytes, content_type)
+    if is_pdf:
+        content_type = "application/pdf"
+    raw_text = extract_text(data, content_type=content_type, info=ocr_info, words=words)
     if not raw_text or not raw_text.strip():
         return InvoiceExtractResult(
             raw_text=raw_text or "",
             confidence=Confidence(overall=0.0, fields={}),
+            processing=ProcessingInfo(ocr=ocr_info),
         )
 
-    raw = extract_from_text(raw_text)
-    result = parse_extract_to_result(raw, raw_text)
+    table = _pdf_table(data) if is_pdf and _pdf_tables_enabled() else None
+    source = "pdf_table"
+    if (table is None or not table.clean) and words:
+        table, source = reconstruct_table(words), "layout"
+    if table is None or not table.clean:
+        table, source = None, "llm"
+    threshold = _rule_min_confidence()
+    rules = extract_fields(raw_text) if _rules_enabled() else RuleExtraction()
+    prepared = _Prepared(
+        raw_text=raw_text,
+        ocr_info=ocr_info,
+        table=table,
+        source=source,
+        rules=rules,
+        threshold=threshold,
+        llm_text=table.compact_text if table else raw_text,
+        llm_kwargs=None,
+        llm_keys=[],
+        fields_source="rules",
+    )
+    if table and _rules_cover_table(rules, table, threshold):
+        prepared.llm_text = ""
+        return prepared
+
+    keys = rules.llm_keys(threshold)
+    # Narrow the prompt only when the rules filled something; otherwise keep the full contract
+    fields = keys if len(keys) < len(KEY_FIELDS) else None
+    kwargs: dict = {"info": prepared.llm_info}
+    if table:
+        kwargs["include_line_items"] = False
+    if fields is not None:
+        kwargs["fields"] = fields
+    prepared.llm_kwargs = kwargs
+    prepared.llm_keys = (fields if fields is not None else list(KEY_FIELDS)) + ([] if table else ["line_items"])
+    prepared.fields_source = "llm" if fields is None else "rules+llm"
+    return prepared
+
+
+def _enrich_items(
+    records: list[LineRecord], is_inter: bool, categories: dict[tuple[str, str], tuple[str, float]]
+) -> tuple[list[dict[str, Any]], GSTColumns]:
+    """
+    Contract dicts for line items: category and default rate from HSN/description (memoised
+    in `categories`), GST for all items in one engine call.
+    """
+    rates: list[float] = []
+    taxables: list[float] = []
+    for record in records:
+        key = (record.description, record.hsn_sac)
+        if key not in categories:
+            categories[key] = get_category_and_rate(record.description, record.hsn_sac)
+        rates.append(record.gst_rate if record.gst_rate else categories[key][1])
+        taxables.append(record.taxable_value or (record.unit_price * record.qty))
+    columns = calculate_gst_columns(taxables, rates, is_inter)
+    cgst, sgst, igst, total = (columns.rupees(c) for c in ("cgst", "sgst", "igst", "total"))
+    enriched = [
+        {
+            "description": record.description,
+            "hsn_sac": record.hsn_sac,
+            "category": categories[(record.description, record.hsn_sac)][0],
+            "qty": record.qty,
+            "unit_price": record.unit_price,
+            "taxable_value": taxables[n],
+            "gst_rate": rates[n],
+            "gst_breakdown": {"cgst": cgst[n], "sgst": sgst[n], "igst": igst[n]},
+            "total": total[n],
+        }
+        for n, record in enumerate(records)
+    ]
+    return enriched, columns
+
+
+def _enrich_item(record: LineRecord, is_inter: bool, categories: dict[tuple[str, str], tuple[str, float]]) -> LineItem:
+    return LineItem.model_validate(_enrich_items([record], is_inter, categories)[0][0])
+
+
+def _partial_handler(prepared: _Prepared, on_partial: EventHandler) -> EventHandler:
+    """
+    Report what is already known (rule fields, recovered table items) and return the
+    LLM on_event handler: streamed fields are merged with the rule fields, streamed items
+    are enriched on arrival. Category lookups are memoised, so _finish does not repeat them.
+    GST of early items uses the best is_inter_state known at that point; the final result
+    is authoritative.
+    """
+    rules, threshold = prepared.rules, prepared.threshold
+    is_inter = bool(rules.get("is_inter_state")) if not rules.missing(["is_inter_state"], threshold) else False
+    for key, value in rules.raw.items():
+        on_partial("field", key, value)
+    for n, item in enumerate(prepared.table.items if prepared.table else []):
+        on_partial("item", n, _enrich_item(item, is_inter, prepared.categories))
+
+    def handle(kind: str, key: Any, value: Any) -> None:
+        nonlocal is_inter
+        if kind == "item":
+            if isinstance(value, dict):
+                on_partial("item", key, _enrich_item(LineRecord.from_reply(value), is_inter, prepared.categories))
+            return
+        if key == "line_items":
+            return  # already reported item by item
+        value = rules.merge_into({key: value}, threshold).get(key)
+        if key == "is_inter_state":
+            is_inter = bool(value)
+        on_partial("field", key, value)
+
+    return handle
+
+
+def _llm_kwargs(prepared: _Prepared, handler: EventHandler | None) -> dict:
+    return prepared.llm_kwargs if handler is None else {**prepared.llm_kwargs, "on_event": handler}
+
+
+def _finish(prepared: _Prepared, llm_raw: dict | None) -> InvoiceExtractResult:
+    """Merge rule and LLM fields, then enrich line items with category and GST."""
+    rules = prepared.rules
+    raw = rules.merge_into(llm_raw or {}, prepared.threshold)
+    replied = raw.pop("line_items", None) or []
+    result = parse_extract_to_result(raw, prepared.raw_text)
+    if prepared.table:
+        records = prepared.table.items
+    else:
+        records = [LineRecord.from_reply(it) for it in replied if isinstance(it, dict)]
+    if prepared.fields_source == "rules":
+        result.confidence.overall = min(rules.confidence[f] for f in REQUIRED_FIELDS)
+    result.processing.line_items_source = prepared.source
+    result.processing.fields_source = prepared.fields_source
+    result.processing.llm_fields = prepared.llm_keys
+    result.processing.ocr = prepared.ocr_info
+    result.processing.llm = prepared.llm_info
+    result.processing.llm_input_chars = prepared.llm_info.input_chars
 
     # Enrich line items: category from HSN/description, gst_breakdown from calculator
     is_inter = result.is_inter_state
-    new_items: list[LineItem] = []
-    total_taxable = 0.0
-    total_gst = 0.0
-
-    for item in result.line_items:
-        category, default_rate = get_category_and_rate(item.description, item.hsn_sac)
-        rate = item.gst_rate if item.gst_rate else default_rate
-        taxable = item.taxable_value or (item.unit_price * item.qty)
-        breakdown = calculate_gst(taxable, rate, is_inter, quantity=1.0)
-        line_total = taxable + breakdown.cgst + breakdown.sgst + breakdown.igst
-
-        total_taxable += taxable
-        total_gst += breakdown.cgst + breakdown.sgst + breakdown.igst
-
-        new_items.append(
-            LineItem(
-                description=item.description,
-                hsn_sac=item.hsn_sac,
-                category=category,
-                qty=item.qty,
-                unit_price=item.unit_price,
-                taxable_value=taxable,
-                gst_rate=rate,
-                gst_breakdown=breakdown,
-                total=round(line_total, 2),
-            )
-        )
+    # Categorise the items not seen while streaming in one batch scan
+    keys = dict.fromkeys((record.description, record.hsn_sac) for record in records)
+    missing = [key for key in keys if key not in prepared.categories]
+    prepared.categories.update(zip(missing, categorize_many(missing)))
+    new_items, columns = _enrich_items(records, is_inter, prepared.categories)
+    totals = columns.totals()
 
-    result.line_items = new_items
-    result.totals.taxable_value = round(total_taxable, 2)
-    result.totals.gst_total = round(total_gst, 2)
-    result.totals.grand_total = round(total_taxable + total_gst, 2)
+    stated = result.totals.model_copy()
+    result.line_items = LINE_ITEMS.validate_python(new_items)  # the one pydantic pass over the items
+    result.totals.taxable_value = totals["taxable_value"]
+    result.totals.gst_total = totals["gst_total"]
+    result.totals.grand_total = totals["grand_total"]
+    _reconcile_totals(result, stated)
     return result
+
+
+def _reconcile_totals(result: InvoiceExtractResult, stated: Totals) -> None:
+    """
+    Compare recomputed totals with the ones printed on the invoice. A mismatch means line
+    items were lost or misread (e.g. a chunk of a long invoice), so confidence is capped.
+    """
+    result.processing.stated_totals = stated
+    if stated.taxable_value > 0:
+        expected, actual = stated.taxable_value, result.totals.taxable_value
+    elif stated.grand_total > 0:
+        expected, actual = stated.grand_total, result.totals.grand_total
+    else:
+        return
+    result.processing.totals_match = _totals_agree(expected, actual)
+    if not result.processing.totals_match:
+        result.confidence.overall = min(result.confidence.overall, MISMATCH_CONFIDENCE)
+
+
+def process_invoice(
+    file_path_or_bytes: Union[str, Path, bytes],
+    content_type: str | None = None,
+    layout: bool | None = None,
+    on_partial: EventHandler | None = None,
+) -> InvoiceExtractResult:
+    """
+    Process an invoice (image or PDF) and return structured extraction result.
+    - OCR -> raw text
+    - LLM -> extracted fields
+    - Category mapping + GST calculation applied to each line item
+    Line items come from the first clean source, cheapest first:
+    - digital PDFs: PyMuPDF's native table detection (PDF_TABLES env, default on)
+    - layout (default OCR_LAYOUT env): OCR word boxes aligned to the table header
+    - otherwise the LLM
+    When a table is recovered, the LLM only extracts header fields from the text outside it.
+    Header fields are first read by the rule-based pre-extractor (RULE_EXTRACTOR env, default
+    on): the LLM is skipped when the items came from a table and every required field is
+    certain, and is otherwise only asked for the keys the rules could not fill.
+    on_partial optional: on_partial(kind, key, value) receives ("field", key, value) for header
+    fields and ("item", index, LineItem) for enriched line items while the LLM reply is still
+    streaming (later events for the same key or index supersede earlier ones).
+    """
+    prepared = _prepare(file_path_or_bytes, content_type, layout)
+    if isinstance(prepared, InvoiceExtractResult):
+        return prepared
+    handler = _partial_handler(prepared, on_partial) if on_partial is not None else None
+    raw = None
+    if prepared.llm_kwargs is not None:
+        raw = extract_from_text(prepared.llm_text, **_llm_kwargs(prepared, handler))
+    return _finish(prepared, raw)
+
+
+def process_invoice_batch(
+    files: Iterable[Union[str, Path, bytes]],
+    content_type: str | None = None,
+    layout: bool | None = None,
+) -> list[InvoiceExtractResult]:
+    """
+    process_invoice for many small invoices (retail bills): invoices that need the same
+    LLM request shape are packed into shared requests (llm_extractor.extract_batch), so the
+    schema prompt is paid once per pack instead of once per invoice. Results are in input order.
+    """
+    prepared = [_prepare(f, content_type, layout) for f in files]
+    groups: dict[tuple, list[int]] = {}
+    for i, p in enumerate(prepared):
+        if isinstance(p, _Prepared) and p.llm_kwargs is not None:
+            fields = p.llm_kwargs.get("fields")
+            shape = (p.llm_kwargs.get("include_line_items", True), tuple(fields) if fields is not None else None)
+            groups.setdefault(shape, []).append(i)
+    replies: dict[int, dict] = {}
+    for (include_line_items, fields), idx in groups.items():
+        raws = extract_batch(
+            [prepared[i].llm_text for i in idx],
+            include_line_items=include_line_items,
+            fields=fields,
+            infos=[prepared[i].llm_info for i in idx],
+        )
+        replies.update(zip(idx, raws))
+    return [p if isinstance(p, InvoiceExtractResult) else _finish(p, replies.get(i)) for i, p in enumerate(prepared)]
+
+
+async def process_invoice_async(
+    file_path_or_bytes: Union[str, Path, bytes],
+    content_type: str | None = None,
+    layout: bool | None = None,
+    executor: Executor | None = None,
+    on_partial: EventHandler | None = None,
+) -> InvoiceExtractResult:
+    """
+    Async process_invoice: OCR, table and rule stages run in `executor` (default: the
+    loop's thread pool; page OCR still fans out to the OCR process pool) and the LLM call
+    is awaited on the pooled async client, so one invoice's LLM wait overlaps another's OCR.
+    on_partial is called on the event loop as the reply streams in (see process_invoice).
+    """
+    loop = asyncio.get_running_loop()
+    prepared = await loop.run_in_executor(executor, _prepare, file_path_or_bytes, content_type, layout)
+    if isinstance(prepared, InvoiceExtractResult):
+        return prepared
+    handler = _partial_handler(prepared, on_partial) if on_partial is not None else None
+    raw = None
+    if prepared.llm_kwargs is not None:
+        raw = await aextract_from_text(prepared.llm_text, **_llm_kwargs(prepared, handler))
+    return _finish(prepared, raw)
+
+
+async def process_invoices_async(
+    files: Iterable[Union[str, Path, bytes]],
+    content_type: str | None = None,
+    layout: bool | None = None,
+    concurrency: int | None = None,
+    executor: Executor | None = None,
+    return_exceptions: bool = False,
+) -> list[InvoiceExtractResult | BaseException]:
+    """
+    Process many invoices concurrently (asyncio.gather), at most `concurrency` in flight
+    (default INVOICE_CONCURRENCY env, 8). Results are in input order; with
+    return_exceptions=True a failed invoice yields its exception instead of failing the batch.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency or _get_concurrency()))
+
+    async def one(f: Union[str, Path, bytes]) -> InvoiceExtractResult:
+        async with limit:
+            return await process_invoice_async(f, content_type=content_type, layout=layout, executor=executor)
+
+    return await asyncio.gather(*(one(f) for f in files), return_exceptions=return_exceptions)
@@ -0,0 +1,120 @@
+"""
+Incremental JSON parsing for streamed LLM replies.
+The extraction reply is one JSON object (optionally in a markdown fence). While it is
+being generated, JSONStream reports each top-level key as soon as its value is complete
+and each line_items element as soon as its closing brace arrives, so callers can start
+on header fields and early items before the model has finished.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+# on_event(kind, key, value): ("field", top-level key, value) or ("item", line item index, item dict)
+EventHandler = Callable[[str, Any, Any], None]
+
+ITEMS_KEY = "line_items"
+
+
+class JSONStream:
+    """
+    Feed text deltas with feed(); it returns the events completed by that delta.
+    Only the structure needed for events is tracked (nesting, strings, top-level keys);
+    values are decoded with json.loads once complete. result() decodes the whole object.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._root: int | None = None  # index of the opening brace
+        self._end: int | None = None  # index after the closing brace
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: str | None = None  # current top-level key
+        self._expect_key = True
+        self._value_start: int | None = None
+        self._item_start: int | None = None
+        self._items = 0
+
+    @property
+    def done(self) -> bool:
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, delta: str) -> list[tuple[str, Any, Any]]:
+        events: list[tuple[str, Any, Any]] = []
+        self._text += delta
+        text = self._text
+        while self._pos < len(text) and self._end is None:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+            if self._root is None:
+                if ch == "{":  # skips a markdown fence or any preamble
+                    self._root = i
+                    self._stack.append(ch)
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._expect_key:
+                        self._key = json.loads(text[self._string_start : i + 1])
+                        self._expect_key = False
+                continue
+            depth = len(self._stack)
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._stack.append(ch)
+                if depth == 2 and self._key == ITEMS_KEY and self._stack[1] == "[" and ch == "{":
+                    self._item_start = i
+            elif ch in "}]":
+                self._stack.pop()
+                if depth == 3 and self._item_start is not None:
+                    item = json.loads(text[self._item_start : i + 1])
+                    events.append(("item", self._items, item))
+                    self._items += 1
+                    self._item_start = None
+                elif depth == 1:
+                    self._field_done(text, i, events)
+                    self._end = i + 1
+            elif depth == 1:
+                if ch == ":":
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._field_done(text, i, events)
+        return events
+
+    def _field_done(self, text: str, end: int, events: list[tuple[str, Any, Any]]) -> None:
+        if self._key is not None and self._value_start is not None:
+            events.append(("field", self._key, json.loads(text[self._value_start : end])))
+        self._key = None
+        self._value_start = None
+        self._expect_key = True
+
+    def result(self) -> dict[str, Any]:
+        """The complete reply object; ValueError if the stream ended before it was closed."""
+        if self._root is None or self._end is None:
+            raise ValueError("Incomplete LLM response")
+        return json.loads(self._text[self._root : self._end])
+
+
+def replay(raw: dict[str, Any], on_event: EventHandler) -> None:
+    """Emit the events of an already complete reply (cache hits, non-streamed replies)."""
+    for key, value in raw.items():
+        if key == ITEMS_KEY and isinstance(value, list):
+            for n, item in enumerate(value):
+                on_event("item", n, item)
+        on_event("field", key, value)
@@ -0,0 +1,356 @@
+"""
+Layout-aware OCR output: word boxes -> text lines -> line-item table.
+Words come from Tesseract (image_to_data / tesserocr iterator) for scanned pages and
+from PyMuPDF get_text("words") for digital pages. Line items are recovered by
+aligning each row's words with the columns of the item table header.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from .records import LineRecord
+
+
+@dataclass(slots=True)
+class Word:
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    conf: float = 100.0  # 0-100; digital text layer words are exact
+    page: int = 0
+
+    @property
+    def xc(self) -> float:
+        return (self.x0 + self.x1) / 2
+
+    @property
+    def yc(self) -> float:
+        return (self.y0 + self.y1) / 2
+
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+
+def words_to_rows(words: list[Word]) -> list[list]:
+    """Compact JSON-friendly form (for the OCR cache)."""
+    return [[w.text, w.x0, w.y0, w.x1, w.y1, w.conf, w.page] for w in words]
+
+
+def words_from_rows(rows: list[list]) -> list[Word]:
+    return [Word(*row) for row in rows]
+
+
+def words_from_tesseract_data(data: dict, page: int = 0) -> list[Word]:
+    """Word boxes from pytesseract image_to_data(output_type=DICT)."""
+    words = []
+    for i, text in enumerate(data["text"]):
+        text = str(text).strip()
+        if not text:
+            continue
+        x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        words.append(Word(text, float(x), float(y), float(x + w), float(y + h), float(data["conf"][i]), page))
+    return words
+
+
+def words_from_pymupdf(page, page_no: int = 0) -> list[Word]:
+    """Word boxes of a digital PDF page's text layer."""
+    return [Word(w[4], w[0], w[1], w[2], w[3], 100.0, page_no) for w in page.get_text("words")]
+
+
+def group_lines(words: list[Word]) -> list[list[Word]]:
+    """Group words into visual lines (same page, overlapping vertical centre), left to right."""
+    lines: list[list[Word]] = []
+    for w in sorted(words, key=lambda w: (w.page, w.yc, w.x0)):
+        if lines:
+            line = lines[-1]
+            ref = line[0]
+            if ref.page == w.page and abs(w.yc - ref.yc) <= max(ref.height, w.height) * 0.5:
+                line.append(w)
+                continue
+        lines.append([w])
+    for line in lines:
+        line.sort(key=lambda w: w.x0)
+    return lines
+
+
+def line_text(line: list[Word]) -> str:
+    return " ".join(w.text for w in line)
+
+
+# ---------------------------------------------------------------------------
+# Line-item table reconstruction
+# ---------------------------------------------------------------------------
+
+# Two-word header phrases are matched before single keywords ("taxable value" is
+# one column, not "taxable" + "value").
+_HEADER_PHRASES = {
+    ("taxable", "value"): "taxable_value",
+    ("taxable", "amount"): "taxable_value",
+    ("unit", "price"): "rate",
+    ("unit", "rate"): "rate",
+    ("gst", "rate"): "gst_rate",
+    ("tax", "rate"): "gst_rate",
+    ("gst", "%"): "gst_rate",
+    ("hsn", "code"): "hsn_sac",
+    ("sac", "code"): "hsn_sac",
+    ("item", "description"): "description",
+    ("igst", "rate"): "gst_rate",
+    ("igst", "%"): "gst_rate",
+    # Split tax columns are not line-item inputs; GST is recomputed from the rate
+    ("cgst", "rate"): "tax_detail",
+    ("sgst", "rate"): "tax_detail",
+    ("cgst", "%"): "tax_detail",
+    ("sgst", "%"): "tax_detail",
+    ("cgst", "amount"): "tax_detail",
+    ("sgst", "amount"): "tax_detail",
+    ("igst", "amount"): "tax_detail",
+    ("tax", "amount"): "tax_detail",
+}
+_HEADER_WORDS = {
+    "description": "description",
+    "particulars": "description",
+    "item": "description",
+    "items": "description",
+    "product": "description",
+    "goods": "description",
+    "hsn": "hsn_sac",
+    "sac": "hsn_sac",
+    "hsn/sac": "hsn_sac",
+    "qty": "qty",
+    "qty.": "qty",
+    "quantity": "qty",
+    "rate": "rate",
+    "price": "rate",
+    "taxable": "taxable_value",
+    "gst%": "gst_rate",
+    "gst(%)": "gst_rate",
+    "tax%": "gst_rate",
+    "amount": "amount",
+    "value": "amount",
+    "total": "amount",
+    "cgst": "tax_detail",
+    "sgst": "tax_detail",
+    "utgst": "tax_detail",
+    "igst": "tax_detail",
+    "cess": "tax_detail",
+}
+_SERIAL_WORDS = ("sl", "sl.", "s.no", "s.no.", "sr", "sr.", "no", "no.", "#")
+_TABLE_END = re.compile(
+    r"^(sub\s*-?\s*total|total|grand\s+total|taxable\s+(value|amount)\s*[:\-]|amount\s+(chargeable|in\s+words)|"
+    r"rupees|bank\s+details|terms)",
+    re.IGNORECASE,
+)
+_NUMBER = re.compile(r"^(?:₹|rs\.?|inr)?\(?-?\d[\d,]*(?:\.\d+)?\)?%?$", re.IGNORECASE)
+_DIGIT = re.compile(r"\d")
+# Columns whose digits make a row an item row rather than a wrapped description
+_NUMERIC_CELLS = ("hsn_sac", "qty", "rate", "gst_rate", "taxable_value", "amount")
+
+
+@dataclass(slots=True)
+class _Column:
+    kind: str
+    x0: float
+    x1: float
+
+    @property
+    def xc(self) -> float:
+        return (self.x0 + self.x1) / 2
+
+
+@dataclass
+class TableResult:
+    """Line items recovered from the layout, plus the text outside the item table."""
+
+    items: list[LineRecord] = field(default_factory=list)
+    clean: bool = False  # every row parsed and arithmetic checks out
+    row_count: int = 0
+    compact_text: str = ""  # document text with the item table rows removed
+
+
+def _norm(token: str) -> str:
+    return token.lower().strip(":|[]")
+
+
+def classify_header_cell(text: str) -> str | None:
+    """Column kind of a header cell such as 'Taxable Value', 'HSN/SAC' or 'Qty.'; None if unknown."""
+    tokens = [_norm(t) for t in text.replace("\n", " ").split()]
+    for a, b in zip(tokens, tokens[1:]):
+        kind = _HEADER_PHRASES.get((a, b))
+        if kind:
+            return kind
+    for token in tokens:
+        kind = _HEADER_WORDS.get(token)
+        if kind:
+            return kind
+    if tokens and tokens[0] in _SERIAL_WORDS:
+        return "serial"
+    return None
+
+
+def is_item_table_header(kinds: set[str]) -> bool:
+    """An item table has a description, an amount and at least one of qty/rate/HSN."""
+    return (
+        "description" in kinds
+        and bool(kinds & {"amount", "taxable_value"})
+        and bool(kinds & {"qty", "rate", "hsn_sac"})
+    )
+
+
+def _header_columns(line: list[Word]) -> list[_Column] | None:
+    """Classify header words into columns; None if the line does not look like an item table header."""
+    columns: list[_Column] = []
+    i = 0
+    while i < len(line):
+        token = _norm(line[i].text)
+        nxt = _norm(line[i + 1].text) if i + 1 < len(line) else ""
+        kind = _HEADER_PHRASES.get((token, nxt))
+        if kind:
+            columns.append(_Column(kind, line[i].x0, line[i + 1].x1))
+            i += 2
+            continue
+        kind = _HEADER_WORDS.get(token)
+        if kind:
+            columns.append(_Column(kind, line[i].x0, line[i].x1))
+        elif token in _SERIAL_WORDS and not columns:
+            columns.append(_Column("serial", line[i].x0, line[i].x1))
+        i += 1
+    if not is_item_table_header({c.kind for c in columns}):
+        return None
+    return columns
+
+
+def _assign(columns: list[_Column], word: Word) -> str | None:
+    """Column kind of a word: boundaries lie midway between neighbouring header centres."""
+    for idx, col in enumerate(columns):
+        left = (columns[idx - 1].xc + col.xc) / 2 if idx > 0 else float("-inf")
+        right = (col.xc + columns[idx + 1].xc) / 2 if idx + 1 < len(columns) else float("inf")
+        if left <= word.xc < right:
+            return col.kind
+    return None
+
+
+def parse_number(text: str) -> float | None:
+    """Parse invoice numbers like '1,25,000.00', '₹450', '18%', '(12.50)'."""
+    t = text.strip()
+    if not t or not _NUMBER.match(t):
+        return None
+    t = re.sub(r"^(?:₹|rs\.?|inr)", "", t, flags=re.IGNORECASE)
+    negative = t.startswith("(") or t.startswith("-")
+    t = t.strip("()%-").replace(",", "")
+    try:
+        value = float(t)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def _row_item(columns: list[_Column], line: list[Word]) -> dict[str, str]:
+    cells: dict[str, list[str]] = {}
+    for w in line:
+        kind = _assign(columns, w)
+        if kind and kind not in ("serial", "tax_detail"):
+            cells.setdefault(kind, []).append(w.text)
+    return {k: " ".join(v) for k, v in cells.items()}
+
+
+def _consistent(qty: float | None, rate: float | None, value: float) -> bool:
+    if qty is None or rate is None:
+        return True
+    return abs(qty * rate - value) <= max(1.0, abs(value) * 0.01)
+
+
+def is_table_end(text: str) -> bool:
+    """True for totals/footer lines that close an item table."""
+    return bool(_TABLE_END.match(text.strip()))
+
+
+class ItemRows:
+    """
+    Turns table rows (cells keyed by column kind) into line items. Rows with a description
+    and no digits in any numeric column continue the previous item's description; rows
+    that do not parse (a description with an unreadable amount) or fail the qty x rate
+    check mark the table as not clean, so the caller falls back to the LLM.
+    """
+
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.ok = True
+        self._last: dict | None = None
+
+    def break_continuation(self) -> None:
+        self._last = None
+
+    def add(self, cells: dict[str, str]) -> bool:
+        """Consume one row; False if it is not part of the item table."""
+        value = parse_number(cells.get("taxable_value", "")) or parse_number(cells.get("amount", ""))
+        if value is None:
+            if cells.get("description") and (cells.get("taxable_value") or cells.get("amount")):
+                self.ok = False  # an item whose amount did not parse: don't trust the table
+                return False
+            if any(_DIGIT.search(cells.get(kind, "")) for kind in _NUMERIC_CELLS):
+                return False
+            if self._last is not None and cells.get("description"):
+                self._last["description"] += " " + cells["description"]
+                return True
+            return False
+        if not cells.get("description"):
+            self.ok = False
+            return False
+        qty = parse_number(cells.get("qty", ""))
+        rate = parse_number(cells.get("rate", ""))
+        if not _consistent(qty, rate, value):
+            self.ok = False
+        self._last = {
+            "description": cells["description"],
+            "hsn_sac": cells.get("hsn_sac", ""),
+            "qty": qty if qty is not None else 1.0,
+            "unit_price": rate if rate is not None else value,
+            "taxable_value": value,
+            "gst_rate": parse_number(cells.get("gst_rate", "")) or 0.0,
+        }
+        self.rows.append(self._last)
+        return True
+
+    def result(self, compact_text: str) -> TableResult:
+        return TableResult(
+            items=[LineRecord(**row) for row in self.rows],
+            clean=self.ok and bool(self.rows),
+            row_count=len(self.rows),
+            compact_text=compact_text,
+        )
+
+
+def reconstruct_table(words: list[Word]) -> TableResult:
+    """
+    Rebuild line items from word boxes. Every line that looks like an item table header
+    (description + amount + qty/rate/HSN columns) starts a table, which runs until a
+    totals/footer line. Rows without numbers continue the previous item's description.
+    """
+    items = ItemRows()
+    outside: list[str] = []
+    columns: list[_Column] | None = None
+
+    for line in group_lines(words):
+        text = line_text(line)
+        header = _header_columns(line)
+        if header:
+            columns = header
+            items.break_continuation()
+            continue
+        if columns is None:
+            outside.append(text)
+            continue
+        if is_table_end(text):
+            columns = None
+            items.break_continuation()
+            outside.append(text)
+            continue
+        if not items.add(_row_item(columns, line)):
+            outside.append(text)
+
+    return items.result("\n".join(outside))
@@ -0,0 +1,200 @@
+"""
+Persistent cache of LLM extraction replies.
+Key = SHA-256 of the normalised invoice text + model + prompt/schema version, so
+re-processing the same OCR text (retries, re-uploads, category mapping changes)
+does not call the API again.
+Backends: SQLite file (default) or Redis (optional `redis` package); entries expire
+after a TTL and the SQLite backend evicts least-recently-used rows beyond a size cap.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Protocol
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 10_000
+# Per-user cache directory, independent of the working directory the app is started from
+DEFAULT_SQLITE_PATH = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "bharatledger" / "llm_cache.sqlite3"
+)
+REDIS_KEY_PREFIX = "bharatledger:llm:"
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace- and Unicode-normalised text: OCR runs that differ only in spacing share a key."""
+    text = unicodedata.normalize("NFC", text)
+    lines = (re.sub(r"[ \t\f\v]+", " ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_llm_cache_key(text: str, model: str, prompt: str, **settings: object) -> str:
+    """Hash the normalised text with the model, the full prompt contract and any call settings."""
+    h = hashlib.sha256(normalize_text(text).encode("utf-8"))
+    h.update(f"\0model={model}\0prompt={hashlib.sha256(prompt.encode('utf-8')).hexdigest()}".encode("utf-8"))
+    for name in sorted(settings):
+        h.update(f"\0{name}={settings[name]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class LLMCache(Protocol):
+    def get(self, key: str) -> dict[str, Any] | None: ...
+
+    def put(self, key: str, value: dict[str, Any]) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class SQLiteLLMCache:
+    """Single-file cache with TTL and LRU eviction. Thread-safe; safe across processes via SQLite locking."""
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_SQLITE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value FROM llm_cache WHERE key = ? AND created >= ?", (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+                conn.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError, ValueError):
+            return None  # the cache is best-effort; a broken file just means a miss
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl_seconds,))
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            return
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisLLMCache:
+    """
+    Shared cache for several hosts. Entries expire via Redis TTLs; size is bounded by the
+    server's maxmemory policy (use allkeys-lru).
+    """
+
+    def __init__(self, url: str, ttl_seconds: int = DEFAULT_TTL_SECONDS, prefix: str = REDIS_KEY_PREFIX) -> None:
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("LLM_CACHE_BACKEND=redis needs the redis package (pip install redis)") from e
+        self._client = redis.Redis.from_url(url)
+        self._errors: tuple[type[BaseException], ...] = (redis.RedisError,)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        try:
+            data = self._client.get(self.prefix + key)
+            return json.loads(data) if data is not None else None
+        except (*self._errors, ValueError):
+            return None
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        try:
+            self._client.setex(self.prefix + key, self.ttl_seconds, json.dumps(value, ensure_ascii=False))
+        except self._errors:
+            return
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+
+
+_cache: LLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_llm_cache() -> LLMCache | None:
+    """
+    Process-wide cache configured from env; None when LLM_CACHE=0.
+    LLM_CACHE_BACKEND (sqlite | redis), LLM_CACHE_PATH (SQLite file), LLM_CACHE_URL
+    (Redis URL, default REDIS_URL), LLM_CACHE_TTL (seconds), LLM_CACHE_MAX_ENTRIES (SQLite cap).
+    """
+    global _cache
+    if os.environ.get("LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            ttl = _env_int("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)
+            backend = os.environ.get("LLM_CACHE_BACKEND", "sqlite").lower()
+            if backend == "redis":
+                url = os.environ.get("LLM_CACHE_URL") or os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+                _cache = RedisLLMCache(url, ttl_seconds=ttl)
+            else:
+                _cache = SQLiteLLMCache(
+                    os.environ.get("LLM_CACHE_PATH") or DEFAULT_SQLITE_PATH,
+                    ttl_seconds=ttl,
+                    max_entries=_env_int("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+                )
+        return _cache
@@ -5,35 +5,84 @@ Uses OpenRouter (or OpenAI) to extract invoice fields per types.py schema.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Sequence
 
-import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt
 
+from .chunking import ChunkPlan, chunking_enabled, get_chunk_workers, merge_line_items, plan_chunks
+from .http_client import get_async_http_client, get_http_client
+from .json_stream import EventHandler, JSONStream, replay
+from .llm_cache import get_llm_cache, make_llm_cache_key
+from .prompt_compaction import compact_text, compaction_enabled, estimate_tokens
+from .rate_limit import get_llm_limiter, is_retryable, wait_retry_after
+from .routing import get_model_tiers, validate_reply
 from .types import (
     BuyerInfo,
     Confidence,
     InvoiceExtractResult,
     InvoiceInfo,
     LineItem,
+    LLMInfo,
     Totals,
     VendorInfo,
 )
 
-EXTRACT_SCHEMA = """
-Extract from the following invoice text and return a single JSON object with exactly these keys (use empty string or 0 where unknown):
-- vendor: { "name": "", "gstin": "", "address": "" }
-- invoice: { "number": "", "date": "YYYY-MM-DD", "currency": "INR" }
-- buyer: { "name": "", "gstin": "" }
-- place_of_supply_state: "" (state name or code)
-- is_inter_state: true/false (true if vendor and buyer are in different states)
-- line_items: [ { "description": "", "hsn_sac": "", "qty": 1, "unit_price": 0, "taxable_value": 0, "gst_rate": 0 } ]
-- totals: { "taxable_value": 0, "gst_total": 0, "grand_total": 0 }
-- confidence: { "overall": 0.0-1.0, "fields": {} }
-Return only valid JSON, no markdown or explanation.
-"""
+SYSTEM_PROMPT = "You extract invoice data from text. Return only valid JSON."
+# Part of the LLM cache key: bump when reply handling changes in a way the prompt text does not show
+PROMPT_VERSION = "1"
+TEMPERATURE = 0.1
+# Hard cap on prompt text; compaction (prompt_compaction) normally keeps it well below
+MAX_INPUT_CHARS = 12000
+
+_SCHEMA_INTRO = (
+    "Extract from the following invoice text and return a single JSON object with exactly "
+    "these keys (use empty string or 0 where unknown):"
+)
+_BATCH_INTRO = (
+    "The following text contains several invoices, each starting with a line "
+    "'### INVOICE <id>'. Return a JSON array with one object per invoice, in the same order. "
+    'Each object has an "id" key (the invoice id) and exactly these keys (use empty string or 0 '
+    "where unknown):"
+)
+# One line per top-level key, so a prompt can ask for a subset of them
+SCHEMA_KEYS = {
+    "vendor": '- vendor: { "name": "", "gstin": "", "address": "" }',
+    "invoice": '- invoice: { "number": "", "date": "YYYY-MM-DD", "currency": "INR" }',
+    "buyer": '- buyer: { "name": "", "gstin": "" }',
+    "place_of_supply_state": '- place_of_supply_state: "" (state name or code)',
+    "is_inter_state": "- is_inter_state: true/false (true if vendor and buyer are in different states)",
+    "line_items": (
+        '- line_items: [ { "description": "", "hsn_sac": "", "qty": 1, "unit_price": 0, '
+        '"taxable_value": 0, "gst_rate": 0 } ]'
+    ),
+    "totals": '- totals: { "taxable_value": 0, "gst_total": 0, "grand_total": 0 }',
+    "confidence": '- confidence: { "overall": 0.0-1.0, "fields": {} }',
+}
+
+
+def build_schema(keys: Iterable[str]) -> str:
+    """Prompt contract for the given top-level keys (in schema order; confidence is always asked)."""
+    wanted = set(keys) | {"confidence"}
+    lines = [line for key, line in SCHEMA_KEYS.items() if key in wanted]
+    return "\n".join(["", _SCHEMA_INTRO, *lines, "Return only valid JSON, no markdown or explanation.", ""])
+
+
+EXTRACT_SCHEMA = build_schema(SCHEMA_KEYS)
+
+# Same contract without line_items: used when the item table was already recovered
+# from the document layout, so the model only reads and writes the header fields.
+EXTRACT_HEADER_SCHEMA = build_schema(k for k in SCHEMA_KEYS if k != "line_items")
+
+
+# Batch mode packs short invoices into one request, up to this many invoices and
+# MAX_INPUT_CHARS of text; longer invoices always get their own request.
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BATCH_ITEM_MAX_CHARS = 3000
 
 
 def _get_api_key() -> str:
@@ -44,6 +93,9 @@ def _get_api_key() -> str:
 
 
 def _get_base_url() -> str:
+    """LLM_BASE_URL overrides the provider (any OpenAI-compatible API, e.g. the benchmark mock)."""
+    if os.environ.get("LLM_BASE_URL"):
+        return os.environ["LLM_BASE_URL"].rstrip("/")
     if os.environ.get("OPENROUTER_API_KEY"):
         return "https://openrouter.ai/api/v1"
     return "https://api.openai.com/v1"
@@ -53,24 +105,34 @@ def _get_model() -> str:
     return os.environ.get("OPENROUTER_MODEL", "openai/gpt-4o-mini")
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-def extract_from_text(raw_text: str) -> dict[str, Any]:
-    """
-    Call LLM to extract structured invoice data from raw text.
-    Returns a dict that can be passed to InvoiceExtractResult.model_validate() after
-    enriching line_items with category and gst_breakdown.
-    """
+def _schema_for(include_line_items: bool, fields: Iterable[str] | None) -> str:
+    if fields is not None:
+        return build_schema(set(fields) | ({"line_items"} if include_line_items else set()))
+    return EXTRACT_SCHEMA if include_line_items else EXTRACT_HEADER_SCHEMA
+
+
+def _get_batch_limits() -> tuple[int, int]:
+    """LLM_BATCH_SIZE (invoices per request), LLM_BATCH_ITEM_MAX_CHARS (longest packable invoice)."""
+    try:
+        size = int(os.environ.get("LLM_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        item_chars = int(os.environ.get("LLM_BATCH_ITEM_MAX_CHARS", DEFAULT_BATCH_ITEM_MAX_CHARS))
+    except ValueError:
+        size, item_chars = DEFAULT_BATCH_SIZE, DEFAULT_BATCH_ITEM_MAX_CHARS
+    return max(1, size), item_chars
+
+
+def _request(model: str, schema: str, text: str) -> tuple[str, dict[str, str], dict[str, Any]]:
+    """URL, headers and payload of a chat completion call."""
     key = _get_api_key()
     base = _get_base_url()
-    model = _get_model()
 
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "You extract invoice data from text. Return only valid JSON."},
-            {"role": "user", "content": EXTRACT_SCHEMA + "\n\n---\n\n" + raw_text[:12000]},
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": schema + "\n\n---\n\n" + text},
         ],
-        "temperature": 0.1,
+        "temperature": TEMPERATURE,
     }
 
     headers = {
@@ -82,18 +144,13 @@ def extract_from_text(raw_text: str) -> dict[str, Any]:
             headers["HTTP-Referer"] = os.environ.get("OPENROUTER_REFERER")
         if os.environ.get("OPENROUTER_TITLE"):
             headers["X-Title"] = os.environ.get("OPENROUTER_TITLE")
+    return f"{base}/chat/completions", headers, payload
 
-    with httpx.Client(timeout=60.0) as client:
-        resp = client.post(
-            f"{base}/chat/completions",
-            headers=headers,
-            json=payload,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        content = (data.get("choices") or [{}])[0].get("message", {}).get("content", "")
-        if not content:
-            raise ValueError("Empty LLM response")
+
+def _parse_reply(data: dict[str, Any]) -> dict[str, Any]:
+    content = (data.get("choices") or [{}])[0].get("message", {}).get("content", "")
+    if not content:
+        raise ValueError("Empty LLM response")
 
     # Strip markdown code block if present
     content = content.strip()
@@ -108,6 +165,499 @@ def extract_from_text(raw_text: str) -> dict[str, Any]:
     return json.loads(content)
 
 
+# Only transient failures (timeouts, connection errors, 408/425/429/5xx) are retried,
+# after the provider's Retry-After when it sends one; see rate_limit.
+_retry_transient = retry(stop=stop_after_attempt(3), wait=wait_retry_after, retry=retry_if_exception(is_retryable))
+
+
+def _prompt_tokens(payload: dict[str, Any]) -> int:
+    """Estimated prompt tokens, booked against the tokens/min bucket before sending."""
+    return sum(estimate_tokens(m["content"]) for m in payload["messages"])
+
+
+def _settle_tokens(data: dict[str, Any], booked: int) -> dict[str, Any]:
+    """Correct the tokens/min bucket with the usage the provider reports."""
+    used = (data.get("usage") or {}).get("total_tokens")
+    if isinstance(used, int):
+        get_llm_limiter().tokens.adjust(used - booked)
+    return data
+
+
+@_retry_transient
+def _complete(model: str, schema: str, text: str) -> Any:
+    """One chat completion call; returns the parsed JSON reply (an array in batch mode)."""
+    url, headers, payload = _request(model, schema, text)
+    tokens = _prompt_tokens(payload)
+    with get_llm_limiter().slot(tokens):
+        resp = get_http_client().post(url, headers=headers, json=payload)
+        resp.raise_for_status()
+    return _parse_reply(_settle_tokens(resp.json(), tokens))
+
+
+@_retry_transient
+async def _acomplete(model: str, schema: str, text: str) -> dict[str, Any]:
+    """Async _complete on the event loop's pooled client (tenacity sleeps with asyncio)."""
+    url, headers, payload = _request(model, schema, text)
+    tokens = _prompt_tokens(payload)
+    async with get_llm_limiter().aslot(tokens):
+        resp = await get_async_http_client().post(url, headers=headers, json=payload)
+        resp.raise_for_status()
+    return _parse_reply(_settle_tokens(resp.json(), tokens))
+
+
+def _stream_enabled() -> bool:
+    """LLM_STREAM=1 (default): stream completions when the caller wants partial results."""
+    return os.environ.get("LLM_STREAM", "1").lower() in ("1", "true", "yes", "on")
+
+
+def _sse_event(line: str) -> dict[str, Any] | None:
+    """Data of one server-sent event line ({} for keep-alives, comments, event names); None for [DONE]."""
+    if not line.startswith("data:"):
+        return {}
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return None
+    return json.loads(data)
+
+
+def _sse_delta(event: dict[str, Any]) -> str:
+    choice = (event.get("choices") or [{}])[0]
+    return (choice.get("delta") or {}).get("content") or ""
+
+
+def _feed(stream: JSONStream, delta: str, on_event: EventHandler) -> None:
+    for event in stream.feed(delta):
+        on_event(*event)
+
+
+def _is_sse(resp: Any) -> bool:
+    return resp.headers.get("content-type", "").startswith("text/event-stream")
+
+
+def _stream_request(model: str, schema: str, text: str) -> tuple[str, dict[str, str], dict[str, Any]]:
+    url, headers, payload = _request(model, schema, text)
+    payload["stream"] = True
+    payload["stream_options"] = {"include_usage": True}  # usage arrives in the last event
+    return url, headers, payload
+
+
+def _stream_event(stream: JSONStream, event: dict[str, Any], on_event: EventHandler, usage: dict | None) -> dict | None:
+    """Feed one event's delta; returns the usage seen so far."""
+    _feed(stream, _sse_delta(event), on_event)
+    return event.get("usage") or usage
+
+
+def _stream_result(stream: JSONStream, usage: dict[str, Any] | None, booked: int) -> dict[str, Any]:
+    """
+    The streamed reply, after settling the tokens/min bucket with the provider's usage, or
+    with the prompt estimate plus the streamed text when the provider sends none.
+    """
+    if not (usage and isinstance(usage.get("total_tokens"), int)):
+        usage = {"total_tokens": booked + estimate_tokens(stream.text)}
+    _settle_tokens({"usage": usage}, booked)
+    return stream.result()
+
+
+def _stream_lines(stream: JSONStream, lines: Iterator[str], on_event: EventHandler, booked: int) -> dict[str, Any]:
+    usage = None
+    for line in lines:
+        event = _sse_event(line)
+        if event is None:
+            break
+        usage = _stream_event(stream, event, on_event, usage)
+    return _stream_result(stream, usage, booked)
+
+
+@_retry_transient
+def _stream_complete(model: str, schema: str, text: str, on_event: EventHandler) -> dict[str, Any]:
+    """
+    Streamed (SSE) _complete: header fields and line items are passed to on_event while the
+    model is still generating. A retried attempt re-sends events from the start, so
+    consumers should key items by their index. Providers that ignore "stream" are handled
+    as a plain reply.
+    """
+    url, headers, payload = _stream_request(model, schema, text)
+    tokens = _prompt_tokens(payload)
+    with get_llm_limiter().slot(tokens), get_http_client().stream("POST", url, headers=headers, json=payload) as resp:
+        resp.raise_for_status()
+        if not _is_sse(resp):
+            resp.read()
+            raw = _parse_reply(_settle_tokens(resp.json(), tokens))
+            replay(raw, on_event)
+            return raw
+        return _stream_lines(JSONStream(), resp.iter_lines(), on_event, tokens)
+
+
+@_retry_transient
+async def _astream_complete(model: str, schema: str, text: str, on_event: EventHandler) -> dict[str, Any]:
+    """Async _stream_complete on the event loop's pooled client."""
+    url, headers, payload = _stream_request(model, schema, text)
+    tokens = _prompt_tokens(payload)
+    async with get_llm_limiter().aslot(tokens), get_async_http_client().stream(
+        "POST", url, headers=headers, json=payload
+    ) as resp:
+        resp.raise_for_status()
+        if not _is_sse(resp):
+            await resp.aread()
+            raw = _parse_reply(_settle_tokens(resp.json(), tokens))
+            replay(raw, on_event)
+            return raw
+        stream, usage = JSONStream(), None
+        async for line in resp.aiter_lines():
+            event = _sse_event(line)
+            if event is None:
+                break
+            usage = _stream_event(stream, event, on_event, usage)
+        return _stream_result(stream, usage, tokens)
+
+
+def prompt_text(raw_text: str) -> str:
+    """Invoice text as sent to the model: compacted to the token budget (LLM_COMPACT), hard-capped."""
+    if compaction_enabled():
+        raw_text = compact_text(raw_text)
+    return raw_text[:MAX_INPUT_CHARS]
+
+
+class _Call:
+    """Model, prompt and cache key of one extraction request, shared by the sync and async paths."""
+
+    def __init__(
+        self,
+        raw_text: str,
+        include_line_items: bool,
+        fields: Iterable[str] | None,
+        info: LLMInfo | None,
+        model: str | None = None,
+    ) -> None:
+        self.t0 = time.perf_counter()
+        self.model = model or get_model_tiers(_get_model())[0]
+        self.schema = _schema_for(include_line_items, fields)
+        self.text = prompt_text(raw_text)
+        self.info = info
+        if info is not None:
+            info.model = self.model
+            info.requests += 1
+            info.input_chars += len(self.text)
+        self.cache = get_llm_cache()
+        self.key = None
+        if self.cache is not None:
+            self.key = make_llm_cache_key(
+                self.text, self.model, SYSTEM_PROMPT + self.schema, version=PROMPT_VERSION, temperature=TEMPERATURE
+            )
+
+    def cached(self) -> dict[str, Any] | None:
+        if self.cache is None:
+            return None
+        raw = self.cache.get(self.key)
+        if raw is not None and self.info is not None:
+            self.info.cache_hits += 1
+            self.done()
+        return raw
+
+    def store(self, raw: dict[str, Any]) -> dict[str, Any]:
+        if self.cache is not None:
+            self.cache.put(self.key, raw)
+        self.done()
+        return raw
+
+    def done(self) -> None:
+        if self.info is not None:
+            self.info.total_ms = round(self.info.total_ms + (time.perf_counter() - self.t0) * 1000, 1)
+
+
+def extract_from_text(
+    raw_text: str,
+    include_line_items: bool = True,
+    fields: Iterable[str] | None = None,
+    info: LLMInfo | None = None,
+    on_event: EventHandler | None = None,
+) -> dict[str, Any]:
+    """
+    Call LLM to extract structured invoice data from raw text.
+    Returns a dict that can be passed to InvoiceExtractResult.model_validate() after
+    enriching line_items with category and gst_breakdown.
+    include_line_items=False asks for header fields and totals only (smaller prompt and reply).
+    Invoices too long for one prompt are read in chunks (see chunking): header fields once,
+    line items per chunk in parallel, merged in document order.
+    fields limits the request to those top-level keys (e.g. the ones the rule-based
+    pre-extractor could not fill); keys that are not asked for are absent from the reply.
+    Replies are cached by normalised text + model + prompt (see llm_cache).
+    info optional: filled with the model, cache hits and time spent.
+    on_event optional: on_event(kind, key, value) gets ("field", key, value) for each top-level
+    key and ("item", index, item) for each line item as soon as it is complete; the reply is
+    streamed for this (LLM_STREAM). Cached and chunked replies are replayed in the same order.
+    With LLM_MODEL_TIERS the cheapest model reads the invoice first and the reply is only
+    re-requested from the next tier when it fails validation (see routing); info.tier
+    records the tier that served it.
+    """
+    tiers = get_model_tiers(_get_model())
+    for tier, model in enumerate(tiers):
+        raw = _extract_once(raw_text, include_line_items, fields, info, on_event, model)
+        if _accept(raw, tier, len(tiers), include_line_items, fields, info):
+            break
+    return raw
+
+
+def _extract_once(
+    raw_text: str,
+    include_line_items: bool,
+    fields: Iterable[str] | None,
+    info: LLMInfo | None,
+    on_event: EventHandler | None,
+    model: str,
+) -> dict[str, Any]:
+    """One model's reply: cached, chunked, streamed or plain."""
+    _new_attempt(info)
+    plan = _chunk_plan(raw_text, include_line_items)
+    if plan is not None:
+        return _replayed(_extract_chunked(plan, fields, info, model), on_event)
+    call = _Call(raw_text, include_line_items, fields, info, model)
+    cached = call.cached()
+    if cached is not None:
+        return _replayed(cached, on_event)
+    if on_event is not None and _stream_enabled():
+        return call.store(_stream_complete(call.model, call.schema, call.text, on_event))
+    return call.store(_replayed(_complete(call.model, call.schema, call.text), on_event))
+
+
+def _new_attempt(info: LLMInfo | None) -> None:
+    """A tier starts reading the invoice: input_chars reports the input of the reply used, not of every tier."""
+    if info is not None:
+        info.input_chars = 0
+
+
+def _accept(
+    raw: dict[str, Any],
+    tier: int,
+    tiers: int,
+    include_line_items: bool,
+    fields: Iterable[str] | None,
+    info: LLMInfo | None,
+) -> bool:
+    """Validate a tier's reply and record the outcome; False when the next tier should re-read it."""
+    problems = validate_reply(raw, include_line_items, fields)
+    if info is not None:
+        info.tier = tier
+        info.validation = problems
+    return not problems or tier + 1 >= tiers
+
+
+def _replayed(raw: dict[str, Any], on_event: EventHandler | None) -> dict[str, Any]:
+    if on_event is not None:
+        replay(raw, on_event)
+    return raw
+
+
+def _chunk_plan(raw_text: str, include_line_items: bool) -> ChunkPlan | None:
+    """Plan for reading line items in chunks, when the text does not fit one prompt (LLM_CHUNKED)."""
+    if not include_line_items or not chunking_enabled():
+        return None
+    return plan_chunks(raw_text)
+
+
+def _chunk_calls(plan: ChunkPlan, fields: Iterable[str] | None, info: LLMInfo | None, model: str) -> list[_Call]:
+    """Header call (no line items) followed by one line-items-only call per chunk."""
+    calls = [_Call(plan.header, False, fields, info, model)]
+    calls += [_Call(chunk, True, [], info, model) for chunk in plan.chunks]
+    if info is not None:
+        info.chunks = len(plan.chunks)
+    return calls
+
+
+def _merge_chunks(replies: list[dict[str, Any]]) -> dict[str, Any]:
+    raw = dict(replies[0])
+    raw["line_items"] = merge_line_items([r.get("line_items") or [] for r in replies[1:]])
+    return raw
+
+
+def _extract_chunked(
+    plan: ChunkPlan, fields: Iterable[str] | None, info: LLMInfo | None, model: str
+) -> dict[str, Any]:
+    """
+    Header fields once plus line items per chunk, requested in parallel on the pooled
+    client, so wall time follows the slowest chunk rather than the document length.
+    """
+    calls = _chunk_calls(plan, fields, info, model)
+    replies: list[dict[str, Any] | None] = [call.cached() for call in calls]
+    pending = [i for i, r in enumerate(replies) if r is None]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(len(pending), get_chunk_workers())) as pool:
+            futures = {i: pool.submit(_complete, calls[i].model, calls[i].schema, calls[i].text) for i in pending}
+            for i, future in futures.items():
+                replies[i] = calls[i].store(future.result())
+    return _merge_chunks(replies)
+
+
+async def _aextract_chunked(
+    plan: ChunkPlan, fields: Iterable[str] | None, info: LLMInfo | None, model: str
+) -> dict[str, Any]:
+    calls = _chunk_calls(plan, fields, info, model)
+    replies: list[dict[str, Any] | None] = [call.cached() for call in calls]
+    pending = [i for i, r in enumerate(replies) if r is None]
+    limit = asyncio.Semaphore(get_chunk_workers())
+
+    async def one(call: _Call) -> dict[str, Any]:
+        async with limit:
+            return await _acomplete(call.model, call.schema, call.text)
+
+    for i, raw in zip(pending, await asyncio.gather(*(one(calls[i]) for i in pending))):
+        replies[i] = calls[i].store(raw)
+    return _merge_chunks(replies)
+
+
+async def aextract_from_text(
+    raw_text: str,
+    include_line_items: bool = True,
+    fields: Iterable[str] | None = None,
+    info: LLMInfo | None = None,
+    on_event: EventHandler | None = None,
+) -> dict[str, Any]:
+    """Async extract_from_text: same prompt, cache, routing and reply handling, awaited on the async client."""
+    tiers = get_model_tiers(_get_model())
+    for tier, model in enumerate(tiers):
+        raw = await _aextract_once(raw_text, include_line_items, fields, info, on_event, model)
+        if _accept(raw, tier, len(tiers), include_line_items, fields, info):
+            break
+    return raw
+
+
+async def _aextract_once(
+    raw_text: str,
+    include_line_items: bool,
+    fields: Iterable[str] | None,
+    info: LLMInfo | None,
+    on_event: EventHandler | None,
+    model: str,
+) -> dict[str, Any]:
+    _new_attempt(info)
+    plan = _chunk_plan(raw_text, include_line_items)
+    if plan is not None:
+        return _replayed(await _aextract_chunked(plan, fields, info, model), on_event)
+    call = _Call(raw_text, include_line_items, fields, info, model)
+    cached = call.cached()
+    if cached is not None:
+        return _replayed(cached, on_event)
+    if on_event is not None and _stream_enabled():
+        return call.store(await _astream_complete(call.model, call.schema, call.text, on_event))
+    return call.store(_replayed(await _acomplete(call.model, call.schema, call.text), on_event))
+
+
+def _pack(calls: list[_Call | None], pending: list[int]) -> list[list[int]]:
+    """Greedy in-order packing of short invoices; every other invoice is a batch of one."""
+    size, item_chars = _get_batch_limits()
+    batches: list[list[int]] = []
+    current: list[int] = []
+    chars = 0
+    for i in pending:
+        n = len(calls[i].text)
+        if n > item_chars:
+            batches.append([i])
+            continue
+        if current and (len(current) >= size or chars + n > MAX_INPUT_CHARS):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_elements(reply: Any) -> dict[str, Any]:
+    """Reply array (or an object wrapping one) -> {id: element}."""
+    if isinstance(reply, dict):
+        reply = next((v for v in reply.values() if isinstance(v, list)), [])
+    if not isinstance(reply, list):
+        return {}
+    return {str(el.get("id")): el for el in reply if isinstance(el, dict)}
+
+
+def _valid_element(element: Any) -> dict[str, Any] | None:
+    """A batch element that converts cleanly with parse_extract_to_result, without its id."""
+    if not isinstance(element, dict):
+        return None
+    raw = {k: v for k, v in element.items() if k != "id"}
+    try:
+        parse_extract_to_result(raw, "")
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return raw
+
+
+def extract_batch(
+    texts: Sequence[str],
+    include_line_items: bool = True,
+    fields: Iterable[str] | None = None,
+    infos: Sequence[LLMInfo | None] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    extract_from_text for many invoices with one request per pack of short invoices.
+    The prompt asks for a JSON array of per-invoice objects tagged with ids; every element
+    is validated on its own, and invoices whose element is missing or invalid (or whose
+    batch request failed) fall back to a single-invoice call. Returns replies in input order.
+    Each invoice uses the single-call cache key, so cached invoices are not re-sent.
+    Packs go to the cheapest model tier; invoices whose reply fails validation are
+    escalated one by one.
+    """
+    fields = list(fields) if fields is not None else None
+    infos = list(infos) if infos is not None else [None] * len(texts)
+    tiers = get_model_tiers(_get_model())
+    results: list[dict[str, Any] | None] = [None] * len(texts)
+    calls: list[_Call | None] = []
+    for i, (text, info) in enumerate(zip(texts, infos)):
+        plan = _chunk_plan(text, include_line_items)
+        if plan is not None:
+            results[i] = _extract_chunked(plan, fields, info, tiers[0])
+            calls.append(None)
+            continue
+        calls.append(_Call(text, include_line_items, fields, info, tiers[0]))
+        results[i] = calls[i].cached()
+    singles: list[int] = []
+    for batch in _pack(calls, [i for i, r in enumerate(results) if r is None]):
+        if len(batch) == 1:
+            singles.extend(batch)
+            continue
+        first = calls[batch[0]]
+        packed = "\n\n".join(f"### INVOICE {n}\n{calls[i].text}" for n, i in enumerate(batch, 1))
+        try:
+            reply = _complete(first.model, first.schema.replace(_SCHEMA_INTRO, _BATCH_INTRO), packed)
+        except Exception:
+            reply = None  # the whole pack falls back to single calls
+        elements = _batch_elements(reply)
+        for n, i in enumerate(batch, 1):
+            raw = _valid_element(elements.get(str(n)))
+            if raw is None:
+                singles.append(i)
+                continue
+            if calls[i].info is not None:
+                calls[i].info.batch_size = len(batch)
+            results[i] = calls[i].store(raw)
+    for i in sorted(singles):
+        results[i] = calls[i].store(_complete(calls[i].model, calls[i].schema, calls[i].text))
+    for i, raw in enumerate(results):
+        tier = 0
+        while not _accept(raw, tier, len(tiers), include_line_items, fields, infos[i]):
+            tier += 1
+            raw = _extract_once(texts[i], include_line_items, fields, infos[i], None, tiers[tier])
+        results[i] = raw
+    return results
+
+
+def parse_line_item(it: dict[str, Any]) -> LineItem:
+    """One line_items element of an LLM reply (also used for streamed items)."""
+    return LineItem(
+        description=str(it.get("description", "")),
+        hsn_sac=str(it.get("hsn_sac", "")),
+        category=str(it.get("category", "")),
+        qty=float(it.get("qty", 1)),
+        unit_price=float(it.get("unit_price", 0)),
+        taxable_value=float(it.get("taxable_value", 0)),
+        gst_rate=float(it.get("gst_rate", 0)),
+        gst_breakdown=it.get("gst_breakdown") or {"cgst": 0, "sgst": 0, "igst": 0},
+        total=float(it.get("total", 0)),
+    )
+
+
 def parse_extract_to_result(raw: dict[str, Any], raw_text: str) -> InvoiceExtractResult:
     """
     Convert LLM extract dict to InvoiceExtractResult.
@@ -122,22 +672,7 @@ def parse_extract_to_result(raw: dict[str, Any], raw_text: str) -> InvoiceExtrac
     totals = raw.get("totals") or {}
     confidence = raw.get("confidence") or {}
 
-    line_items: list[LineItem] = []
-    for it in items:
-        if isinstance(it, dict):
-            line_items.append(
-                LineItem(
-                    description=str(it.get("description", "")),
-                    hsn_sac=str(it.get("hsn_sac", "")),
-                    category=str(it.get("category", "")),
-                    qty=float(it.get("qty", 1)),
-                    unit_price=float(it.get("unit_price", 0)),
-                    taxable_value=float(it.get("taxable_value", 0)),
-                    gst_rate=float(it.get("gst_rate", 0)),
-                    gst_breakdown=it.get("gst_breakdown") or {"cgst": 0, "sgst": 0, "igst": 0},
-                    total=float(it.get("total", 0)),
-                )
-            )
+    line_items = [parse_line_item(it) for it in items if isinstance(it, dict)]
 
     return InvoiceExtractResult(
         vendor=VendorInfo(
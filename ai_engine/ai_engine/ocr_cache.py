@@ -0,0 +1,155 @@
+"""
+Content-addressed OCR result cache.
+Key = SHA-256 of the input bytes + OCR settings (language, zoom, engine version),
+so re-uploads of the same file skip Tesseract entirely.
+Two tiers: in-memory LRU, and an optional on-disk tier with size-based eviction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+
+def make_cache_key(data: bytes, **settings: object) -> str:
+    """Hash the file bytes together with every setting that can change the OCR output."""
+    h = hashlib.sha256(data)
+    for name in sorted(settings):
+        h.update(f"\0{name}={settings[name]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class OCRCache:
+    """Two-tier (memory LRU + disk) cache of OCR text by content key. Thread-safe."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MEMORY_ENTRIES,
+        disk_dir: str | Path | None = None,
+        disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._disk_bytes: int | None = None  # computed lazily on first write
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+        text = self._disk_get(key)
+        if text is not None:
+            self._memory_put(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._memory_put(key, text)
+        self._disk_put(key, text)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir and self.disk_dir.exists():
+                for path in self.disk_dir.glob("*/*.txt"):
+                    path.unlink(missing_ok=True)
+            self._disk_bytes = 0
+
+    def _memory_put(self, key: str, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.txt"
+
+    def _disk_get(self, key: str) -> str | None:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return text
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        data = text.encode("utf-8")
+        if len(data) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            existing = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        except OSError:
+            return  # the disk tier is best-effort; memory tier still holds the result
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*.txt"))
+            else:
+                self._disk_bytes += len(data) - existing
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete least-recently-used files until the disk tier is under 90% of its budget."""
+        files = []
+        for p in self.disk_dir.glob("*/*.txt"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, p in files:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
+
+
+_cache: OCRCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> OCRCache | None:
+    """
+    Process-wide cache configured from env; None when OCR_CACHE=0.
+    OCR_CACHE_ENTRIES (memory LRU size), OCR_CACHE_DIR (enables disk tier),
+    OCR_CACHE_MAX_BYTES (disk budget).
+    """
+    global _cache
+    if os.environ.get("OCR_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRCache(
+                max_entries=int(os.environ.get("OCR_CACHE_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                disk_dir=os.environ.get("OCR_CACHE_DIR") or None,
+                disk_max_bytes=int(os.environ.get("OCR_CACHE_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)),
+            )
+        return _cache
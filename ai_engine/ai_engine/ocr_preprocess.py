@@ -0,0 +1,178 @@
+"""
+Pre-OCR image normalisation: orientation, resolution budget, grayscale,
+binarisation, deskew and margin cropping.
+Each step can be toggled via OCR_PREPROCESS (comma-separated step names).
+Pure Pillow, no extra dependencies.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+from PIL import Image, ImageFilter, ImageOps
+
+STEPS = ("downsample", "grayscale", "binarize", "deskew", "crop")
+DEFAULT_STEPS = ("downsample", "grayscale", "crop")
+DEFAULT_TARGET_DPI = 200
+# Long edge of an A4 page in inches; used to turn a target DPI into a pixel cap for
+# photos, whose DPI metadata is meaningless.
+A4_LONG_EDGE_IN = 11.69
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+CROP_PADDING = 16
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    downsample: bool = True
+    grayscale: bool = True
+    binarize: bool = False
+    deskew: bool = False
+    crop: bool = True
+    target_dpi: int = DEFAULT_TARGET_DPI
+
+    @classmethod
+    def from_env(cls) -> "PreprocessOptions":
+        """OCR_PREPROCESS="downsample,grayscale,crop" (or "none"); OCR_TARGET_DPI=200."""
+        raw = os.environ.get("OCR_PREPROCESS")
+        steps = DEFAULT_STEPS if raw is None else tuple(s.strip().lower() for s in raw.split(","))
+        try:
+            dpi = int(os.environ.get("OCR_TARGET_DPI", DEFAULT_TARGET_DPI))
+        except ValueError:
+            dpi = DEFAULT_TARGET_DPI
+        return cls(**{step: step in steps for step in STEPS}, target_dpi=max(72, dpi))
+
+    def cache_token(self) -> str:
+        """Stable string for OCR cache keys (preprocessing changes the OCR output)."""
+        enabled = [step for step in STEPS if getattr(self, step)]
+        return f"{'+'.join(enabled) or 'none'}@{self.target_dpi}"
+
+
+def _max_edge(target_dpi: int) -> int:
+    return int(target_dpi * A4_LONG_EDGE_IN)
+
+
+def draft_for_dpi(img: Image.Image, target_dpi: int, mode: str | None = None) -> None:
+    """For a not-yet-decoded JPEG, let libjpeg decode at 1/2, 1/4 or 1/8 scale (and in `mode`)."""
+    if getattr(img, "format", None) == "JPEG" and max(img.size) > _max_edge(target_dpi):
+        img.draft(mode or img.mode, (_max_edge(target_dpi), _max_edge(target_dpi)))
+
+
+def downsample(img: Image.Image, target_dpi: int) -> Image.Image:
+    """Shrink so the long edge is at most an A4 page at target_dpi; never upscales."""
+    max_edge = _max_edge(target_dpi)
+    long_edge = max(img.size)
+    if long_edge <= max_edge:
+        return img
+    scale = max_edge / long_edge
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+
+def otsu_threshold(gray: Image.Image) -> int:
+    """Otsu's global threshold from the 256-bin histogram of a grayscale image."""
+    hist = gray.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best_t, best_var = 127, -1.0
+    for t in range(256):
+        weight_bg += hist[t]
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * hist[t]
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if var > best_var:
+            best_t, best_var = t, var
+    return best_t
+
+
+def binarize(gray: Image.Image) -> Image.Image:
+    t = otsu_threshold(gray)
+    return gray.point(lambda v: 255 if v > t else 0, mode="L")
+
+
+def _row_profile_score(ink: Image.Image, angle: float) -> float:
+    """Variance of row ink sums after rotating; peaks when text lines are horizontal."""
+    rotated = ink.rotate(angle, resample=Image.BILINEAR, expand=False, fillcolor=0)
+    rows = rotated.resize((1, rotated.height), Image.BOX).tobytes()
+    mean = sum(rows) / len(rows)
+    return sum((r - mean) ** 2 for r in rows)
+
+
+def estimate_skew(gray: Image.Image) -> float:
+    """Skew angle in degrees (projection-profile search on a small ink mask)."""
+    small = gray.copy()
+    small.thumbnail((800, 800))
+    ink = ImageOps.invert(binarize(small))
+    best_angle, best_score = 0.0, _row_profile_score(ink, 0.0)
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for i in range(-steps, steps + 1):
+        angle = i * DESKEW_STEP
+        if angle == 0:
+            continue
+        score = _row_profile_score(ink, angle)
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def deskew(gray: Image.Image) -> Image.Image:
+    angle = estimate_skew(gray)
+    if angle == 0:
+        return gray
+    return gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def crop_margins(gray: Image.Image, padding: int = CROP_PADDING) -> Image.Image:
+    """
+    Crop blank margins around the ink. The ink box is found on a reduced copy with a
+    small min-filter, so isolated speckles do not keep a margin alive.
+    """
+    factor = max(1, min(gray.size) // 400)
+    small = gray.reduce(factor) if factor > 1 else gray
+    ink = ImageOps.invert(binarize(small)).filter(ImageFilter.MinFilter(3))
+    bbox = ink.getbbox()
+    if not bbox:
+        return gray
+    left, top, right, bottom = (v * factor for v in bbox)
+    box = (
+        max(0, left - padding),
+        max(0, top - padding),
+        min(gray.width, right + padding),
+        min(gray.height, bottom + padding),
+    )
+    if box == (0, 0, gray.width, gray.height):
+        return gray
+    return gray.crop(box)
+
+
+def preprocess_image(img: Image.Image, options: PreprocessOptions | None = None) -> Image.Image:
+    """
+    Normalise an image for OCR. EXIF orientation is always applied; every other step
+    is controlled by `options` (default: from env). Binarise, deskew and crop work
+    on grayscale, so they imply grayscale conversion.
+    """
+    options = options or PreprocessOptions.from_env()
+    to_gray = options.grayscale or options.binarize or options.deskew or options.crop
+    if options.downsample:
+        draft_for_dpi(img, options.target_dpi, "L" if to_gray else None)
+    img = ImageOps.exif_transpose(img)
+    # Grayscale before resampling: a third of the pixels to filter
+    if to_gray and img.mode != "L":
+        img = img.convert("L")
+    if options.downsample:
+        img = downsample(img, options.target_dpi)
+    if options.deskew:
+        img = deskew(img)
+    if options.crop:
+        img = crop_margins(img)
+    if options.binarize:
+        img = binarize(img)
+    return img
@@ -1,15 +1,29 @@
 """
 OCR: file (image/PDF) -> raw text.
-Uses Tesseract; optional Google Vision / EasyOCR can be added later.
+Uses Tesseract through a pluggable backend: the pytesseract CLI wrapper, or a
+persistent in-process engine (tesserocr) when installed. Optional Google Vision /
+EasyOCR can be added later as further backends.
 """
 
 from __future__ import annotations
 
 import io
+import json
+import math
 import os
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Iterator, Union
+
+from .layout import Word, words_from_pymupdf, words_from_rows, words_from_tesseract_data, words_to_rows
+from .ocr_cache import get_ocr_cache, make_cache_key
+from .types import OCRInfo
 
 try:
     import pytesseract
@@ -29,74 +43,480 @@ try:
 except ImportError:
     pytesseract = None
 
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 try:
     from PIL import Image
+
+    from .ocr_preprocess import PreprocessOptions, preprocess_image
 except ImportError:
     Image = None
+    PreprocessOptions = None
+
+OCR_LANG = "eng+hin"
+# Adaptive mode: first pass language, and the confidence below which a page is re-run with OCR_LANG
+OCR_FAST_LANG = "eng"
+DEFAULT_ADAPTIVE_MIN_CONF = 70.0
+# Share of words under LOW_WORD_CONF that also triggers the second pass (unrecognised script)
+ADAPTIVE_MAX_LOW_CONF_WORDS = 0.15
+LOW_WORD_CONF = 40.0
+# Zoom used when rasterising PDF pages for OCR (2x for better OCR quality)
+PDF_RENDER_ZOOM = 2
+# A PDF page whose embedded text layer is shorter than this is treated as scanned and OCR'd
+MIN_PAGE_TEXT_CHARS = 20
+# Upper bound on pixels per rendered page; larger pages are rendered at a lower zoom
+DEFAULT_MAX_PAGE_PIXELS = 8_000_000
+# Cache entries are JSON {"text", "pages", "pages_ocr", "words" (layout mode only)}; part of the key
+OCR_CACHE_ENTRY_VERSION = 3
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_ocr_workers() -> int:
+    """Worker processes for page-parallel OCR (OCR_WORKERS env; 1 = sequential)."""
+    value = os.environ.get("OCR_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            pass
+    return min(4, os.cpu_count() or 1)
+
+
+def _get_page_window(workers: int) -> int:
+    """Rendered pages allowed in flight at once (OCR_PAGE_WINDOW env; default 2 per worker)."""
+    value = os.environ.get("OCR_PAGE_WINDOW")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            pass
+    return 2 * workers if workers > 1 else 1
+
+
+def _get_max_page_pixels() -> int:
+    """Pixel budget per rendered PDF page (OCR_MAX_PAGE_PIXELS env)."""
+    try:
+        return max(1, int(os.environ.get("OCR_MAX_PAGE_PIXELS", DEFAULT_MAX_PAGE_PIXELS)))
+    except ValueError:
+        return DEFAULT_MAX_PAGE_PIXELS
+
+
+def _get_lang_mode() -> str:
+    """OCR_LANG_MODE: "fixed" (always OCR_LANG) or "adaptive" (English first, Hindi on demand)."""
+    mode = os.environ.get("OCR_LANG_MODE", "fixed").lower()
+    return mode if mode in ("fixed", "adaptive") else "fixed"
+
+
+def _get_adaptive_min_conf() -> float:
+    try:
+        return float(os.environ.get("OCR_ADAPTIVE_MIN_CONF", DEFAULT_ADAPTIVE_MIN_CONF))
+    except ValueError:
+        return DEFAULT_ADAPTIVE_MIN_CONF
+
+
+def _init_ocr_worker() -> None:
+    # One Tesseract thread per worker process: we parallelise across pages instead,
+    # and letting every process spin up its own OpenMP team oversubscribes the CPU.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Lazily create (or resize) the shared OCR process pool."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # pages already submitted by other documents still finish
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next document gets a fresh one; other callers' futures are left alone."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_workers = 0
+    pool.shutdown(wait=False)
+
+
+def shutdown_ocr_pool() -> None:
+    """Shut down the shared OCR process pool (call on application shutdown)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+class OCRBackend:
+    """Turns an in-memory PIL image into text. Subclasses wrap a specific OCR engine."""
+
+    name = "base"
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        raise NotImplementedError
+
+    def image_to_words(self, img, lang: str = OCR_LANG) -> tuple[str, list[Word]]:
+        """Text plus word boxes with confidences (0-100) from a single recognition pass."""
+        raise NotImplementedError
+
+    def image_to_text_and_confidences(self, img, lang: str = OCR_LANG) -> tuple[str, list[float]]:
+        """Text plus per-word confidences (0-100) from a single recognition pass."""
+        text, words = self.image_to_words(img, lang=lang)
+        return text, [w.conf for w in words]
+
+    def version(self) -> str:
+        return "unknown"
+
+
+class PytesseractBackend(OCRBackend):
+    """Tesseract CLI via pytesseract: forks a process and reloads traineddata per image."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        return pytesseract.image_to_string(img, lang=lang)
+
+    def image_to_words(self, img, lang: str = OCR_LANG) -> tuple[str, list[Word]]:
+        data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+        return _text_from_tesseract_data(data), words_from_tesseract_data(data)
+
+    def version(self) -> str:
+        return str(pytesseract.get_tesseract_version())
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Persistent in-process Tesseract via the tesserocr C-API bindings.
+    Language models stay loaded for the life of the handle; one handle per thread
+    (and hence per pool worker) because the Tesseract API object is not thread-safe.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def _api(self, lang: str):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(lang)
+        if api is None:
+            api = apis[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+        return api
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        api = self._api(lang)
+        api.SetImage(img)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_text_and_confidences(self, img, lang: str = OCR_LANG) -> tuple[str, list[float]]:
+        api = self._api(lang)
+        api.SetImage(img)
+        try:
+            api.Recognize()
+            return api.GetUTF8Text(), [float(c) for c in api.AllWordConfidences()]
+        finally:
+            api.Clear()
+
+    def image_to_words(self, img, lang: str = OCR_LANG) -> tuple[str, list[Word]]:
+        api = self._api(lang)
+        api.SetImage(img)
+        try:
+            api.Recognize()
+            level = tesserocr.RIL.WORD
+            words = []
+            for it in tesserocr.iterate_level(api.GetIterator(), level):
+                text = (it.GetUTF8Text(level) or "").strip()
+                box = it.BoundingBox(level)
+                if text and box:
+                    words.append(Word(text, *map(float, box), float(it.Confidence(level))))
+            return api.GetUTF8Text(), words
+        finally:
+            api.Clear()
+
+    def version(self) -> str:
+        return str(tesserocr.tesseract_version()).splitlines()[0]
+
+
+def _text_from_tesseract_data(data: dict) -> str:
+    """Rebuild plain text from Tesseract TSV/dict output: words by line, blank line between blocks."""
+    lines: list[str] = []
+    current: tuple | None = None
+    block = None
+    for i, word in enumerate(data["text"]):
+        if not str(word).strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if key != current:
+            if block is not None and key[0] != block:
+                lines.append("")
+            lines.append(str(word))
+            current, block = key, key[0]
+        else:
+            lines[-1] += " " + str(word)
+    return "\n".join(lines)
+
+
+_backend: OCRBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend() -> OCRBackend:
+    """
+    Process-wide OCR backend chosen by OCR_BACKEND: "auto" (default; tesserocr if
+    installed, else pytesseract), "tesserocr" or "pytesseract".
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            choice = os.environ.get("OCR_BACKEND", "auto").lower()
+            if choice in ("auto", "tesserocr") and tesserocr is not None:
+                _backend = TesserocrBackend()
+            elif choice == "tesserocr":
+                raise ImportError("OCR_BACKEND=tesserocr requires tesserocr. pip install tesserocr")
+            elif pytesseract is not None:
+                _backend = PytesseractBackend()
+            else:
+                raise ImportError(
+                    "OCR requires pytesseract (pip install pytesseract) or tesserocr. "
+                    "Also install Tesseract binary: https://github.com/UB-Mannheim/tesseract/wiki"
+                )
+        return _backend
+
+
+def _ocr_image(img, lang: str = OCR_LANG) -> str:
+    """OCR a single PIL image. Module-level so it can run in a worker process."""
+    return get_ocr_backend().image_to_string(img, lang=lang)
+
+
+def _needs_full_lang_pass(text: str, confidences: list[float]) -> bool:
+    """
+    True if a fast English pass looks unreliable: little text, low mean confidence, or
+    many near-zero-confidence words (Devanagari read with the English model comes out
+    as low-confidence junk).
+    """
+    if not confidences or not text.strip():
+        return True
+    if sum(confidences) / len(confidences) < _get_adaptive_min_conf():
+        return True
+    low = sum(1 for c in confidences if c < LOW_WORD_CONF)
+    return low / len(confidences) > ADAPTIVE_MAX_LOW_CONF_WORDS
+
+
+def _ocr_page(img, layout: bool = False) -> tuple[str, str, float, list[Word] | None]:
+    """
+    OCR one page with the configured language strategy; returns (text, lang, ms, words).
+    Adaptive mode runs OCR_FAST_LANG first and re-runs the page with OCR_LANG only
+    when the English pass looks unreliable. words (boxes) only in layout mode.
+    """
+    t0 = time.perf_counter()
+    backend = get_ocr_backend()
+    words = None
+    if _get_lang_mode() == "adaptive":
+        if layout:
+            text, words = backend.image_to_words(img, lang=OCR_FAST_LANG)
+            confidences = [w.conf for w in words]
+        else:
+            text, confidences = backend.image_to_text_and_confidences(img, lang=OCR_FAST_LANG)
+        lang = OCR_FAST_LANG
+        if _needs_full_lang_pass(text, confidences):
+            lang = OCR_LANG
+            if layout:
+                text, words = backend.image_to_words(img, lang=OCR_LANG)
+            else:
+                text = _ocr_image(img, OCR_LANG)
+    elif layout:
+        (text, words), lang = backend.image_to_words(img, lang=OCR_LANG), OCR_LANG
+    else:
+        text, lang = _ocr_image(img), OCR_LANG
+    return text, lang, round((time.perf_counter() - t0) * 1000, 1), words
+
+
+def _ocr_images(
+    images: Iterable,
+    workers: int | None = None,
+    window: int | None = None,
+    info: OCRInfo | None = None,
+    page_words: list | None = None,
+) -> list[str]:
+    """
+    OCR page images and return their text in page order.
+    `images` may be a lazy iterator: pages are pulled, OCR'd and released one window
+    at a time, so at most `window` rendered pages are alive at once. With workers > 1
+    the window is fanned out across the process pool; OCR falls back to sequential
+    if the pool cannot be created or breaks mid-document.
+    Per-page languages and timings are appended to `info` when given; passing
+    `page_words` turns on layout mode and appends each page's word boxes to it.
+    """
+    layout = page_words is not None
+    workers = _get_ocr_workers() if workers is None else max(1, workers)
+    if hasattr(images, "__len__") and len(images) < 2:
+        workers = 1
+    window = _get_page_window(workers) if window is None else max(1, window)
+
+    pool = None
+    if workers > 1:
+        try:
+            pool = _get_pool(workers)
+        except (OSError, NotImplementedError):
+            # Sandboxed hosts may forbid fork/semaphores; OCR sequentially instead
+            pool = None
+
+    texts: list[str] = []
+    pending: deque = deque()  # (image, future | None), in page order
+
+    def submit(img):
+        nonlocal pool
+        if pool is None:
+            return None
+        try:
+            return pool.submit(_ocr_page, img, layout)
+        except (BrokenProcessPool, RuntimeError):  # broken, or shut down by another caller
+            pool = None
+            return None
+
+    def take() -> None:
+        nonlocal pool
+        img, fut = pending.popleft()
+        page = None
+        if fut is not None:
+            try:
+                page = fut.result()
+            except BrokenProcessPool:
+                if pool is not None:
+                    _discard_pool(pool)
+                pool = None
+            except CancelledError:  # the pool was shut down (application exit, resize)
+                pool = None
+        text, lang, ms, words = page if page is not None else _ocr_page(img, layout)
+        texts.append(text)
+        if layout:
+            page_words.append(words or [])
+        if info is not None:
+            info.page_languages.append(lang)
+            info.page_timings_ms.append(ms)
+
+    for img in images:
+        pending.append((img, submit(img)))
+        if len(pending) >= window:
+            take()
+    while pending:
+        take()
+    return texts
 
 
-def extract_text_from_image(image_bytes: bytes) -> str:
-    """Extract text from image bytes (JPEG/PNG/WEBP) using Tesseract."""
+def _preprocess_pages(images: Iterable, options, info: OCRInfo | None = None) -> Iterator:
+    """
+    Apply the pre-OCR normalisation stage to each page as it is produced. Done before
+    pages are handed to the pool so workers receive smaller (grayscale, cropped) images.
+    """
+    for img in images:
+        t0 = time.perf_counter()
+        img = preprocess_image(img, options)
+        if info is not None:
+            info.preprocess_ms = round(info.preprocess_ms + (time.perf_counter() - t0) * 1000, 1)
+        yield img
+
+
+def extract_text_from_image(
+    image_bytes: bytes,
+    info: OCRInfo | None = None,
+    words: list[Word] | None = None,
+) -> str:
+    """
+    Extract text from image bytes (JPEG/PNG/WEBP) using Tesseract.
+    words optional: layout mode, word boxes are appended to it.
+    """
     if Image is None:
         raise ImportError("Pillow is required for OCR. pip install Pillow")
-    if pytesseract is None:
-        raise ImportError("pytesseract is required. pip install pytesseract (and install Tesseract binary)")
+    get_ocr_backend()  # raises ImportError if no OCR engine is installed
     img = Image.open(io.BytesIO(image_bytes))
-    return pytesseract.image_to_string(img, lang="eng+hin")
+    img = next(_preprocess_pages([img], PreprocessOptions.from_env(), info))
+    text, lang, ms, page_words = _ocr_page(img, layout=words is not None)
+    if words is not None:
+        words.extend(page_words or [])
+    if info is not None:
+        info.pages_total = info.pages_ocr = 1
+        info.page_languages.append(lang)
+        info.page_timings_ms.append(ms)
+    return text
 
 
-def _pdf_to_images_pymupdf(pdf_bytes: bytes) -> list:
-    """Convert PDF to PIL Images using PyMuPDF (no external binaries, works on Windows)."""
-    import pymupdf
-    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
-    images = []
-    try:
-        for page in doc:
-            # 2x zoom for better OCR quality
-            pix = page.get_pixmap(matrix=pymupdf.Matrix(2, 2), alpha=False)
-            images.append(pix.pil_image())
-    finally:
-        doc.close()
-    return images
+def _render_zoom(page, max_pixels: int) -> float:
+    """PDF_RENDER_ZOOM, reduced so that the rendered page stays within max_pixels."""
+    area = page.rect.width * page.rect.height
+    if area <= 0:
+        return PDF_RENDER_ZOOM
+    return min(PDF_RENDER_ZOOM, math.sqrt(max_pixels / area))
 
 
-def _pdf_to_images_pdf2image(pdf_bytes: bytes) -> list:
-    """Convert PDF to PIL Images using pdf2image (requires poppler)."""
-    from pdf2image import convert_from_bytes
-    return convert_from_bytes(pdf_bytes)
+def _iter_pdf_images_pymupdf(doc, pages: list[int] | None = None, max_pixels: int | None = None) -> Iterator:
+    """Render pages of an open PyMuPDF document one at a time (nothing is kept after yield)."""
+    import pymupdf
+    max_pixels = max_pixels or _get_max_page_pixels()
+    for pno in (range(doc.page_count) if pages is None else pages):
+        page = doc[pno]
+        zoom = _render_zoom(page, max_pixels)
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        img = pix.pil_image()
+        del pix
+        yield img
 
 
-def _pdf_extract_text_pymupdf(pdf_bytes: bytes) -> str:
-    """Extract embedded text from PDF using PyMuPDF (no Tesseract needed for text-based PDFs)."""
+def _pdf_to_images_pymupdf(pdf_bytes: bytes, pages: list[int] | None = None) -> list:
+    """
+    Convert PDF pages to PIL Images using PyMuPDF (no external binaries, works on Windows).
+    pages: 0-based page numbers to render; None renders every page.
+    Materialises every page; the OCR path streams via _iter_pdf_images instead.
+    """
     import pymupdf
     doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
-    texts = []
     try:
-        for page in doc:
-            texts.append(page.get_text())
+        return list(_iter_pdf_images_pymupdf(doc, pages))
     finally:
         doc.close()
-    return "\n\n".join(texts).strip()
 
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
-    """Extract text from PDF: try embedded text first (no Tesseract), then OCR if needed."""
-    # 1. Try PyMuPDF direct text extraction (works for text-based PDFs, no Tesseract needed)
-    try:
-        direct_text = _pdf_extract_text_pymupdf(pdf_bytes)
-        if direct_text and len(direct_text.strip()) > 20:
-            return direct_text
-    except Exception:
-        pass
+def _iter_pdf_images_pdf2image(pdf_bytes: bytes, pages: list[int] | None = None) -> Iterator:
+    """Render PDF pages one at a time using pdf2image (requires poppler)."""
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+    if pages is None:
+        pages = range(int(pdfinfo_from_bytes(pdf_bytes)["Pages"]))
+    for p in pages:
+        yield convert_from_bytes(pdf_bytes, first_page=p + 1, last_page=p + 1)[0]
+
+
+def _pdf_to_images_pdf2image(pdf_bytes: bytes, pages: list[int] | None = None) -> list:
+    """Convert PDF pages to PIL Images using pdf2image (requires poppler)."""
+    return list(_iter_pdf_images_pdf2image(pdf_bytes, pages))
 
-    # 2. Fall back to OCR (requires Tesseract) for image-based/scanned PDFs
-    images = None
+
+def _iter_pdf_images(pdf_bytes: bytes, pages: list[int] | None = None) -> Iterator:
+    """Lazily render PDF pages with PyMuPDF, falling back to pdf2image (poppler)."""
     try:
-        images = _pdf_to_images_pymupdf(pdf_bytes)
+        import pymupdf
+        doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
     except ImportError:
         # PyMuPDF not installed; try pdf2image (requires poppler)
         try:
-            images = _pdf_to_images_pdf2image(pdf_bytes)
+            yield from _iter_pdf_images_pdf2image(pdf_bytes, pages)
         except Exception as e:
             err_msg = str(e).lower()
             if "poppler" in err_msg or "page count" in err_msg or "pdftoppm" in err_msg:
@@ -105,58 +525,210 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
                     "On Windows: pip install pymupdf"
                 ) from e
             raise
+        return
     except Exception:
         # PyMuPDF failed (e.g. corrupted PDF); try pdf2image as fallback
-        try:
-            images = _pdf_to_images_pdf2image(pdf_bytes)
-        except Exception:
-            raise
+        yield from _iter_pdf_images_pdf2image(pdf_bytes, pages)
+        return
+    try:
+        yield from _iter_pdf_images_pymupdf(doc, pages)
+    finally:
+        doc.close()
 
-    if not images:
-        return ""
 
-    # Tesseract required for OCR - if not installed, raise helpful error
-    if pytesseract is None:
-        raise ImportError(
-            "OCR requires pytesseract. pip install pytesseract. "
-            "Also install Tesseract binary: https://github.com/UB-Mannheim/tesseract/wiki"
+def _pdf_page_texts_pymupdf(pdf_bytes: bytes, words: list[Word] | None = None) -> tuple[list[str], list[int]]:
+    """
+    Embedded text of every page, plus the 0-based pages that need OCR: pages whose
+    text layer is shorter than MIN_PAGE_TEXT_CHARS and which have something to OCR
+    (images or vector drawings). Blank pages are not OCR'd.
+    words optional: word boxes of the pages that keep their text layer are appended.
+    """
+    import pymupdf
+    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    texts: list[str] = []
+    ocr_pages: list[int] = []
+    try:
+        for page in doc:
+            text = page.get_text()
+            texts.append(text)
+            if len(text.strip()) < MIN_PAGE_TEXT_CHARS and (page.get_images() or page.get_drawings()):
+                ocr_pages.append(page.number)
+            elif words is not None:
+                words.extend(words_from_pymupdf(page, page.number))
+    finally:
+        doc.close()
+    return texts, ocr_pages
+
+
+def _pdf_extract_text_pymupdf(pdf_bytes: bytes) -> str:
+    """Extract embedded text from PDF using PyMuPDF (no Tesseract needed for text-based PDFs)."""
+    texts, _ = _pdf_page_texts_pymupdf(pdf_bytes)
+    return "\n\n".join(texts).strip()
+
+
+def _ocr_error(e: Exception) -> Exception:
+    """Turn a missing-Tesseract failure into a helpful ImportError; pass others through."""
+    err = str(e).lower()
+    if "tesseract" in err or "path" in err or "not found" in err:
+        return ImportError(
+            "Tesseract OCR is required for image-based PDFs. "
+            "Install Tesseract: choco install tesseract (Windows) or see "
+            "https://github.com/UB-Mannheim/tesseract/wiki"
         )
+    return e
+
 
-    texts = []
+def extract_text_from_pdf(
+    pdf_bytes: bytes,
+    workers: int | None = None,
+    info: OCRInfo | None = None,
+    words: list[Word] | None = None,
+) -> str:
+    """
+    Extract text from PDF, deciding per page: pages with a usable embedded text
+    layer are taken as-is (no Tesseract), and only the remaining (scanned) pages
+    are rendered and OCR'd, so mixed digital/scanned documents come out complete.
+    Scanned pages are rendered one window at a time (see _ocr_images) and OCR'd in
+    parallel across `workers` processes (default OCR_WORKERS).
+    words optional: layout mode; word boxes of every page (text layer or OCR) are appended.
+    """
+    words_start = len(words) if words is not None else 0
+    # 1. PyMuPDF text layer per page (None if PyMuPDF is missing or cannot read the file)
+    try:
+        page_texts, ocr_pages = _pdf_page_texts_pymupdf(pdf_bytes, words)
+    except Exception:
+        page_texts, ocr_pages = None, None
+
+    if info is not None and page_texts is not None:
+        info.pages_total = len(page_texts)
+        info.pages_ocr = len(ocr_pages)
+    if page_texts is not None and not ocr_pages:
+        return "\n\n".join(page_texts).strip()
+
+    # 2. Render and OCR only the pages without a text layer (all pages if PyMuPDF failed)
+    has_text_layer = bool(page_texts) and any(t.strip() for t in page_texts)
     try:
-        for img in images:
-            texts.append(pytesseract.image_to_string(img, lang="eng+hin"))
-    except Exception as e:
-        err = str(e).lower()
-        if "tesseract" in err or "path" in err or "not found" in err:
-            raise ImportError(
-                "Tesseract OCR is required for image-based PDFs. "
-                "Install Tesseract: choco install tesseract (Windows) or see "
-                "https://github.com/UB-Mannheim/tesseract/wiki"
-            ) from e
+        # Tesseract required for OCR - if not installed, raise helpful error
+        get_ocr_backend()
+        if ocr_pages is not None and len(ocr_pages) < 2:
+            workers = 1
+        try:
+            # Pages are rendered lazily and freed once OCR'd: memory is bounded by the window
+            pages = _preprocess_pages(_iter_pdf_images(pdf_bytes, ocr_pages), PreprocessOptions.from_env(), info)
+            page_words = [] if words is not None else None
+            texts = _ocr_images(pages, workers=workers, info=info, page_words=page_words)
+        except Exception as e:
+            err = _ocr_error(e)
+            if err is e:
+                raise
+            raise err from e
+    except ImportError:
+        # No OCR engine / renderer: still return the digital pages of a mixed document
+        if has_text_layer:
+            return "\n\n".join(page_texts).strip()
         raise
-    return "\n\n".join(texts)
+
+    if page_words:
+        for pno, ws in zip(ocr_pages if ocr_pages is not None else range(len(page_words)), page_words):
+            for w in ws:
+                w.page = pno
+            words.extend(ws)
+        # Text-layer pages were added first: restore page order (stable, so reading order within a page is kept)
+        words[words_start:] = sorted(words[words_start:], key=lambda w: w.page)
+    if page_texts is None:
+        if info is not None:
+            info.pages_total = info.pages_ocr = len(texts)
+        return "\n\n".join(texts)
+    for pno, text in zip(ocr_pages, texts):
+        page_texts[pno] = text
+    return "\n\n".join(page_texts).strip()
 
 
-def extract_text(file_path_or_bytes: Union[str, Path, bytes], content_type: str | None = None) -> str:
+def read_input(file_path_or_bytes: Union[str, Path, bytes], content_type: str | None = None) -> tuple[bytes, bool]:
+    """Load file bytes and tell whether they are a PDF (by suffix or content_type)."""
+    if isinstance(file_path_or_bytes, (str, Path)):
+        path = Path(file_path_or_bytes)
+        if not path.exists():
+            raise FileNotFoundError(str(path))
+        return path.read_bytes(), path.suffix.lower() == ".pdf" or bool(content_type and "pdf" in content_type)
+    return file_path_or_bytes, bool(content_type and "pdf" in content_type)
+
+
+@lru_cache(maxsize=1)
+def _engine_version() -> str:
+    """OCR backend + Tesseract version, part of the OCR cache key (an engine change invalidates entries)."""
+    try:
+        backend = get_ocr_backend()
+    except ImportError:
+        return "none"
+    try:
+        return f"{backend.name}-{backend.version()}"
+    except Exception:
+        return f"{backend.name}-unknown"
+
+
+def extract_text(
+    file_path_or_bytes: Union[str, Path, bytes],
+    content_type: str | None = None,
+    info: OCRInfo | None = None,
+    words: list[Word] | None = None,
+) -> str:
     """
     Extract raw text from file path or bytes.
     Supports: image (jpg/png/webp), PDF.
     content_type optional: "application/pdf", "image/jpeg", etc.
+    Results are cached by content hash (see ocr_cache), so re-processing a known file skips OCR.
+    info optional: filled with engine, languages and timings of this extraction.
+    words optional: layout mode; word boxes (page, position, confidence) are appended to it.
     """
-    if isinstance(file_path_or_bytes, (str, Path)):
-        path = Path(file_path_or_bytes)
-        if not path.exists():
-            raise FileNotFoundError(str(path))
-        raw = path.read_bytes()
-        suffix = path.suffix.lower()
-    else:
-        raw = file_path_or_bytes
-        suffix = ""
+    t0 = time.perf_counter()
+    raw, is_pdf = read_input(file_path_or_bytes, content_type)
 
-    if content_type and "pdf" in content_type:
-        return extract_text_from_pdf(raw)
-    if suffix == ".pdf" or (content_type and "pdf" in (content_type or "")):
-        return extract_text_from_pdf(raw)
+    lang_mode = _get_lang_mode()
+    if info is None:
+        info = OCRInfo()  # still needed for the page count stored with the cache entry
+    info.engine = _engine_version()
+    info.lang_mode = lang_mode
 
-    return extract_text_from_image(raw)
+    cache = get_ocr_cache()
+    key = None
+    if cache is not None:
+        # The confidence threshold decides which pages adaptive mode re-reads
+        mode_settings = {"adaptive_min_conf": _get_adaptive_min_conf()} if lang_mode == "adaptive" else {}
+        key = make_cache_key(
+            raw,
+            kind="pdf" if is_pdf else "image",
+            lang=OCR_LANG,
+            lang_mode=lang_mode,
+            zoom=PDF_RENDER_ZOOM,
+            min_page_text=MIN_PAGE_TEXT_CHARS,
+            max_page_pixels=_get_max_page_pixels(),
+            preprocess=PreprocessOptions.from_env().cache_token() if PreprocessOptions else "none",
+            engine=_engine_version(),
+            layout=words is not None,
+            entry=OCR_CACHE_ENTRY_VERSION,
+            **mode_settings,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            if words is not None:
+                words.extend(words_from_rows(entry["words"]))
+            info.cache_hit = True
+            info.pages_total = entry["pages"]
+            info.pages_ocr = entry["pages_ocr"]
+            info.total_ms = round((time.perf_counter() - t0) * 1000, 1)
+            return entry["text"]
+
+    words_start = len(words) if words is not None else 0  # the caller's list may hold earlier words
+    if is_pdf:
+        text = extract_text_from_pdf(raw, info=info, words=words)
+    else:
+        text = extract_text_from_image(raw, info=info, words=words)
+    if cache is not None:
+        entry = {"text": text, "pages": info.pages_total, "pages_ocr": info.pages_ocr}
+        if words is not None:
+            entry["words"] = words_to_rows(words[words_start:])
+        cache.put(key, json.dumps(entry))
+    info.total_ms = round((time.perf_counter() - t0) * 1000, 1)
+    return text
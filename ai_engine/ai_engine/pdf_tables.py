@@ -0,0 +1,98 @@
+"""
+Native table extraction for digital (system-generated) PDFs.
+Uses PyMuPDF's table detection to read the item grid straight into line items,
+so clean supplier invoices do not need the LLM for line items at all.
+"""
+
+from __future__ import annotations
+
+from .layout import (
+    ItemRows,
+    TableResult,
+    classify_header_cell,
+    group_lines,
+    is_item_table_header,
+    is_table_end,
+    line_text,
+    words_from_pymupdf,
+)
+
+# Header row is searched for among the first rows of a detected table
+HEADER_SEARCH_ROWS = 3
+
+
+def _cell(text: str | None) -> str:
+    return " ".join((text or "").split())
+
+
+def _header_kinds(table, rows: list[list]) -> tuple[int, list[str | None]] | None:
+    """(index of first data row, column kinds) if the table is a line-item table."""
+    if table.header.external:
+        kinds = [classify_header_cell(_cell(n)) for n in table.header.names]
+        if is_item_table_header({k for k in kinds if k}):
+            return 0, kinds
+    for idx, row in enumerate(rows[:HEADER_SEARCH_ROWS]):
+        kinds = [classify_header_cell(_cell(c)) for c in row]
+        if is_item_table_header({k for k in kinds if k}):
+            return idx + 1, kinds
+    return None
+
+
+def _row_cells(kinds: list[str | None], row: list) -> dict[str, str]:
+    cells: dict[str, str] = {}
+    for kind, text in zip(kinds, row):
+        text = _cell(text)
+        if kind and kind not in ("serial", "tax_detail") and text and kind not in cells:
+            cells[kind] = text
+    return cells
+
+
+def extract_pdf_line_items(pdf_bytes: bytes, min_page_text: int = 20) -> TableResult | None:
+    """
+    Line items from the item table(s) of a digital PDF, plus the page text outside them.
+    Returns None when the PDF has no recognisable item table or any page lacks a text
+    layer (scanned pages go through OCR instead). A table continuing on the next page
+    without a repeated header is read with the previous page's columns.
+    """
+    import pymupdf
+
+    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    items = ItemRows()
+    outside_words = []
+    footer_lines: list[str] = []  # totals rows inside the grid; kept for the header-only LLM call
+    found = False
+    kinds: list[str | None] | None = None
+    try:
+        for page in doc:
+            if len(page.get_text().strip()) < min_page_text:
+                return None
+            table_rects = []
+            for table in page.find_tables().tables:
+                rows = table.extract()
+                header = _header_kinds(table, rows)
+                if header is not None:
+                    start, kinds = header
+                elif kinds is not None and table.col_count == len(kinds):
+                    start = 0  # continuation of the previous page's table
+                else:
+                    continue
+                found = True
+                table_rects.append(pymupdf.Rect(table.bbox))
+                items.break_continuation()
+                for row in rows[start:]:
+                    joined = " ".join(_cell(c) for c in row if c)
+                    cells = _row_cells(kinds, row)
+                    if is_table_end(cells.get("description", "")) or is_table_end(joined):
+                        footer_lines.append(joined)
+                        break
+                    items.add(cells)
+            for w in words_from_pymupdf(page, page.number):
+                if not any(r.contains(pymupdf.Point(w.xc, w.yc)) for r in table_rects):
+                    outside_words.append(w)
+    finally:
+        doc.close()
+
+    if not found:
+        return None
+    lines = [line_text(line) for line in group_lines(outside_words)]
+    return items.result("\n".join(lines + footer_lines))
@@ -0,0 +1,187 @@
+"""
+Prompt compaction: OCR text -> fewer LLM input tokens carrying the same invoice facts.
+Collapses whitespace, drops OCR noise, boilerplate (terms and conditions, bank details,
+declarations, signatures, page counters) and repeated page headers/footers. If the text
+is still over the token budget, totals and header lines are kept first, then item rows,
+then everything else, in their original order.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+
+# Rough estimate for number-heavy English invoice text; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 3000
+# The first lines usually hold the vendor name and address
+HEADER_LINES = 6
+
+_AMOUNT = re.compile(r"\d[\d,]*\.\d{1,2}\b|\b\d{1,3}(?:,\d{2,3})+\b")
+_NUMBER = re.compile(r"\b\d+(?:[.,]\d+)*\b")
+_KEY_LINE = re.compile(
+    r"\b(gstin|gst\s*no|invoice|inv\.?\s*no|bill\s+(no|to|date)|dated?|place\s+of\s+supply|ship\s+to|"
+    r"buyer|consignee|customer|seller|supplier|state|total|taxable|cgst|sgst|utgst|igst|cess|"
+    r"round(ed)?\s*off|amount|payable|pan|irn|hsn|sac|qty|quantity|rate|description|particulars)\b",
+    re.IGNORECASE,
+)
+_BOILERPLATE = re.compile(
+    r"(computer[\s-]+generated|authori[sz]ed\s+signatory|\bsignature\b|e\.?\s*&\s*o\.?\s*e\b|"
+    r"subject\s+to\s+.*jurisdiction|thank\s+you|goods\s+once\s+sold|interest\s+@|"
+    r"^\(?continued\)?|^bank\s+(details|name)|^our\s+bank|"
+    r"^a/?c\.?\s*(no|number|name|holder)|^account\s+(no|number|name|holder)|^ifsc|^branch\b|"
+    r"^swift|^upi\s*id|^micr)",
+    re.IGNORECASE,
+)
+_TOTALS_LINE = re.compile(
+    r"^(sub\s*-?\s*total|total|grand\s+total|taxable|cgst|sgst|utgst|igst|cess|round(ed)?\s*off|"
+    r"net\s+(amount|payable)|amount\s+payable|invoice\s+(total|value))\b",
+    re.IGNORECASE,
+)
+_PAGE_COUNTER = re.compile(r"\bpage\s*(no\.?)?\s*:?\s*\d+(\s*(of|/)\s*\d+)?\b", re.IGNORECASE)
+# Headings whose following lines are free text until the next data line
+_BLOCK_START = re.compile(
+    r"^(terms\s*(&|and)\s*conditions|t\s*&\s*c\b|declaration|we\s+declare|notes?\s*:|remarks?\s*:)",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_token_budget() -> int:
+    """LLM_INPUT_TOKEN_BUDGET (default 3000)."""
+    try:
+        return max(100, int(os.environ.get("LLM_INPUT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+def compaction_enabled() -> bool:
+    return os.environ.get("LLM_COMPACT", "1").lower() in ("1", "true", "yes", "on")
+
+
+def _is_noise(line: str) -> bool:
+    """OCR debris: almost no letters or digits (rules, stamps, speckles read as symbols)."""
+    alnum = sum(ch.isalnum() for ch in line)
+    return alnum < 2 or (alnum / len(line) < 0.4 and not _AMOUNT.search(line))
+
+
+def is_totals_line(line: str) -> bool:
+    return bool(_TOTALS_LINE.match(line))
+
+
+def is_item_row(line: str) -> bool:
+    """An item row carries an amount and at least one more number (qty, rate, HSN)."""
+    return bool(_AMOUNT.search(line)) and len(_NUMBER.findall(line)) >= 2 and not _TOTALS_LINE.match(line)
+
+
+def is_key_line(line: str) -> bool:
+    return bool(_KEY_LINE.search(line))
+
+
+def _is_data(line: str) -> bool:
+    return bool(_AMOUNT.search(line) or _KEY_LINE.search(line))
+
+
+def clean_lines(text: str, keep_breaks: bool = False) -> list[str]:
+    """
+    Whitespace-collapsed lines without noise, boilerplate or repeated headers/footers.
+    keep_breaks=True keeps one "" per run of blank lines (page/paragraph boundaries).
+    """
+    sections: list[list[str]] = [[]]  # runs of lines between blank lines (pages join with "\n\n")
+    in_block = False
+    for raw in text.splitlines():
+        line = " ".join(_PAGE_COUNTER.sub(" ", raw).split())
+        if not line:
+            if sections[-1]:
+                sections.append([])
+            continue
+        if _is_noise(line):
+            continue
+        if _BLOCK_START.match(line):
+            in_block = True
+            continue
+        if in_block:
+            if not _is_data(line):
+                continue
+            in_block = False
+        if _BOILERPLATE.search(line):
+            continue
+        sections[-1].append(line)
+
+    lines: list[str] = []
+    seen: set[str] = set()
+    for section in sections:
+        kept, edges = _drop_repeated_edges(section, seen)
+        seen.update(edges)  # only lines from earlier sections count as repeats
+        if kept:
+            if keep_breaks and lines:
+                lines.append("")
+            lines.extend(kept)
+    return lines
+
+
+def _may_be_item(line: str) -> bool:
+    return is_item_row(line) or (len(_NUMBER.findall(line)) >= 3 and not is_key_line(line))
+
+
+def _drop_repeated_edges(section: list[str], seen: set[str]) -> tuple[list[str], list[str]]:
+    """
+    Page headers/footers repeat verbatim at the top or bottom of each page: drop edge lines
+    already seen at an earlier section's edge. Lines inside a section, and lines that look
+    like item rows (an amount, or three numbers such as qty/rate/value), are always kept, so
+    repeated item rows and continuation lines survive.
+    Returns (kept lines, edge keys of this section).
+    """
+    n = len(section)
+    kept: list[str] = []
+    edges: list[str] = []
+    for i, line in enumerate(section):
+        if (i < HEADER_LINES or i >= n - HEADER_LINES) and not _may_be_item(line):
+            key = line.lower()
+            if key in seen:
+                continue
+            edges.append(key)
+        kept.append(line)
+    return kept, edges
+
+
+def compact_text(text: str, token_budget: int | None = None) -> str:
+    """
+    Compact invoice text for the LLM prompt within `token_budget` (default from env).
+    When lines have to be dropped: header and totals lines first, then item rows, then
+    the rest, so long invoices lose free text before they lose line items.
+    """
+    budget = (token_budget or get_token_budget()) * CHARS_PER_TOKEN
+    lines = clean_lines(text)
+    if sum(len(line) + 1 for line in lines) <= budget:
+        return "\n".join(lines)
+
+    def priority(idx: int, line: str) -> int:
+        if _TOTALS_LINE.match(line):
+            return 0
+        if is_item_row(line):
+            return 1
+        if idx < HEADER_LINES or _KEY_LINE.search(line):
+            return 0
+        return 2
+
+    ranked = [(priority(i, line), i) for i, line in enumerate(lines)]
+    keep: set[int] = set()
+    used = 0
+    full: set[int] = set()  # priorities that ran out of budget
+    for rank, i in sorted(ranked):
+        cost = len(lines[i]) + 1
+        if rank in full:
+            continue
+        if used + cost > budget:
+            # Items are kept as a contiguous prefix so the cut point is well defined
+            if rank > 0:
+                full.add(rank)
+            continue
+        keep.add(i)
+        used += cost
+    return "\n".join(lines[i] for i in sorted(keep))
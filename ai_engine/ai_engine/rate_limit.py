@@ -0,0 +1,327 @@
+"""
+Client-side protection for the LLM provider, shared by every call in the process.
+- Token buckets for requests/min and tokens/min, so bursts are spread out instead of
+  answered with 429s.
+- A cap on requests in flight.
+- A circuit breaker that fails fast while the provider is down and lets one trial
+  request through after a cool-down.
+- Retry policy: only transient errors (timeouts, connection errors, 408/425/429/5xx) are
+  retried, honouring Retry-After.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+from tenacity import RetryCallState, wait_exponential
+
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_RESET = 30.0
+# Longest Retry-After honoured; a longer one is capped to this before the next retry
+MAX_RETRY_AFTER = 60.0
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+_backoff = wait_exponential(multiplier=1, min=2, max=10)
+
+
+class CircuitOpenError(RuntimeError):
+    """The LLM provider failed repeatedly; calls fail fast until the breaker resets."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient failures worth another attempt; 4xx request errors and bad JSON are not."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+def retry_after(exc: BaseException | None) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), if the error carries one."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def wait_retry_after(retry_state: RetryCallState) -> float:
+    """tenacity wait: the provider's Retry-After when given, else exponential backoff."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    delay = retry_after(exc)
+    if delay is not None:
+        return min(delay, MAX_RETRY_AFTER)
+    return _backoff(retry_state)
+
+
+class TokenBucket:
+    """
+    `rate` units per minute, bursting up to one minute's worth. reserve() books the units
+    and returns how long the caller must wait for them, so concurrent callers queue in
+    order without holding the lock while they sleep. rate <= 0 means unlimited.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.capacity = rate
+        self.level = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate / 60.0)
+        self.updated = now
+
+    def reserve(self, units: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        units = min(units, self.capacity)  # a single oversized request must still get through
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.level -= units
+            return 0.0 if self.level >= 0 else -self.level * 60.0 / self.rate
+
+    def adjust(self, units: float) -> None:
+        """Correct an estimate once the real usage is known (positive: more was used)."""
+        if self.rate <= 0 or not units:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level - units)
+
+    def available(self) -> float | None:
+        if self.rate <= 0:
+            return None
+        with self._lock:
+            self._refill(time.monotonic())
+            return round(self.level, 1)
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive transient failures; half-opens after `reset` seconds."""
+
+    def __init__(self, failures: int, reset: float) -> None:
+        self.failures = failures
+        self.reset = reset
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        if self.failures <= 0:
+            return
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._trial:
+                self._trial = True  # one trial request; the rest keep failing fast
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"LLM provider unavailable (circuit open for {self.reset:g}s after repeated failures)")
+
+    def record(self, exc: BaseException | None) -> None:
+        """
+        Outcome of a request: None on success. Only a success closes the breaker. Client
+        errors (4xx), throttling and cancellation give no verdict on the provider's health:
+        they do not count as failures, and a half-open breaker lets another trial through.
+        """
+        with self._lock:
+            if exc is None:
+                self.state = "closed"
+                self.consecutive = 0
+                self._trial = False
+                return
+            if not isinstance(exc, Exception) or not is_retryable(exc) or _is_throttled(exc):
+                if self.state == "half_open":
+                    self._trial = False
+                elif self.state == "closed" and isinstance(exc, Exception):
+                    self.consecutive = 0  # the provider answered
+                return
+            self.consecutive += 1
+            if self.state == "half_open" or (self.failures > 0 and self.consecutive >= self.failures):
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+def _is_throttled(exc: BaseException) -> bool:
+    """429: the provider is up but asking us to slow down (the buckets handle that)."""
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429
+
+
+class LLMLimiter:
+    """Rate buckets, in-flight cap and circuit breaker around each LLM request attempt."""
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        breaker_failures: int = DEFAULT_BREAKER_FAILURES,
+        breaker_reset: float = DEFAULT_BREAKER_RESET,
+    ) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_in_flight = max(1, max_in_flight)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self._threads = threading.BoundedSemaphore(self.max_in_flight)
+        # asyncio semaphores are bound to their event loop
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.sent = 0
+        self.throttled = 0
+        self.failed = 0
+        self.waits = 0
+        self.wait_ms = 0.0
+
+    def _delay(self, tokens: int) -> float:
+        self.breaker.before()
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def _started(self, delay: float) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.sent += 1
+            if delay > 0:
+                self.waits += 1
+                self.wait_ms += delay * 1000
+
+    def _ended(self, exc: BaseException | None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if exc is not None:
+                self.failed += 1
+                self.throttled += _is_throttled(exc)
+        self.breaker.record(exc)
+
+    @contextmanager
+    def slot(self, tokens: int) -> Iterator[None]:
+        """Wait for an in-flight slot and bucket capacity, then run one request attempt."""
+        with self._threads:
+            delay = self._delay(tokens)
+            if delay > 0:
+                time.sleep(delay)
+            self._started(delay)
+            try:
+                yield
+            except BaseException as exc:
+                self._ended(exc)
+                raise
+            self._ended(None)
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int) -> AsyncIterator[None]:
+        """Async slot(): waits with asyncio.sleep; the in-flight cap applies per event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sem = self._loops.get(loop)
+            if sem is None:
+                sem = self._loops[loop] = asyncio.Semaphore(self.max_in_flight)
+        async with sem:
+            delay = self._delay(tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._started(delay)
+            try:
+                yield
+            except BaseException as exc:
+                self._ended(exc)
+                raise
+            self._ended(None)
+
+    def metrics(self) -> dict[str, Any]:
+        """Limiter and breaker state (for health endpoints and dashboards)."""
+        with self._lock:
+            counters = {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "requests_sent": self.sent,
+                "requests_failed": self.failed,
+                "throttled_429": self.throttled,
+                "rate_limited_waits": self.waits,
+                "rate_limited_wait_ms": round(self.wait_ms, 1),
+            }
+        return {
+            **counters,
+            "rpm_available": self.requests.available(),
+            "tpm_available": self.tokens.available(),
+            "circuit_state": self.breaker.state,
+            "circuit_consecutive_failures": self.breaker.consecutive,
+            "circuit_trips": self.breaker.trips,
+            "circuit_rejected": self.breaker.rejected,
+        }
+
+
+_limiter: LLMLimiter | None = None
+_limiter_pid: int | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter() -> LLMLimiter:
+    """
+    Process-wide limiter (recreated after a fork). Configured by LLM_RPM and LLM_TPM
+    (0 = unlimited, the default), LLM_MAX_IN_FLIGHT (16), LLM_BREAKER_FAILURES (5, 0 disables
+    the breaker) and LLM_BREAKER_RESET (seconds, 30).
+    """
+    global _limiter, _limiter_pid
+    pid = os.getpid()
+    with _limiter_lock:
+        if _limiter is None or _limiter_pid != pid:
+            _limiter = LLMLimiter(
+                rpm=_env_float("LLM_RPM", 0),
+                tpm=_env_float("LLM_TPM", 0),
+                max_in_flight=int(_env_float("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                breaker_failures=int(_env_float("LLM_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES)),
+                breaker_reset=_env_float("LLM_BREAKER_RESET", DEFAULT_BREAKER_RESET),
+            )
+            _limiter_pid = pid
+        return _limiter
+
+
+def reset_llm_limiter() -> None:
+    """Drop the limiter so the next call re-reads the environment."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
+
+
+def get_llm_metrics() -> dict[str, Any]:
+    return get_llm_limiter().metrics()
@@ -0,0 +1,43 @@
+"""
+Internal line-item records for the extraction pipeline.
+Table parsers and LLM replies produce LineRecords (slotted dataclasses, no validation
+overhead); enrichment turns them plus the GST columns into contract dicts, which are
+validated into pydantic LineItems once, at the public boundary (LINE_ITEMS).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from .types import LineItem
+
+# One validator call for a whole invoice's items instead of one LineItem() per item
+LINE_ITEMS = TypeAdapter(list[LineItem])
+
+
+@dataclass(slots=True)
+class LineRecord:
+    """A line item as read from the document, before category and GST are added."""
+
+    description: str = ""
+    hsn_sac: str = ""
+    qty: float = 1.0
+    unit_price: float = 0.0
+    taxable_value: float = 0.0
+    gst_rate: float = 0.0
+
+    @classmethod
+    def from_reply(cls, it: dict[str, Any]) -> LineRecord:
+        """One line_items element of an LLM reply (types coerced like parse_line_item)."""
+        return cls(
+            str(it.get("description", "")),
+            str(it.get("hsn_sac", "")),
+            float(it.get("qty", 1)),
+            float(it.get("unit_price", 0)),
+            float(it.get("taxable_value", 0)),
+            float(it.get("gst_rate", 0)),
+        )
+
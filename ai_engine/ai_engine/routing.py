@@ -0,0 +1,96 @@
+"""
+Tiered model routing: every invoice is first read by the cheapest model; the reply is
+checked (line items vs totals, totals arithmetic, GSTIN format and check digit, date,
+the model's own confidence) and only invoices that fail are re-read by the next tier.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date
+from typing import Any, Iterable
+
+from .rule_extractor import is_valid_gstin
+
+DEFAULT_ESCALATE_MIN_CONFIDENCE = 0.7
+# Rupees of round-off allowed, or this share of the amount when larger
+AMOUNT_TOLERANCE = 1.0
+AMOUNT_TOLERANCE_SHARE = 0.01
+
+
+def get_model_tiers(default_model: str) -> list[str]:
+    """LLM_MODEL_TIERS: comma-separated models, cheapest first (default: just `default_model`)."""
+    tiers = [m.strip() for m in os.environ.get("LLM_MODEL_TIERS", "").split(",") if m.strip()]
+    return tiers or [default_model]
+
+
+def get_escalate_min_confidence() -> float:
+    """LLM_ESCALATE_MIN_CONFIDENCE: replies the model rates below this go to the next tier."""
+    try:
+        return float(os.environ.get("LLM_ESCALATE_MIN_CONFIDENCE", DEFAULT_ESCALATE_MIN_CONFIDENCE))
+    except ValueError:
+        return DEFAULT_ESCALATE_MIN_CONFIDENCE
+
+
+def _num(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= max(AMOUNT_TOLERANCE, abs(b) * AMOUNT_TOLERANCE_SHARE)
+
+
+def validate_reply(
+    raw: dict[str, Any],
+    include_line_items: bool = True,
+    fields: Iterable[str] | None = None,
+    min_confidence: float | None = None,
+) -> list[str]:
+    """
+    Problems found in an extraction reply (empty list: accept it). Only keys that were
+    asked for are checked; blank values are "unknown", not errors.
+    """
+    asked = set(fields) if fields is not None else None
+    problems: list[str] = []
+
+    def wanted(key: str) -> bool:
+        return asked is None or key in asked
+
+    totals = raw.get("totals") if isinstance(raw.get("totals"), dict) else {}
+    taxable = _num(totals.get("taxable_value"))
+    items = raw.get("line_items") if isinstance(raw.get("line_items"), list) else []
+    if include_line_items and items and taxable > 0:
+        items_taxable = sum(
+            _num(it.get("taxable_value")) or _num(it.get("unit_price")) * _num(it.get("qty") or 1)
+            for it in items
+            if isinstance(it, dict)
+        )
+        if not _close(items_taxable, taxable):
+            problems.append("line_items_total")
+    if wanted("totals"):
+        grand = _num(totals.get("grand_total"))
+        if taxable > 0 and grand > 0 and not _close(taxable + _num(totals.get("gst_total")), grand):
+            problems.append("totals_arithmetic")
+
+    for key in ("vendor", "buyer"):
+        party = raw.get(key) if isinstance(raw.get(key), dict) else {}
+        gstin = str(party.get("gstin") or "").strip().upper()
+        if wanted(key) and gstin and not is_valid_gstin(gstin):
+            problems.append(f"{key}.gstin")
+
+    invoice = raw.get("invoice") if isinstance(raw.get("invoice"), dict) else {}
+    inv_date = str(invoice.get("date") or "").strip()
+    if wanted("invoice") and inv_date:
+        try:
+            date.fromisoformat(inv_date[:10])
+        except ValueError:
+            problems.append("invoice.date")
+
+    confidence = raw.get("confidence") if isinstance(raw.get("confidence"), dict) else {}
+    threshold = get_escalate_min_confidence() if min_confidence is None else min_confidence
+    if "overall" in confidence and _num(confidence.get("overall")) < threshold:
+        problems.append("confidence")
+    return problems
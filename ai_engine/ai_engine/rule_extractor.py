@@ -0,0 +1,423 @@
+"""
+Deterministic pre-extractor: regexes and layout heuristics for the invoice fields
+that follow fixed patterns (GSTINs, invoice number and date, place of supply, totals).
+Every field gets its own confidence, so process_invoice can skip the LLM when all
+required fields are certain, or ask it only for the groups that are still missing.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from .gst_rates import STATE_CODES
+from .layout import parse_number
+
+# Fields that must be certain before the LLM can be skipped (dotted paths into the
+# LLM reply shape). Buyer details and the vendor address are nice-to-have.
+REQUIRED_FIELDS = (
+    "vendor.name",
+    "vendor.gstin",
+    "invoice.number",
+    "invoice.date",
+    "place_of_supply_state",
+    "is_inter_state",
+    "totals.taxable_value",
+    "totals.grand_total",
+)
+DEFAULT_MIN_CONFIDENCE = 0.9
+
+# Fields the rules can fill for each top-level key of the LLM schema; a key whose
+# fields are all certain is left out of the LLM prompt.
+KEY_FIELDS = {
+    "vendor": ("vendor.name", "vendor.gstin"),
+    "invoice": ("invoice.number", "invoice.date"),
+    "buyer": ("buyer.name", "buyer.gstin"),
+    "place_of_supply_state": ("place_of_supply_state",),
+    "is_inter_state": ("is_inter_state",),
+    "totals": ("totals.taxable_value", "totals.gst_total", "totals.grand_total"),
+}
+
+_GSTIN_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_GSTIN = re.compile(r"\b(\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z])\b")
+_BUYER_LABEL = re.compile(
+    r"\b(bill(?:ed)?\s+to|buyer|customer|recipient|consignee|ship(?:ped)?\s+to|sold\s+to)\b", re.IGNORECASE
+)
+_SELLER_LABEL = re.compile(r"^\s*(?:seller|vendor|supplier|from|sold\s+by)\s*[:\-]\s*(.+)$", re.IGNORECASE)
+_COMPANY_SUFFIX = re.compile(
+    r"\b(pvt|private|ltd|limited|llp|inc|co\.|company|corporation|corp|enterprises?|traders?|trading|"
+    r"industries|agenc(?:y|ies)|stores?|services|solutions|associates|& sons|mart)\b\.?",
+    re.IGNORECASE,
+)
+_TITLE_LINE = re.compile(
+    r"^(tax\s+invoice|invoice|bill\s+of\s+supply|original|duplicate|triplicate|gst\s+invoice|"
+    r"retail\s+invoice|cash\s+memo|estimate)\b",
+    re.IGNORECASE,
+)
+
+_INVOICE_NO = re.compile(
+    r"\b(?:tax\s+)?(?:invoice|inv|bill)\.?\s*(?:no\.?|number|num|#)\s*[:\-.#]?\s*([A-Z0-9][A-Z0-9/\-_.]*)",
+    re.IGNORECASE,
+)
+_DATE_LABEL = re.compile(
+    r"\b(?P<label>(?:invoice|inv\.?|bill)\s+date|date\s+of\s+(?:invoice|issue)|dated|date)\s*[:\-.]?\s*",
+    re.IGNORECASE,
+)
+_MONTHS = "jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec"
+_DATE = re.compile(
+    r"(?P<ymd>\d{4}-\d{1,2}-\d{1,2})"
+    r"|(?P<dmy>\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4})"
+    rf"|(?P<dmon>\d{{1,2}}[\s\-/.]*(?:{_MONTHS})[a-z]*[\s\-/.,]*\d{{2,4}})"
+    rf"|(?P<mond>(?:{_MONTHS})[a-z]*\.?\s+\d{{1,2}},?\s+\d{{4}})",
+    re.IGNORECASE,
+)
+# "Due Date", "PO Date", ... are not the invoice date
+_OTHER_DATE = re.compile(r"\b(due|order|po|supply|delivery|dispatch|challan|payment)\s*$", re.IGNORECASE)
+_PLACE_OF_SUPPLY = re.compile(r"\bplace\s+of\s+supply\s*[:\-]?\s*(.+)$", re.IGNORECASE)
+
+# Totals labels, most specific first; `generic` labels only count when nothing better exists
+_GRAND_LABELS = re.compile(
+    r"^\s*(grand\s+total|total\s+amount(?:\s+payable)?|invoice\s+(?:total|value|amount)|"
+    r"amount\s+payable|net\s+(?:amount|payable|total)|total\s+invoice\s+value)\b",
+    re.IGNORECASE,
+)
+_GENERIC_TOTAL = re.compile(r"^\s*total\b", re.IGNORECASE)
+_TAXABLE_LABELS = re.compile(r"^\s*(total\s+)?(taxable\s+(value|amount)|sub\s*-?\s*total)\b", re.IGNORECASE)
+_TAX_TOTAL_LABELS = re.compile(r"^\s*total\s+(tax|gst)(\s+amount)?\b", re.IGNORECASE)
+_TAX_LINE = re.compile(r"^\s*(cgst|sgst|utgst|igst)\b", re.IGNORECASE)
+_NOT_AMOUNT_LINE = re.compile(r"\b(in\s+words|rupees)\b", re.IGNORECASE)
+_AMOUNT_TOKEN = re.compile(r"(?:₹|rs\.?|inr)?\s*\(?-?\d[\d,]*(?:\.\d+)?\)?%?", re.IGNORECASE)
+
+
+@dataclass
+class RuleExtraction:
+    """Fields found by the rules, in the LLM reply shape, with per-field confidence (0-1)."""
+
+    raw: dict[str, Any] = field(default_factory=dict)
+    confidence: dict[str, float] = field(default_factory=dict)
+
+    def set(self, path: str, value: Any, confidence: float) -> None:
+        """Record a field unless an equally or more confident value is already there."""
+        if confidence <= self.confidence.get(path, -1.0):
+            return
+        target = self.raw
+        *parents, leaf = path.split(".")
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = value
+        self.confidence[path] = round(confidence, 3)
+
+    def get(self, path: str) -> Any:
+        value: Any = self.raw
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    def missing(self, fields: Iterable[str] = REQUIRED_FIELDS, threshold: float = DEFAULT_MIN_CONFIDENCE) -> list[str]:
+        """Fields that were not found with at least `threshold` confidence."""
+        return [f for f in fields if self.confidence.get(f, 0.0) < threshold]
+
+    def llm_keys(self, threshold: float = DEFAULT_MIN_CONFIDENCE) -> list[str]:
+        """Top-level schema keys the LLM still has to fill (all of them if the rules found nothing)."""
+        return [key for key, fields in KEY_FIELDS.items() if self.missing(fields, threshold)]
+
+    def merge_into(self, llm_raw: dict[str, Any], threshold: float = DEFAULT_MIN_CONFIDENCE) -> dict[str, Any]:
+        """
+        Combine with an LLM reply: confident rule values win (they were read verbatim and,
+        for GSTINs, checksum-validated); other rule values only fill fields the LLM left empty
+        (missing, None or ""). An LLM False or 0 is an answer, not a gap.
+        """
+        merged = {k: (dict(v) if isinstance(v, dict) else v) for k, v in llm_raw.items()}
+        for path, conf in self.confidence.items():
+            *parents, leaf = path.split(".")
+            target = merged
+            for key in parents:
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                target = target[key]
+            current = target.get(leaf)
+            if conf >= threshold or current is None or current == "":
+                target[leaf] = self.get(path)
+        confidence = dict(merged.get("confidence") or {})
+        fields = dict(confidence.get("fields") or {})
+        fields.update({p: c for p, c in self.confidence.items() if c >= threshold})
+        confidence["fields"] = fields
+        merged["confidence"] = confidence
+        return merged
+
+
+# ---------------------------------------------------------------------------
+# Field rules
+# ---------------------------------------------------------------------------
+
+
+def gstin_checksum_ok(gstin: str) -> bool:
+    """Validate the 15th character of a GSTIN (GSTN's mod-36 check digit)."""
+    if len(gstin) != 15:
+        return False
+    total = 0
+    for i, ch in enumerate(gstin[:14]):
+        idx = _GSTIN_CHARS.find(ch)
+        if idx < 0:
+            return False
+        product = idx * (2 if i % 2 else 1)
+        total += product // 36 + product % 36
+    return _GSTIN_CHARS[(36 - total % 36) % 36] == gstin[14]
+
+
+def is_valid_gstin(gstin: str) -> bool:
+    """Well-formed GSTIN (state code, PAN, entity code, 'Z') with a correct check digit."""
+    return bool(_GSTIN.fullmatch(gstin)) and gstin_checksum_ok(gstin)
+
+
+def normalize_date(text: str) -> str | None:
+    """Parse an Indian invoice date (day first) to YYYY-MM-DD; None if it is not a real date."""
+    t = re.sub(r"[\s,]+", " ", text.strip().rstrip(".")).strip()
+    t = re.sub(r"(?<=\d)(?=[A-Za-z])|(?<=[A-Za-z])(?=\d)", " ", t)
+    t = re.sub(r"\bsept\b", "sep", t, flags=re.IGNORECASE)
+    candidates = [re.sub(r"[/.]", "-", t), t.replace("-", " ").replace("/", " ").replace(".", " ")]
+    formats = ("%Y-%m-%d", "%d-%m-%Y", "%d-%m-%y", "%d %b %Y", "%d %B %Y", "%d %b %y", "%b %d %Y", "%B %d %Y")
+    for candidate in candidates:
+        candidate = " ".join(candidate.split())
+        for fmt in formats:
+            try:
+                parsed = datetime.strptime(candidate, fmt).date()
+            except ValueError:
+                continue
+            if date(2000, 1, 1) <= parsed <= date(2100, 1, 1):
+                return parsed.isoformat()
+    return None
+
+
+def _state_from_text(text: str) -> tuple[str, str | None]:
+    """('Karnataka', '29') from '29-Karnataka', 'Karnataka (29)', '29' or 'Karnataka'."""
+    code_match = re.search(r"\b(\d{2})\b", text)
+    code = code_match.group(1) if code_match else None
+    if code in STATE_CODES:
+        return STATE_CODES[code], code
+    lowered = text.lower()
+    # Longest names first: "Daman and Diu" is part of "Dadra and Nagar Haveli and Daman and Diu"
+    for state_code, name in sorted(STATE_CODES.items(), key=lambda kv: -len(kv[1])):
+        if name.lower() in lowered:
+            return name, state_code
+    name = re.sub(r"[\d()\-:]+", " ", text)
+    return " ".join(name.split()).title(), None
+
+
+def _amounts(line: str) -> list[float]:
+    values = []
+    for token in _AMOUNT_TOKEN.findall(line):
+        token = token.strip()
+        if token.endswith("%"):
+            continue
+        value = parse_number(token.replace(" ", ""))
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def _last_amount(line: str) -> float | None:
+    values = _amounts(line)
+    return values[-1] if values else None
+
+
+def _find_gstins(lines: list[str], out: RuleExtraction) -> dict[str, str]:
+    """Vendor GSTIN = first one outside a buyer block; buyer = one under a buyer label."""
+    vendor = buyer = None
+    vendor_line = None
+    in_buyer_block = False
+    for idx, line in enumerate(lines):
+        if _BUYER_LABEL.search(line):
+            in_buyer_block = True
+        for gstin in _GSTIN.findall(line.upper()):
+            base = 0.97 if gstin_checksum_ok(gstin) else 0.8
+            if in_buyer_block and buyer is None and gstin != vendor:
+                buyer = gstin
+                out.set("buyer.gstin", gstin, base)
+            elif vendor is None and not in_buyer_block:
+                vendor, vendor_line = gstin, idx
+                out.set("vendor.gstin", gstin, base)
+    if vendor is None and buyer is None:
+        # No buyer label at all: the first GSTIN on an invoice is the supplier's
+        all_gstins = [(i, g) for i, line in enumerate(lines) for g in _GSTIN.findall(line.upper())]
+        if all_gstins:
+            vendor_line, vendor = all_gstins[0]
+            out.set("vendor.gstin", vendor, 0.85 if gstin_checksum_ok(vendor) else 0.7)
+    return {"vendor": vendor or "", "buyer": buyer or "", "vendor_line": vendor_line}
+
+
+def _find_vendor_name(lines: list[str], vendor_line: int | None, out: RuleExtraction) -> None:
+    for line in lines:
+        m = _SELLER_LABEL.match(line)
+        if m:
+            out.set("vendor.name", _clean_name(m.group(1)), 0.9)
+            return
+    header = []
+    for line in lines[: (vendor_line + 1) if vendor_line is not None else 6][:8]:
+        if _BUYER_LABEL.search(line):
+            break  # below this point names belong to the buyer
+        header.append(line)
+    for line in header:
+        name = _clean_name(line)
+        if not name or _TITLE_LINE.match(name):
+            continue
+        if _COMPANY_SUFFIX.search(name):
+            out.set("vendor.name", name, 0.92)
+            return
+    for line in header:
+        name = _clean_name(line)
+        if name and not _TITLE_LINE.match(name) and not re.search(r"\d{3}", name):
+            out.set("vendor.name", name, 0.6)
+            return
+
+
+def _clean_name(text: str) -> str:
+    text = _GSTIN.sub("", text)
+    text = re.sub(r"\bGSTIN\b.*$|\bGST\s*No\b.*$", "", text, flags=re.IGNORECASE)
+    return " ".join(text.split()).strip(" :,-|")
+
+
+def _find_buyer_name(lines: list[str], out: RuleExtraction) -> None:
+    for idx, line in enumerate(lines):
+        m = _BUYER_LABEL.search(line)
+        if not m:
+            continue
+        rest = _clean_name(line[m.end():])
+        if not rest and idx + 1 < len(lines):
+            rest = _clean_name(lines[idx + 1])
+        if rest and not _GSTIN.search(rest.upper()):
+            out.set("buyer.name", rest, 0.8 if _COMPANY_SUFFIX.search(rest) else 0.6)
+        return
+
+
+def _find_invoice_number(lines: list[str], out: RuleExtraction) -> None:
+    for line in lines:
+        for m in _INVOICE_NO.finditer(line):
+            number = m.group(1).rstrip(".-/")
+            if not any(ch.isdigit() for ch in number):
+                continue
+            # GST rules cap invoice numbers at 16 characters
+            out.set("invoice.number", number, 0.95 if len(number) <= 16 else 0.6)
+            return
+
+
+def _find_invoice_date(lines: list[str], out: RuleExtraction) -> None:
+    unlabelled: list[str] = []
+    for line in lines:
+        for label in _DATE_LABEL.finditer(line):
+            if _OTHER_DATE.search(line[: label.start()]):
+                continue
+            m = _DATE.match(line, label.end())
+            if not m:
+                continue
+            parsed = normalize_date(m.group(0))
+            if not parsed:
+                continue
+            generic = label.group("label").lower() == "date"
+            out.set("invoice.date", parsed, 0.85 if generic else 0.95)
+        for m in _DATE.finditer(line):
+            parsed = normalize_date(m.group(0))
+            if parsed:
+                unlabelled.append(parsed)
+    if "invoice.date" not in out.confidence and unlabelled:
+        out.set("invoice.date", unlabelled[0], 0.7 if len(set(unlabelled)) == 1 else 0.4)
+
+
+def _find_place_of_supply(lines: list[str], gstins: dict, out: RuleExtraction) -> str | None:
+    for line in lines:
+        m = _PLACE_OF_SUPPLY.search(line)
+        if not m:
+            continue
+        name, code = _state_from_text(m.group(1))
+        if name:
+            out.set("place_of_supply_state", name, 0.95 if code else 0.75)
+            return code
+    if gstins["buyer"][:2] in STATE_CODES:
+        code = gstins["buyer"][:2]
+        out.set("place_of_supply_state", STATE_CODES[code], 0.85)
+        return code
+    return None
+
+
+def _find_totals(lines: list[str], out: RuleExtraction) -> dict[str, str]:
+    """Stated totals; the split tax lines also tell whether IGST or CGST+SGST was charged."""
+    grand = generic = taxable = tax_total = None
+    tax_parts = 0.0
+    tax_kinds: set[str] = set()
+    for line in lines:
+        if _NOT_AMOUNT_LINE.search(line):
+            continue
+        if _TAX_LINE.match(line):
+            amount = _last_amount(line)
+            if amount:
+                tax_kinds.add(_TAX_LINE.match(line).group(1).lower())
+                tax_parts += amount
+            continue
+        amount = _last_amount(line)
+        if amount is None:
+            continue
+        if _GRAND_LABELS.match(line):
+            grand = amount  # the last labelled grand total wins (after round-off)
+        elif _TAXABLE_LABELS.match(line):
+            taxable = amount
+        elif _TAX_TOTAL_LABELS.match(line):
+            tax_total = amount
+        elif _GENERIC_TOTAL.match(line):
+            generic = amount if generic is None else max(generic, amount)
+    if tax_total is None and tax_parts:
+        tax_total = round(tax_parts, 2)
+    grand_conf = 0.9
+    if grand is None and generic is not None:
+        grand, grand_conf = generic, 0.75
+    consistent = (
+        grand is not None and taxable is not None and tax_total is not None
+        and abs(taxable + tax_total - grand) <= 1.0  # allow for round-off
+    )
+    if grand is not None:
+        out.set("totals.grand_total", grand, 0.98 if consistent else grand_conf)
+    if taxable is not None:
+        out.set("totals.taxable_value", taxable, 0.98 if consistent else 0.85)
+    if tax_total is not None:
+        out.set("totals.gst_total", tax_total, 0.98 if consistent else 0.8)
+    if "igst" in tax_kinds and not tax_kinds & {"cgst", "sgst", "utgst"}:
+        return {"tax_split": "inter"}
+    if tax_kinds & {"cgst", "sgst", "utgst"} and "igst" not in tax_kinds:
+        return {"tax_split": "intra"}
+    return {"tax_split": ""}
+
+
+def _find_inter_state(gstins: dict, pos_code: str | None, tax_split: str, out: RuleExtraction) -> None:
+    vendor_state = gstins["vendor"][:2] or None
+    other = pos_code or (gstins["buyer"][:2] or None)
+    from_states = None
+    if vendor_state and other:
+        from_states = vendor_state != other
+        conf = min(out.confidence.get("vendor.gstin", 0.0), 0.95 if pos_code else 0.85)
+    if from_states is not None and tax_split:
+        agrees = from_states == (tax_split == "inter")
+        out.set("is_inter_state", from_states, 0.98 if agrees else 0.5)
+    elif from_states is not None:
+        out.set("is_inter_state", from_states, conf)
+    elif tax_split:
+        out.set("is_inter_state", tax_split == "inter", 0.85)
+
+
+def extract_fields(text: str) -> RuleExtraction:
+    """Run every rule over the invoice text."""
+    out = RuleExtraction()
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return out
+    gstins = _find_gstins(lines, out)
+    _find_vendor_name(lines, gstins["vendor_line"], out)
+    _find_buyer_name(lines, out)
+    _find_invoice_number(lines, out)
+    _find_invoice_date(lines, out)
+    pos_code = _find_place_of_supply(lines, gstins, out)
+    split = _find_totals(lines, out)
+    _find_inter_state(gstins, pos_code, split["tax_split"], out)
+    return out
@@ -44,6 +44,21 @@ class LineItem(BaseModel):
     gst_breakdown: GSTBreakdown = Field(default_factory=GSTBreakdown)
     total: float = 0.0
 
+    def to_json_dict(self) -> dict[str, Any]:
+        """Equal to model_dump(), built directly (no serializer overhead per item)."""
+        gst = self.gst_breakdown
+        return {
+            "description": self.description,
+            "hsn_sac": self.hsn_sac,
+            "category": self.category,
+            "qty": self.qty,
+            "unit_price": self.unit_price,
+            "taxable_value": self.taxable_value,
+            "gst_rate": self.gst_rate,
+            "gst_breakdown": {"cgst": gst.cgst, "sgst": gst.sgst, "igst": gst.igst},
+            "total": self.total,
+        }
+
 
 class Totals(BaseModel):
     taxable_value: float = 0.0
@@ -56,6 +71,47 @@ class Confidence(BaseModel):
     fields: dict[str, float] = Field(default_factory=dict)
 
 
+class OCRInfo(BaseModel):
+    """How the raw text was obtained: engine, languages and timings (for measuring OCR cost)."""
+
+    engine: str = ""
+    lang_mode: str = ""  # "fixed" | "adaptive"
+    cache_hit: bool = False
+    pages_total: int = 0
+    pages_ocr: int = 0
+    page_languages: list[str] = Field(default_factory=list)  # per OCR'd page, in page order
+    page_timings_ms: list[float] = Field(default_factory=list)
+    preprocess_ms: float = 0.0
+    total_ms: float = 0.0
+
+
+class LLMInfo(BaseModel):
+    """LLM usage for one invoice: cache hits vs requests gives the cache hit rate."""
+
+    model: str = ""
+    requests: int = 0  # all requests, including chunks and escalated tiers
+    cache_hits: int = 0
+    batch_size: int = 0  # invoices sharing the request in batch mode (0 = own request)
+    input_chars: int = 0  # invoice text sent for the reply used (its tier only), after compaction
+    chunks: int = 0  # line-item chunks of a long invoice (0 = read in one request)
+    tier: int = 0  # model tier whose reply was used (0 = cheapest, see LLM_MODEL_TIERS)
+    validation: list[str] = Field(default_factory=list)  # checks the used reply failed
+    total_ms: float = 0.0
+
+
+class ProcessingInfo(BaseModel):
+    """Pipeline diagnostics; not part of the extracted invoice data."""
+
+    ocr: OCRInfo = Field(default_factory=OCRInfo)
+    llm: LLMInfo = Field(default_factory=LLMInfo)
+    line_items_source: str = ""  # "llm" | "layout" | "pdf_table"
+    fields_source: str = ""  # "llm" | "rules" | "rules+llm"
+    llm_fields: list[str] = Field(default_factory=list)  # top-level keys requested from the LLM
+    llm_input_chars: int = 0
+    stated_totals: Totals = Field(default_factory=Totals)  # as printed on the invoice
+    totals_match: bool | None = None  # recomputed taxable value agrees with the stated one
+
+
 class InvoiceExtractResult(BaseModel):
     """Result of process_invoice(); serializes to the contract JSON."""
 
@@ -68,6 +124,10 @@ class InvoiceExtractResult(BaseModel):
     totals: Totals = Field(default_factory=Totals)
     confidence: Confidence = Field(default_factory=Confidence)
     raw_text: str = ""
+    processing: ProcessingInfo = Field(default_factory=ProcessingInfo)
 
     def to_json_dict(self) -> dict[str, Any]:
-        return self.model_dump()
+        """Contract JSON dict, equal to model_dump(); line items are serialised directly."""
+        data = self.model_dump(exclude={"line_items"})
+        data["line_items"] = [item.to_json_dict() for item in self.line_items]
+        return {key: data[key] for key in type(self).model_fields}
@@ -0,0 +1 @@
+# AI engine benchmarks (run from repo root: python -m ai_engine.benchmarks.<name>)
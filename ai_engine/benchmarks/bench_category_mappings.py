@@ -0,0 +1,84 @@
+"""
+Line-item categorisation: the compiled matcher against the original keyword loop.
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.bench_category_mappings [--items 5000] [--repeat 5]
+
+Items are drawn from the corpus catalogue plus unmatched descriptions (the loop's worst
+case: every keyword of every rule is tried). Reports microseconds per item for the old
+loop, get_category_and_rate and categorize_many, and how many items the old loop
+categorised differently (substring misfires such as "pen" in "expenses", and codes the
+HSN/SAC rate master resolves).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from ai_engine.ai_engine.category_mappings import (
+    DEFAULT_CATEGORY,
+    DEFAULT_GST_RATE,
+    HSN_TO_CATEGORY_AND_RATE,
+    categorize_many,
+    get_category_and_rate,
+)
+
+from .corpus import CATALOGUE
+
+UNMATCHED = [
+    ("Travel expenses reimbursement", ""),
+    ("Courier charges", "996812"),
+    ("Packing material - corrugated boxes", "4819"),
+    ("Housekeeping services for March", "998533"),
+    ("Spare parts assorted", "8708"),
+]
+
+
+def legacy_get_category_and_rate(description: str, hsn_sac: str) -> tuple[str, float]:
+    """The original implementation: substring search of every keyword, rule by rule."""
+    combined = f"{description} {hsn_sac}".lower()
+    for keywords, category, rate in HSN_TO_CATEGORY_AND_RATE:
+        if any(kw.lower() in combined for kw in keywords):
+            return category, rate
+    return DEFAULT_CATEGORY, DEFAULT_GST_RATE
+
+
+def _per_item_us(fn, repeat: int, n: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = [(desc, hsn) for desc, hsn, _ in CATALOGUE] + UNMATCHED
+    items = [rng.choice(pool) for _ in range(args.items)]
+    get_category_and_rate("", "")  # compile outside the timings
+
+    timings = {
+        "legacy loop": _per_item_us(lambda: [legacy_get_category_and_rate(d, h) for d, h in items], args.repeat, len(items)),
+        "get_category_and_rate": _per_item_us(lambda: [get_category_and_rate(d, h) for d, h in items], args.repeat, len(items)),
+        "categorize_many": _per_item_us(lambda: categorize_many(items), args.repeat, len(items)),
+    }
+    print(f"{len(items)} items, best of {args.repeat}")
+    for name, us in timings.items():
+        print(f"{name:<22} {us:>8.2f} us/item  ({timings['legacy loop'] / us:.1f}x)")
+    changed = sorted({(d, h) for d, h in pool if legacy_get_category_and_rate(d, h) != get_category_and_rate(d, h)})
+    print(f"categorised differently from the legacy loop: {len(changed)}")
+    for desc, hsn in changed:
+        print(f"  {desc!r} {hsn!r}: {legacy_get_category_and_rate(desc, hsn)[0]} -> {get_category_and_rate(desc, hsn)[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Bulk GST recalculation: the column engine against one call per line item.
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.bench_gst_engine [--items 100000] [--repeat 3]
+
+Random line items (taxable values, slab rates, mixed intra/inter-state) are computed by
+the old per-item float code (a GSTBreakdown per call, as gst_calculator did), by
+calculate_gst_columns on the plain-Python path, and with NumPy when it is installed.
+Reports milliseconds per run and how many lines the old code rounded differently.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from ai_engine.ai_engine import gst_engine
+from ai_engine.ai_engine.gst_engine import calculate_gst_columns
+from ai_engine.ai_engine.types import GSTBreakdown
+
+
+def legacy_calculate_gst(taxable_value: float, gst_rate: float, is_inter_state: bool) -> GSTBreakdown:
+    """The original per-item float implementation."""
+    gst_amount = round(taxable_value * (gst_rate / 100), 2)
+    if is_inter_state:
+        return GSTBreakdown(cgst=0.0, sgst=0.0, igst=gst_amount)
+    half = round(gst_amount / 2, 2)
+    return GSTBreakdown(cgst=half, sgst=half, igst=0.0)
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    taxable = [round(rng.uniform(10, 200_000), 2) for _ in range(args.items)]
+    rates = [rng.choice([0.0, 5.0, 12.0, 18.0, 28.0]) for _ in range(args.items)]
+    inter = [rng.random() < 0.4 for _ in range(args.items)]
+
+    timings = {"per-item (old)": _best_ms(lambda: [legacy_calculate_gst(*row) for row in zip(taxable, rates, inter)], args.repeat)}
+    numpy = gst_engine.np
+    gst_engine.np = None
+    try:
+        timings["columns, plain Python"] = _best_ms(lambda: calculate_gst_columns(taxable, rates, inter).totals(), args.repeat)
+    finally:
+        gst_engine.np = numpy
+    if numpy is not None:
+        timings["columns, NumPy"] = _best_ms(lambda: calculate_gst_columns(taxable, rates, inter).totals(), args.repeat)
+    else:
+        print("numpy not installed: pip install -e \"ai_engine[numpy]\" for the vectorised path")
+
+    print(f"{args.items} line items, best of {args.repeat}")
+    base = timings["per-item (old)"]
+    for name, ms in timings.items():
+        print(f"{name:<22} {ms:>9.1f} ms  ({base / ms:.1f}x)")
+    columns = calculate_gst_columns(taxable, rates, inter)
+    cgst, igst = columns.rupees("cgst"), columns.rupees("igst")
+    differ = sum(
+        (old.cgst, old.igst) != (c, i)
+        for old, c, i in zip((legacy_calculate_gst(*row) for row in zip(taxable, rates, inter)), cgst, igst)
+    )
+    print(f"lines rounded differently by the old code: {differ}")
+
+
+if __name__ == "__main__":
+    main()
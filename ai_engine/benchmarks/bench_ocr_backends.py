@@ -0,0 +1,94 @@
+"""
+Per-page OCR latency: pytesseract (process per image) vs tesserocr (persistent engine).
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.bench_ocr_backends [--pages 10] [--lang eng+hin] [file ...]
+
+Files may be images or PDFs; without files a synthetic invoice page is rendered.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from ai_engine.ai_engine import ocr_service
+
+
+SYNTHETIC_LINES = [
+    "TAX INVOICE",
+    "ABC Traders Pvt Ltd   GSTIN: 29AABCU9603R1ZM",
+    "Invoice No: INV-2024-0042     Date: 15/01/2024",
+    "Bill To: XYZ Corp   GSTIN: 27AABCU9603R1Z1",
+    "Sl  Description            HSN     Qty   Rate      Amount",
+    *[f"{i:<3} Item description {i:<6} 8471    {i}     1,250.00  {i * 1250:,.2f}" for i in range(1, 25)],
+    "Taxable Value: 3,75,000.00",
+    "IGST @18%: 67,500.00",
+    "Grand Total: 4,42,500.00",
+]
+
+
+def synthetic_page() -> Image.Image:
+    """A4-ish page at ~150 DPI with invoice-like text lines (SYNTHETIC_LINES)."""
+    img = Image.new("L", (1240, 1754), color=255)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=24)
+    y = 80
+    for line in SYNTHETIC_LINES:
+        draw.text((80, y), line, fill=0, font=font)
+        y += 48
+    return img
+
+
+def load_pages(paths: list[str]) -> list[Image.Image]:
+    pages: list[Image.Image] = []
+    for p in paths:
+        data = Path(p).read_bytes()
+        if p.lower().endswith(".pdf"):
+            pages.extend(ocr_service._pdf_to_images_pymupdf(data))
+        else:
+            pages.append(Image.open(io.BytesIO(data)))
+    return pages
+
+
+def bench(backend: ocr_service.OCRBackend, pages: list[Image.Image], lang: str) -> list[float]:
+    backend.image_to_string(pages[0], lang=lang)  # warm-up (loads traineddata once)
+    timings = []
+    for img in pages:
+        t0 = time.perf_counter()
+        backend.image_to_string(img, lang=lang)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--pages", type=int, default=10, help="synthetic pages when no files are given")
+    parser.add_argument("--lang", default=ocr_service.OCR_LANG)
+    args = parser.parse_args()
+
+    pages = load_pages(args.files) if args.files else [synthetic_page() for _ in range(args.pages)]
+    backends: list[ocr_service.OCRBackend] = []
+    if ocr_service.pytesseract is not None:
+        backends.append(ocr_service.PytesseractBackend())
+    if ocr_service.tesserocr is not None:
+        backends.append(ocr_service.TesserocrBackend())
+    if not backends:
+        raise SystemExit("Neither pytesseract nor tesserocr is installed")
+
+    print(f"{len(pages)} pages, lang={args.lang}")
+    print(f"{'backend':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for backend in backends:
+        t = sorted(bench(backend, pages, args.lang))
+        p95 = t[min(len(t) - 1, int(round(0.95 * (len(t) - 1))))]
+        print(f"{backend.name:<12} {statistics.mean(t):>9.1f} {statistics.median(t):>9.1f} {p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
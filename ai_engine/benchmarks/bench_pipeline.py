@@ -0,0 +1,203 @@
+"""
+End-to-end throughput of process_invoice against the local mock LLM (fully offline).
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.bench_pipeline [--invoices 50] [--concurrency 8]
+        [--items 5-40] [--stream] [--latency-ms 300] [--error-rate 0.02] [--throttle-rate 0.05]
+        [--corpus DIR | file ...]
+
+Without files, digital PDF invoices with a random number of line items are generated
+(text layer only, so no Tesseract is needed). Invoices are driven through
+process_invoice_async at the given concurrency with the LLM and OCR caches off, and
+p50/p95/p99 are reported per stage:
+    ocr    text extraction (OCRInfo.total_ms)
+    llm    LLM time including retries and waits (LLMInfo.total_ms)
+    other  tables, rules, category mapping and GST (the rest of the invoice's wall time)
+    total  wall time per invoice
+plus invoices/sec. Compare runs before and after a change to catch regressions.
+With --corpus (see corpus.py) the results are also scored against the ground truth, per
+format: header fields, line-item count and grand total.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+from pathlib import Path
+
+from ai_engine.ai_engine import http_client, rate_limit
+from ai_engine.ai_engine.invoice_processor import process_invoice_async
+
+from ai_engine.ai_engine.types import InvoiceExtractResult
+
+from .corpus import load_manifest
+from .mock_llm_server import MockLLMServer, add_config_args, config_from_args
+
+PRODUCTS = [
+    ("Laptop", "8471", 45000.0),
+    ("LED Monitor 24in", "8528", 9500.0),
+    ("USB Keyboard", "8471", 650.0),
+    ("A4 Copier Paper", "4802", 280.0),
+    ("Office Chair", "9401", 5200.0),
+    ("Printer Toner", "3707", 2100.0),
+    ("Basmati Rice 25kg", "1006", 1850.0),
+    ("Software Subscription", "998314", 12000.0),
+]
+
+
+def synthetic_invoice(seed: int, items: int) -> bytes:
+    """A digital (text-layer) PDF tax invoice with `items` line items."""
+    import pymupdf
+
+    rng = random.Random(seed)
+    lines = [
+        "TAX INVOICE",
+        "ABC Traders Pvt Ltd",
+        "GSTIN: 29AABCU9603R1ZJ",
+        f"Invoice No: BL/{seed:05d}    Date: {rng.randint(1, 28):02d}/0{rng.randint(1, 9)}/2024",
+        "Bill To: XYZ Corp   GSTIN: 27AAPFU0939F1ZV",
+        "Place of Supply: 27-Maharashtra",
+        "Sl Description HSN Qty Rate Amount",
+    ]
+    taxable = 0.0
+    for n in range(1, items + 1):
+        name, hsn, price = rng.choice(PRODUCTS)
+        qty = rng.randint(1, 5)
+        amount = qty * price
+        taxable += amount
+        lines.append(f"{n} {name} {hsn} {qty} {price:,.2f} {amount:,.2f}")
+    lines += [
+        f"Taxable Value {taxable:,.2f}",
+        f"IGST @18% {taxable * 0.18:,.2f}",
+        f"Grand Total {taxable * 1.18:,.2f}",
+    ]
+    doc = pymupdf.open()
+    per_page = 50
+    for start in range(0, len(lines), per_page):
+        page = doc.new_page()
+        page.insert_text((40, 50), "\n".join(lines[start : start + per_page]), fontsize=9)
+    return doc.tobytes()
+
+
+SCORED_FIELDS = ("vendor.gstin", "buyer.gstin", "invoice.number", "invoice.date", "is_inter_state")
+
+
+def _field(result: InvoiceExtractResult, path: str):
+    value = result
+    for key in path.split("."):
+        value = getattr(value, key)
+    return value
+
+
+def score(result: InvoiceExtractResult, truth: InvoiceExtractResult) -> dict[str, bool]:
+    """Per-check correctness of one result against its ground truth."""
+    checks = {path: _field(result, path) == _field(truth, path) for path in SCORED_FIELDS}
+    checks["line_items"] = len(result.line_items) == len(truth.line_items)
+    checks["grand_total"] = abs(result.totals.grand_total - truth.totals.grand_total) <= 1.0
+    return checks
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def run(inputs: list[bytes | str], concurrency: int, stream: bool) -> tuple[list[dict], float, int]:
+    limit = asyncio.Semaphore(concurrency)
+    rows: list[dict] = []
+    failures = 0
+
+    async def one(index: int, item: bytes | str) -> None:
+        nonlocal failures
+        async with limit:
+            t0 = time.perf_counter()
+            try:
+                result = await process_invoice_async(
+                    item,
+                    content_type="application/pdf" if isinstance(item, bytes) else None,
+                    on_partial=(lambda *e: None) if stream else None,
+                )
+            except Exception:
+                failures += 1
+                return
+            total = (time.perf_counter() - t0) * 1000
+            ocr = result.processing.ocr.total_ms
+            llm = result.processing.llm.total_ms
+            rows.append(
+                {"index": index, "result": result, "ocr": ocr, "llm": llm, "other": max(0.0, total - ocr - llm), "total": total}
+            )
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i, item) for i, item in enumerate(inputs)))
+    elapsed = time.perf_counter() - t0
+    await http_client.aclose_http_clients()
+    return rows, elapsed, failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--corpus", help="corpus directory (manifest.jsonl) to run and score")
+    parser.add_argument("--invoices", type=int, default=50, help="synthetic invoices when no files are given")
+    parser.add_argument("--items", default="5-40", help="line items per synthetic invoice, MIN-MAX")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stream", action="store_true", help="stream LLM replies (on_partial)")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    entries: list[dict] = []
+    if args.corpus:
+        entries = load_manifest(args.corpus)
+        inputs: list[bytes | str] = [e["path"] for e in entries]
+    elif args.files:
+        inputs = [str(Path(p)) for p in args.files]
+    else:
+        lo, _, hi = args.items.partition("-")
+        rng = random.Random(args.seed)
+        inputs = [synthetic_invoice(i, rng.randint(int(lo), int(hi or lo))) for i in range(args.invoices)]
+
+    with MockLLMServer(config_from_args(args)) as server:
+        os.environ.update({"LLM_BASE_URL": server.url, "OPENAI_API_KEY": "mock", "LLM_CACHE": "0", "OCR_CACHE": "0"})
+        os.environ.pop("OPENROUTER_API_KEY", None)
+        rate_limit.reset_llm_limiter()
+        rows, elapsed, failures = asyncio.run(run(inputs, args.concurrency, args.stream))
+        stats = server.stats
+
+    print(
+        f"{len(inputs)} invoices, concurrency={args.concurrency}, stream={args.stream}, "
+        f"mock latency={args.latency_ms:g}ms error={args.error_rate:g} 429={args.throttle_rate:g}"
+    )
+    print(f"{'stage':<6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in ("ocr", "llm", "other", "total"):
+        values = [r[stage] for r in rows]
+        print(f"{stage:<6} {percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f} {percentile(values, 99):>9.1f}")
+    print(f"throughput: {len(rows) / elapsed:.2f} invoices/sec ({elapsed:.2f}s wall), failed: {failures}")
+    print(
+        f"mock server: {stats.requests} requests, {stats.errors} errors, {stats.throttled} throttled; "
+        f"client waits: {rate_limit.get_llm_metrics()['rate_limited_waits']}"
+    )
+    if entries:
+        print_scores(rows, entries)
+
+
+def print_scores(rows: list[dict], entries: list[dict]) -> None:
+    """Share of correct results per check (rows) and format (columns); failed invoices are not scored."""
+    by_format: dict[str, list[dict[str, bool]]] = {}
+    for row in rows:
+        entry = entries[row["index"]]
+        by_format.setdefault(entry["format"], []).append(score(row["result"], entry["truth"]))
+    formats = sorted(by_format)
+    print(f"{'accuracy':<15} " + " ".join(f"{f'{fmt} ({len(by_format[fmt])})':>15}" for fmt in formats))
+    for check in [*SCORED_FIELDS, "line_items", "grand_total"]:
+        cells = " ".join(f"{sum(s[check] for s in by_format[fmt]) / len(by_format[fmt]):>15.2f}" for fmt in formats)
+        print(f"{check:<15} {cells}")
+
+if __name__ == "__main__":
+    main()
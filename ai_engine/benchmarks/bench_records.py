@@ -0,0 +1,108 @@
+"""
+Post-LLM cost of long invoices: turning a reply into the contract JSON.
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.bench_records [--items 500,1000,2000] [--repeat 5]
+
+For a synthetic LLM reply with N line items, compares
+    old   parse_extract_to_result (a LineItem per item), a second LineItem with a fresh
+          GSTBreakdown per item during enrichment, then model_dump()
+    new   the pipeline's _finish (slotted LineRecords, GST columns, one validation pass
+          over the items) then to_json_dict()
+and reports the best wall time and the peak memory allocated (tracemalloc) of each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from ai_engine.ai_engine.category_mappings import get_category_and_rate
+from ai_engine.ai_engine.gst_calculator import calculate_gst
+from ai_engine.ai_engine.invoice_processor import _finish, _Prepared
+from ai_engine.ai_engine.llm_extractor import parse_extract_to_result
+from ai_engine.ai_engine.rule_extractor import extract_fields
+from ai_engine.ai_engine.types import LineItem, OCRInfo
+
+from .corpus import CATALOGUE
+
+
+def synthetic_reply(items: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(items):
+        desc, hsn, (lo, hi) = rng.choice(CATALOGUE)
+        qty = float(rng.randint(1, 12))
+        price = float(rng.randint(lo, hi))
+        rows.append({"description": desc, "hsn_sac": hsn, "qty": qty, "unit_price": price,
+                     "taxable_value": qty * price, "gst_rate": 0})
+    return {
+        "vendor": {"name": "Shree Ganesh Traders", "gstin": "29AABCU9603R1ZJ", "address": "MG Road"},
+        "invoice": {"number": "INV/2024/00042", "date": "2024-03-15"},
+        "buyer": {"name": "XYZ Retail Pvt Ltd", "gstin": "27AAPFU0939F1ZV"},
+        "place_of_supply_state": "Maharashtra",
+        "is_inter_state": True,
+        "line_items": rows,
+        "totals": {"taxable_value": sum(r["taxable_value"] for r in rows)},
+        "confidence": {"overall": 0.9, "fields": {}},
+    }
+
+
+def old_path(reply: dict) -> dict:
+    """The shape of the pipeline before records: every item is a pydantic model twice."""
+    result = parse_extract_to_result(reply, "")
+    items = []
+    for item in result.line_items:
+        category, default_rate = get_category_and_rate(item.description, item.hsn_sac)
+        rate = item.gst_rate or default_rate
+        taxable = item.taxable_value or item.unit_price * item.qty
+        gst = calculate_gst(taxable, rate, result.is_inter_state)
+        items.append(
+            LineItem(description=item.description, hsn_sac=item.hsn_sac, category=category, qty=item.qty,
+                     unit_price=item.unit_price, taxable_value=taxable, gst_rate=rate, gst_breakdown=gst,
+                     total=round(taxable + gst.cgst + gst.sgst + gst.igst, 2))
+        )
+    result.line_items = items
+    return result.model_dump()
+
+
+def new_path(reply: dict) -> dict:
+    prepared = _Prepared(
+        raw_text="", ocr_info=OCRInfo(), table=None, source="llm", rules=extract_fields(""), threshold=0.9,
+        llm_text="", llm_kwargs={}, llm_keys=[], fields_source="llm",
+    )
+    return _finish(prepared, reply).to_json_dict()
+
+
+def measure(fn, reply: dict, repeat: int) -> tuple[float, int]:
+    fn(reply)  # warm caches (category memo, compiled matchers)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(reply)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(reply)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", default="500,1000,2000", help="comma-separated line-item counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'old ms':>9} {'new ms':>9} {'speed-up':>9} {'old peak KiB':>13} {'new peak KiB':>13}")
+    for n in (int(x) for x in args.items.split(",")):
+        reply = synthetic_reply(n)
+        old_ms, old_peak = measure(old_path, reply, args.repeat)
+        new_ms, new_peak = measure(new_path, reply, args.repeat)
+        print(f"{n:>6} {old_ms:>9.1f} {new_ms:>9.1f} {old_ms / new_ms:>8.1f}x {old_peak / 1024:>13.0f} {new_peak / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
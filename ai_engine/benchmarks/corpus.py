@@ -0,0 +1,349 @@
+"""
+Synthetic Indian GST invoice corpus with ground truth, for OCR/extraction benchmarks.
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.corpus OUT_DIR [--count 60] [--seed 7]
+        [--formats digital,scanned,photo] [--max-items 80]
+
+Each invoice is rendered in one format:
+    digital   PDF with a text layer (as exported by billing software)
+    scanned   rasterised PDF: grey, slightly rotated and speckled pages, no text layer
+    photo     phone-photo-style JPEG of a single-page invoice (tinted, rotated, on a background)
+and its ground truth is written next to it as InvoiceExtractResult JSON. Invoices vary in
+vendor/buyer state (intra-state CGST+SGST vs inter-state IGST), HSN/SAC codes and rates,
+line-item count and page count (the item table continues on further pages with a repeated
+header). OUT_DIR/manifest.jsonl lists id, format, file, truth, pages, items and supply type;
+bench_pipeline --corpus OUT_DIR runs the pipeline on it and scores the results.
+The same seed always produces the same corpus.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from ai_engine.ai_engine.category_mappings import get_category_and_rate
+from ai_engine.ai_engine.gst_calculator import calculate_gst
+from ai_engine.ai_engine.gst_rates import STATE_CODES
+from ai_engine.ai_engine.rule_extractor import gstin_checksum_ok
+from ai_engine.ai_engine.types import (
+    BuyerInfo,
+    Confidence,
+    InvoiceExtractResult,
+    InvoiceInfo,
+    LineItem,
+    Totals,
+    VendorInfo,
+)
+
+FORMATS = ("digital", "scanned", "photo")
+GSTIN_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# description, HSN/SAC, unit price range (rupees); rates follow category_mappings
+CATALOGUE = [
+    ("Basmati Rice 25kg bag", "1006", (1200, 2400)),
+    ("Toned Milk 1L (crate of 12)", "0401", (600, 800)),
+    ("Wheat Flour 10kg", "1101", (380, 520)),
+    ("Laptop 14in i5 16GB", "8471", (42000, 68000)),
+    ("Desktop Computer i3", "8471", (28000, 39000)),
+    ("Software subscription annual", "998314", (9000, 24000)),
+    ("IT service - AMC", "998314", (5000, 15000)),
+    ("Freight charges", "9965", (800, 6000)),
+    ("Legal consultancy fees", "9982", (10000, 50000)),
+    ("A4 copier paper (ream)", "4802", (240, 320)),
+    ("Ball pen box of 10", "9608", (50, 120)),
+    ("Office stationery kit", "4820", (150, 600)),
+    ("Paracetamol 500mg strip", "3004", (15, 40)),
+    ("Cotton shirting fabric (m)", "5208", (180, 450)),
+    ("Office rent - monthly", "997212", (25000, 90000)),
+    ("Digital marketing campaign", "998361", (15000, 60000)),
+    ("LED monitor 24in", "8528", (8500, 13000)),
+    ("Electrical wiring equipment", "8544", (900, 4500)),
+]
+VENDOR_NAMES = ["Shree Ganesh Traders", "Sai Enterprises", "Bharat Office Solutions", "Kaveri Agro Foods",
+                "Deccan IT Services LLP", "Lakshmi Textiles", "Metro Pharma Distributors", "Om Logistics"]
+BUYER_NAMES = ["XYZ Retail Pvt Ltd", "Acme Manufacturing Co", "Sunrise Hospitals", "Greenleaf Cafe",
+               "Nexus Technologies Pvt Ltd", "Patel & Sons"]
+CITIES = {"27": "Mumbai", "29": "Bengaluru", "33": "Chennai", "07": "New Delhi", "09": "Lucknow",
+          "36": "Hyderabad", "32": "Kochi", "10": "Patna", "37": "Vijayawada", "02": "Shimla", "01": "Srinagar"}
+TERMS = [
+    "Terms & Conditions:",
+    "1. Goods once sold will not be taken back.",
+    "2. Interest @18% p.a. will be charged on overdue bills.",
+    "3. Subject to local jurisdiction.",
+    "This is a computer generated invoice.",
+]
+ITEMS_PER_PAGE = 26  # rows of the item table on one A4 page at 9pt
+
+
+@dataclass
+class CorpusInvoice:
+    id: str
+    format: str
+    truth: InvoiceExtractResult
+    pages: list[list[str]]  # rendered text lines per page
+
+
+def random_gstin(rng: random.Random, state: str) -> str:
+    """A GSTIN with a valid check digit for `state`."""
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    pan = "".join(rng.choice(letters) for _ in range(3)) + rng.choice("CPFHT") + rng.choice(letters)
+    pan += f"{rng.randint(0, 9999):04d}" + rng.choice(letters)
+    body = f"{state}{pan}{rng.choice('123456789')}Z"
+    return next(body + ch for ch in GSTIN_CHARS if gstin_checksum_ok(body + ch))
+
+
+def format_inr(amount: float) -> str:
+    """Indian digit grouping: 1234567.5 -> '12,34,567.50'."""
+    whole, frac = f"{amount:.2f}".split(".")
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail]) + "." + frac
+
+
+def _date_text(rng: random.Random, d: date) -> str:
+    return rng.choice([d.strftime("%d/%m/%Y"), d.strftime("%d-%b-%Y"), d.strftime("%d.%m.%Y")])
+
+
+def make_invoice(rng: random.Random, n: int, fmt: str, max_items: int) -> CorpusInvoice:
+    """Ground truth plus page text for one invoice."""
+    states = sorted(CITIES)
+    vendor_state = rng.choice(states)
+    buyer_state = vendor_state if rng.random() < 0.5 else rng.choice([s for s in states if s != vendor_state])
+    inter = vendor_state != buyer_state
+    vendor = VendorInfo(
+        name=rng.choice(VENDOR_NAMES),
+        gstin=random_gstin(rng, vendor_state),
+        address=f"{rng.randint(1, 300)}, Main Road, {CITIES[vendor_state]}",
+    )
+    buyer = BuyerInfo(name=rng.choice(BUYER_NAMES), gstin=random_gstin(rng, buyer_state))
+    inv_date = date(2024, 1, 1) + timedelta(days=rng.randint(0, 364))
+    invoice = InvoiceInfo(number=f"{rng.choice(['INV', 'TI', 'GST'])}/{inv_date.year}/{n:05d}", date=inv_date.isoformat())
+
+    # Photos are single pages; scanned/digital invoices may run over several
+    cap = ITEMS_PER_PAGE - 8 if fmt == "photo" else max_items
+    count = max(1, min(cap, int(rng.paretovariate(1.2) * 3)))
+    items: list[LineItem] = []
+    for _ in range(count):
+        desc, hsn, (lo, hi) = rng.choice(CATALOGUE)
+        category, rate = get_category_and_rate(desc, hsn)
+        qty = float(rng.choice([1, 1, 1, 2, 3, 5, 10, 12, 25]))
+        price = float(round(rng.uniform(lo, hi)))
+        taxable = round(qty * price, 2)
+        gst = calculate_gst(taxable, rate, inter)
+        items.append(
+            LineItem(
+                description=desc, hsn_sac=hsn, category=category, qty=qty, unit_price=price,
+                taxable_value=taxable, gst_rate=rate, gst_breakdown=gst,
+                total=round(taxable + gst.cgst + gst.sgst + gst.igst, 2),
+            )
+        )
+    taxable_total = round(sum(i.taxable_value for i in items), 2)
+    gst_total = round(sum(i.gst_breakdown.cgst + i.gst_breakdown.sgst + i.gst_breakdown.igst for i in items), 2)
+    truth = InvoiceExtractResult(
+        vendor=vendor,
+        invoice=invoice,
+        buyer=buyer,
+        place_of_supply_state=STATE_CODES[buyer_state],
+        is_inter_state=inter,
+        line_items=items,
+        totals=Totals(taxable_value=taxable_total, gst_total=gst_total, grand_total=round(taxable_total + gst_total, 2)),
+        confidence=Confidence(overall=1.0),
+    )
+    return CorpusInvoice(id=f"inv{n:04d}", format=fmt, truth=truth, pages=_layout(rng, truth, inv_date))
+
+
+def _layout(rng: random.Random, truth: InvoiceExtractResult, inv_date: date) -> list[list[str]]:
+    header = [
+        "TAX INVOICE",
+        truth.vendor.name,
+        truth.vendor.address,
+        f"GSTIN: {truth.vendor.gstin}",
+        f"Invoice No: {truth.invoice.number}      Date: {_date_text(rng, inv_date)}",
+        f"Bill To: {truth.buyer.name}",
+        f"GSTIN: {truth.buyer.gstin}",
+        f"Place of Supply: {truth.buyer.gstin[:2]}-{truth.place_of_supply_state}",
+        "",
+    ]
+    table_head = "Sl  Description                      HSN/SAC   Qty   Rate        GST%  Amount"
+    rows = [
+        f"{n:<3} {it.description:<32} {it.hsn_sac:<9} {it.qty:<5g} {format_inr(it.unit_price):<11} "
+        f"{it.gst_rate:<5g} {format_inr(it.taxable_value)}"
+        for n, it in enumerate(truth.line_items, 1)
+    ]
+    t = truth.totals
+    by_rate: dict[float, float] = {}
+    for it in truth.line_items:
+        by_rate[it.gst_rate] = by_rate.get(it.gst_rate, 0.0) + it.gst_breakdown.cgst + it.gst_breakdown.igst
+    tax_lines = []
+    for rate, amount in sorted(by_rate.items()):
+        if truth.is_inter_state:
+            tax_lines.append(f"IGST @{rate:g}%: {format_inr(amount)}")
+        else:
+            tax_lines += [f"CGST @{rate / 2:g}%: {format_inr(amount)}", f"SGST @{rate / 2:g}%: {format_inr(amount)}"]
+    footer = [
+        "",
+        f"Taxable Value: {format_inr(t.taxable_value)}",
+        *tax_lines,
+        f"Grand Total: {format_inr(t.grand_total)}",
+        "",
+        *TERMS,
+        f"For {truth.vendor.name}",
+        "Authorised Signatory",
+    ]
+    pages: list[list[str]] = []
+    first_rows = ITEMS_PER_PAGE - len(footer) // 2
+    chunks = [rows[:first_rows]] + [rows[i : i + ITEMS_PER_PAGE] for i in range(first_rows, len(rows), ITEMS_PER_PAGE)]
+    for n, chunk in enumerate(chunks):
+        page = (header if n == 0 else [truth.vendor.name, ""]) + [table_head, *chunk]
+        pages.append(page)
+    if len(pages[-1]) + len(footer) > ITEMS_PER_PAGE + len(header) + 2:
+        pages.append([truth.vendor.name, ""])
+    pages[-1] += footer
+    for n, page in enumerate(pages, 1):
+        page.append(f"Page {n} of {len(pages)}")
+    return pages
+
+
+def render_pdf(pages: list[list[str]]) -> bytes:
+    import pymupdf
+
+    doc = pymupdf.open()
+    for lines in pages:
+        page = doc.new_page(width=595, height=842)
+        y = 50.0
+        for line in lines:
+            if line:
+                size = 13 if line == "TAX INVOICE" else 9
+                page.insert_text((40, y), line, fontsize=size, fontname="cour")
+            y += 14
+    return doc.tobytes()
+
+
+def _page_images(pdf: bytes, dpi: int) -> list[Image.Image]:
+    import pymupdf
+
+    images = []
+    with pymupdf.open(stream=pdf, filetype="pdf") as doc:
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi)
+            images.append(Image.frombytes("RGB", (pix.width, pix.height), pix.samples))
+    return images
+
+
+def _scan(img: Image.Image, rng: random.Random) -> Image.Image:
+    """Flatbed-scan look: grey, a slight skew, speckles and a little blur."""
+    grey = img.convert("L").rotate(rng.uniform(-1.5, 1.5), expand=False, fillcolor=250)
+    draw = ImageDraw.Draw(grey)
+    for _ in range(grey.width * grey.height // 4000):
+        x, y = rng.randrange(grey.width), rng.randrange(grey.height)
+        draw.point((x, y), fill=rng.randint(80, 180))
+    return grey.filter(ImageFilter.GaussianBlur(0.6))
+
+
+def render_scanned(pdf: bytes, rng: random.Random) -> bytes:
+    import pymupdf
+
+    doc = pymupdf.open()
+    for img in _page_images(pdf, dpi=150):
+        buf = io.BytesIO()
+        _scan(img, rng).save(buf, format="PNG")
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=buf.getvalue())
+    return doc.tobytes()
+
+
+def render_photo(pdf: bytes, rng: random.Random) -> bytes:
+    """Phone photo of the first page: warm tint, rotation, uneven light, on a table."""
+    page = _page_images(pdf, dpi=200)[0]
+    page = page.rotate(rng.uniform(-4, 4), expand=True, fillcolor=(120, 100, 80))
+    tint = Image.new("RGB", page.size, (255, 240, 215))
+    page = Image.blend(page, tint, 0.15)
+    shade = Image.linear_gradient("L").resize(page.size).point(lambda v: 255 - v // 5)
+    page = Image.composite(page, Image.new("RGB", page.size, (60, 50, 40)), shade)
+    photo = Image.new("RGB", (int(page.width * 1.2), int(page.height * 1.15)), (110, 90, 70))
+    photo.paste(page, ((photo.width - page.width) // 2, (photo.height - page.height) // 2))
+    buf = io.BytesIO()
+    photo.filter(ImageFilter.GaussianBlur(0.8)).save(buf, format="JPEG", quality=82)
+    return buf.getvalue()
+
+
+def generate_corpus(out_dir: str | Path, count: int = 60, seed: int = 7, formats=FORMATS, max_items: int = 80) -> Path:
+    """Write `count` invoices, their ground truth and manifest.jsonl to out_dir; returns the manifest path."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = out / "manifest.jsonl"
+    with manifest.open("w", encoding="utf-8") as f:
+        for n in range(count):
+            fmt = formats[n % len(formats)]
+            inv = make_invoice(rng, n, fmt, max_items)
+            pdf = render_pdf(inv.pages)
+            if fmt == "digital":
+                data, suffix = pdf, ".pdf"
+            elif fmt == "scanned":
+                data, suffix = render_scanned(pdf, rng), ".pdf"
+            else:
+                data, suffix = render_photo(pdf, rng), ".jpg"
+            name = f"{inv.id}_{fmt}{suffix}"
+            (out / name).write_bytes(data)
+            truth_name = f"{inv.id}.truth.json"
+            (out / truth_name).write_text(inv.truth.model_dump_json(indent=2), encoding="utf-8")
+            entry = {
+                "id": inv.id,
+                "format": fmt,
+                "file": name,
+                "truth": truth_name,
+                "pages": len(inv.pages),
+                "items": len(inv.truth.line_items),
+                "inter_state": inv.truth.is_inter_state,
+            }
+            f.write(json.dumps(entry) + "\n")
+    return manifest
+
+
+def load_manifest(corpus_dir: str | Path) -> list[dict]:
+    """Manifest entries with absolute `path` and parsed `truth` (InvoiceExtractResult)."""
+    root = Path(corpus_dir)
+    entries = []
+    for line in (root / "manifest.jsonl").read_text(encoding="utf-8").splitlines():
+        entry = json.loads(line)
+        entry["path"] = str(root / entry["file"])
+        entry["truth"] = InvoiceExtractResult.model_validate_json((root / entry["truth"]).read_text(encoding="utf-8"))
+        entries.append(entry)
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--max-items", type=int, default=80)
+    args = parser.parse_args()
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+    manifest = generate_corpus(args.out_dir, args.count, args.seed, formats, args.max_items)
+    entries = [json.loads(line) for line in manifest.read_text(encoding="utf-8").splitlines()]
+    pages = sum(e["pages"] for e in entries)
+    items = sum(e["items"] for e in entries)
+    print(f"{len(entries)} invoices ({pages} pages, {items} line items) -> {manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Local OpenAI-compatible stand-in for load tests: no network, no credits.
+
+Usage (from repo root):
+    python -m ai_engine.benchmarks.mock_llm_server [--port 8999] [--latency-ms 300]
+        [--jitter-ms 50] [--ms-per-token 2] [--error-rate 0.02] [--throttle-rate 0.05]
+        [--retry-after 1] [--canned reply.json]
+
+Then point ai_engine at it:
+    LLM_BASE_URL=http://127.0.0.1:8999/v1 OPENAI_API_KEY=mock ...
+
+POST /v1/chat/completions answers like the real API, streamed (SSE) when the request
+asks for it. Replies are generated from the invoice text with the rule-based extractor
+(header fields and totals) plus a simple item-row parser, or are a canned JSON object.
+Only the keys the prompt's schema asks for are returned; batch prompts ("### INVOICE n")
+get a JSON array. Latency, 5xx errors and 429s (with Retry-After) are configurable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from ai_engine.ai_engine.llm_extractor import SCHEMA_KEYS
+from ai_engine.ai_engine.prompt_compaction import CHARS_PER_TOKEN, is_item_row
+from ai_engine.ai_engine.rule_extractor import extract_fields
+
+_INVOICE_MARK = re.compile(r"^### INVOICE (\S+)\s*$", re.MULTILINE)
+_HSN = re.compile(r"^\d{4,8}$")
+_NUMBER = re.compile(r"^[\d,]+(\.\d+)?$")
+STREAM_CHUNK_CHARS = 24
+
+
+@dataclass
+class MockLLMConfig:
+    latency_ms: float = 200.0  # time to first byte
+    jitter_ms: float = 50.0  # uniform +/- around latency_ms
+    ms_per_token: float = 0.0  # generation time per reply token (spread over the stream)
+    error_rate: float = 0.0  # share of requests answered 500
+    throttle_rate: float = 0.0  # share of requests answered 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    canned: dict[str, Any] | None = None
+    seed: int | None = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    streamed: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+def _num(token: str) -> float:
+    return float(token.replace(",", ""))
+
+
+def parse_item_row(line: str) -> dict[str, Any]:
+    """
+    Description, HSN, qty, rate, GST% and amount from an item row: 'Sl Description HSN Qty
+    Rate [GST%] Amount'. The HSN is the first 4-8 digit number of the trailing numbers, so
+    descriptions ending in a number ('Ball pen box of 10') stay intact.
+    """
+    tokens = line.split()
+    if tokens and tokens[0].isdigit():
+        tokens = tokens[1:]  # serial number
+    numbers: list[str] = []
+    while tokens and _NUMBER.match(tokens[-1]):
+        numbers.insert(0, tokens.pop())
+    hsn = ""
+    at = next((i for i, t in enumerate(numbers) if _HSN.match(t)), None)
+    if at is not None:
+        hsn = numbers[at]
+        tokens += numbers[:at]
+        numbers = numbers[at + 1 :]
+    values = [_num(t) for t in numbers]
+    amount = values[-1] if values else 0.0
+    qty = values[0] if len(values) >= 3 else 1.0
+    rate = values[1] if len(values) >= 3 else (values[0] if len(values) == 2 else amount)
+    gst_rate = values[2] if len(values) >= 4 else 0
+    return {
+        "description": " ".join(tokens),
+        "hsn_sac": hsn,
+        "qty": qty,
+        "unit_price": rate,
+        "taxable_value": amount,
+        "gst_rate": gst_rate,
+    }
+
+
+def generate_reply(text: str, keys: list[str]) -> dict[str, Any]:
+    """Rule-generated extraction reply for one invoice text, limited to `keys`."""
+    raw = dict(extract_fields(text).raw)
+    if "line_items" in keys:
+        # Labelled lines ("Invoice No: ... Date: 16.10.2024") are header fields, not items
+        rows = [line.strip() for line in text.splitlines()]
+        raw["line_items"] = [parse_item_row(line) for line in rows if is_item_row(line) and ":" not in line]
+    raw["confidence"] = {"overall": 0.9, "fields": {}}
+    return {k: v for k, v in raw.items() if k in keys}
+
+
+def requested_keys(schema: str) -> list[str]:
+    return [key for key in SCHEMA_KEYS if f"- {key}:" in schema]
+
+
+def build_reply(prompt: str, canned: dict[str, Any] | None) -> Any:
+    schema, _, text = prompt.partition("\n\n---\n\n")
+    keys = requested_keys(schema)
+    marks = list(_INVOICE_MARK.finditer(text))
+    if not marks:
+        return dict(canned) if canned is not None else generate_reply(text, keys)
+    replies = []
+    for n, mark in enumerate(marks):
+        end = marks[n + 1].start() if n + 1 < len(marks) else len(text)
+        body = text[mark.end() : end]
+        reply = dict(canned) if canned is not None else generate_reply(body, keys)
+        replies.append({"id": mark.group(1), **reply})
+    return replies
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - quiet by default
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: dict[str, str] | None = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        cfg, stats, rng = self.server.config, self.server.stats, self.server.rng
+        with stats.lock:
+            stats.requests += 1
+            roll = rng.random()
+            delay = max(0.0, cfg.latency_ms + rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        time.sleep(delay)
+        if roll < cfg.throttle_rate:
+            with stats.lock:
+                stats.throttled += 1
+            self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": f"{cfg.retry_after:g}"})
+            return
+        if roll < cfg.throttle_rate + cfg.error_rate:
+            with stats.lock:
+                stats.errors += 1
+            self._send_json(500, {"error": {"message": "mock server error"}})
+            return
+
+        prompt = (payload.get("messages") or [{}])[-1].get("content", "")
+        content = json.dumps(build_reply(prompt, cfg.canned))
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages") or []) // CHARS_PER_TOKEN
+        reply_tokens = len(content) // CHARS_PER_TOKEN
+        generation = reply_tokens * cfg.ms_per_token / 1000
+        if not payload.get("stream"):
+            time.sleep(generation)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": reply_tokens}
+            usage["total_tokens"] = prompt_tokens + reply_tokens
+            self._send_json(
+                200,
+                {
+                    "id": "mock",
+                    "object": "chat.completion",
+                    "model": payload.get("model", ""),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": usage,
+                },
+            )
+            return
+
+        with stats.lock:
+            stats.streamed += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pieces = [content[i : i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for piece in pieces:
+            time.sleep(generation / max(1, len(pieces)))
+            event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: MockLLMConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self.stats = MockStats()
+        self.rng = random.Random(config.seed)
+
+
+class MockLLMServer:
+    """The mock server on a background thread; use as a context manager in tests and benchmarks."""
+
+    def __init__(self, config: MockLLMConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = _Server((host, port), config or MockLLMConfig())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL for LLM_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> MockStats:
+        return self._server.stats
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_config_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="mock LLM time to first byte")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="mock generation time per reply token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500 replies")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 replies")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument("--canned", help="JSON file returned for every invoice instead of rule-generated replies")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> MockLLMConfig:
+    canned = None
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = json.load(f)
+    return MockLLMConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        ms_per_token=args.ms_per_token,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        canned=canned,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8999)
+    add_config_args(parser)
+    args = parser.parse_args()
+    server = MockLLMServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"mock LLM listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
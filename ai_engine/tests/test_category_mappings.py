@@ -22,3 +22,46 @@ def test_default():
     cat, rate = get_category_and_rate("Miscellaneous item xyz", "")
     assert cat == DEFAULT_CATEGORY
     assert rate == DEFAULT_GST_RATE
+
+
+def test_keywords_match_whole_words():
+    """'pen' does not fire on 'expenses'; plurals still match."""
+    assert get_category_and_rate("Travel expenses reimbursed", "")[0] == DEFAULT_CATEGORY
+    assert get_category_and_rate("Gel pens", "")[0] == "Office Supplies"
+    assert get_category_and_rate("Cough medicines", "")[0] == "Pharma"
+
+
+def test_hsn_longest_prefix(monkeypatch):
+    """Table HSN codes match as prefixes of the HSN field only, the longest one winning."""
+    monkeypatch.setenv("HSN_MASTER", "0")
+    assert get_category_and_rate("Item", "998314")[0] == "IT & Software"
+    assert get_category_and_rate("Item", "998319")[0] == "Transport"  # 9983, first rule listing it
+    assert get_category_and_rate("Item", "8471 30 10")[0] == "Equipment & Machinery"
+    assert get_category_and_rate("Item", "2106")[0] == DEFAULT_CATEGORY  # no stray "61" match
+    assert get_category_and_rate("Part no 6100", "")[0] == DEFAULT_CATEGORY
+
+
+def test_categorize_many_matches_single_lookups():
+    from ai_engine.ai_engine.category_mappings import categorize_many
+
+    items = [
+        ("Rice and wheat", ""),
+        ("Office rent - monthly", "997212"),
+        ("Hotel stay", ""),
+        ("Travel expenses", ""),
+        ("Laptop", "8471"),
+        ("", ""),
+        ("Legal fees\nand stationery", ""),
+    ]
+    assert categorize_many(items) == [get_category_and_rate(d, h) for d, h in items]
+    assert categorize_many([]) == []
+
+
+def test_hsn_master_decides_before_keywords():
+    """A code in the rate master sets category and rate, whatever the description says."""
+    assert get_category_and_rate("Software license", "998314") == ("IT & Software", 18.0)
+    assert get_category_and_rate("Digital marketing campaign", "998361") == ("Marketing", 18.0)
+    assert get_category_and_rate("Gold chain 22K", "7113 19 10") == ("Jewellery", 3.0)
+    assert get_category_and_rate("Cement 50kg bag", "2523") == ("Construction Materials", 28.0)
+    # Unknown code: back to the keyword table
+    assert get_category_and_rate("Rice and wheat", "1")[0] == "Food & Grocery"
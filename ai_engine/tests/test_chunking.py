@@ -0,0 +1,67 @@
+"""Unit tests for chunked extraction of long invoices."""
+import re
+from unittest.mock import patch
+
+from ai_engine.ai_engine import llm_extractor
+from ai_engine.ai_engine.chunking import merge_line_items, plan_chunks
+from ai_engine.ai_engine.types import LLMInfo
+
+ROW = re.compile(r"^(\d+) (Part \S+) 8471 (\d+) ([\d.]+) ([\d,.]+)$", re.MULTILINE)
+
+
+def _long_invoice(items=300, per_page=40):
+    lines = ["ABC Components Pvt Ltd", "GSTIN: 29AABCU9603R1ZJ", "Invoice No: AC/7 Date: 01/02/2024"]
+    for i in range(1, items + 1):
+        if i % per_page == 1:
+            lines += ["", "ABC Components Pvt Ltd", "Sl Description HSN Qty Rate Amount"]
+        lines.append(f"{i} Part P-{i:04d} 8471 2 50.00 100.00")
+    lines += ["Taxable Value 30,000.00", "IGST 18% 5,400.00", "Grand Total 35,400.00"]
+    return "\n".join(lines)
+
+
+def test_short_invoice_is_not_chunked():
+    assert plan_chunks("Invoice No: 1\n1 Tea 2 10.00 20.00\nTotal 20.00") is None
+
+
+def test_plan_chunks_splits_items_within_budget():
+    """Every item lands in exactly one chunk; header and totals are kept for the header call."""
+    plan = plan_chunks(_long_invoice(), token_budget=500)
+    assert len(plan.chunks) > 1
+    assert all(len(chunk) <= 500 * 4 for chunk in plan.chunks)
+    assert all(chunk.startswith("Sl Description HSN Qty Rate Amount") for chunk in plan.chunks)
+    rows = [m.group(1) for chunk in plan.chunks for m in ROW.finditer(chunk)]
+    assert rows == [str(i) for i in range(1, 301)]
+    assert "GSTIN: 29AABCU9603R1ZJ" in plan.header and "Grand Total 35,400.00" in plan.header
+    assert "Part P-0001" not in plan.header
+
+
+def test_merge_line_items_keeps_identical_rows_at_seams():
+    """Chunks never overlap: identical items on either side of a seam are separate rows."""
+    a = {"description": "Bolt", "qty": 1, "taxable_value": 10}
+    b = {"description": "Nut", "qty": 1, "taxable_value": 5}
+    assert merge_line_items([[a, a], [a, b], None, [b]]) == [a, a, a, b, b]
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_extract_from_text_reads_long_invoice_in_chunks(mock_complete, _cache, monkeypatch):
+    """Header fields are asked once, line items per chunk; items come back in document order."""
+    monkeypatch.setenv("LLM_INPUT_TOKEN_BUDGET", "500")
+
+    def fake_complete(model, schema, text):
+        if "line_items" not in schema:
+            return {"invoice": {"number": "AC/7"}, "totals": {"taxable_value": 30000}}
+        return {
+            "line_items": [
+                {"description": m.group(2), "qty": int(m.group(3)), "taxable_value": float(m.group(5))}
+                for m in ROW.finditer(text)
+            ]
+        }
+
+    mock_complete.side_effect = fake_complete
+    info = LLMInfo()
+    raw = llm_extractor.extract_from_text(_long_invoice(), info=info)
+    assert raw["invoice"]["number"] == "AC/7"
+    assert [it["description"] for it in raw["line_items"]] == [f"Part P-{i:04d}" for i in range(1, 301)]
+    assert info.chunks > 1 and info.requests == info.chunks + 1
+    assert mock_complete.call_count == info.chunks + 1
@@ -0,0 +1,40 @@
+"""Unit tests for the synthetic benchmark corpus generator."""
+import pymupdf
+
+from ai_engine.ai_engine.rule_extractor import is_valid_gstin
+from ai_engine.benchmarks.corpus import format_inr, generate_corpus, load_manifest
+
+
+def test_format_inr_uses_indian_grouping():
+    assert format_inr(1234567.5) == "12,34,567.50"
+    assert format_inr(999) == "999.00"
+
+
+def test_corpus_files_match_ground_truth(tmp_path):
+    generate_corpus(tmp_path, count=3, seed=1)
+    entries = load_manifest(tmp_path)
+    assert [e["format"] for e in entries] == ["digital", "scanned", "photo"]
+    for e in entries:
+        truth = e["truth"]
+        assert is_valid_gstin(truth.vendor.gstin) and is_valid_gstin(truth.buyer.gstin)
+        assert truth.is_inter_state == (truth.vendor.gstin[:2] != truth.buyer.gstin[:2])
+        assert abs(sum(i.taxable_value for i in truth.line_items) - truth.totals.taxable_value) < 0.01
+        assert truth.totals.grand_total == round(truth.totals.taxable_value + truth.totals.gst_total, 2)
+
+    digital, scanned, photo = entries
+    with pymupdf.open(digital["path"]) as doc:
+        text = "".join(page.get_text() for page in doc)
+        assert len(doc) == digital["pages"]
+    assert digital["truth"].invoice.number in text
+    assert format_inr(digital["truth"].totals.grand_total) in text
+    with pymupdf.open(scanned["path"]) as doc:
+        assert not "".join(page.get_text() for page in doc).strip()  # image only
+    with open(photo["path"], "rb") as f:
+        assert f.read(3) == b"\xff\xd8\xff"
+
+
+def test_corpus_is_reproducible(tmp_path):
+    generate_corpus(tmp_path / "a", count=2, seed=5, formats=("digital",))
+    generate_corpus(tmp_path / "b", count=2, seed=5, formats=("digital",))
+    a, b = load_manifest(tmp_path / "a"), load_manifest(tmp_path / "b")
+    assert [e["truth"] for e in a] == [e["truth"] for e in b]
@@ -0,0 +1,51 @@
+"""Unit tests for the column-wise GST engine."""
+import random
+
+import pytest
+
+from ai_engine.ai_engine import gst_engine
+from ai_engine.ai_engine.gst_calculator import calculate_gst
+from ai_engine.ai_engine.gst_engine import calculate_gst_columns, normalize_gst_rate, to_paise
+
+
+def test_rounding_is_half_up_in_paise():
+    """Amounts round half away from zero; CGST and SGST are each half the rate."""
+    assert to_paise(1.005) == 101
+    assert to_paise(-2.5) == -250
+    cols = calculate_gst_columns([0.5, 100.05, 10.0], [5.0, 18.0, 18.0], [False, False, True])
+    assert cols.cgst == [1, 900, 0]  # 0.5 x 2.5% = 1.25 paise -> 1; 100.05 x 9% = 900.45 -> 900
+    assert cols.igst == [0, 0, 180]
+    assert cols.totals() == {
+        "taxable_value": 110.55,
+        "cgst": 9.01,
+        "sgst": 9.01,
+        "igst": 1.8,
+        "gst_total": 19.82,
+        "grand_total": 130.37,
+    }
+
+
+def test_rate_normalisation():
+    assert normalize_gst_rate(3) == 3.0  # gold and jewellery
+    assert normalize_gst_rate(0.25) == 0.25
+    assert normalize_gst_rate(17.9) == 18.0
+    assert normalize_gst_rate(40) == 18.0
+    assert normalize_gst_rate(None) == 0.0
+
+
+@pytest.mark.skipif(gst_engine.np is None, reason="numpy not installed")
+def test_numpy_path_matches_plain_path():
+    rng = random.Random(3)
+    n = 2000
+    taxable = [round(rng.uniform(-500, 50000), rng.choice([0, 1, 2, 3])) for _ in range(n)]
+    rates = [rng.choice([0, 0.25, 3, 5, 12, 18, 28, 17.6, 40]) for _ in range(n)]
+    inter = [rng.random() < 0.5 for _ in range(n)]
+    qty = [rng.choice([1, 2, 0.5, None]) for _ in range(n)]
+    fast = calculate_gst_columns(taxable, rates, inter, qty)
+    small = [calculate_gst_columns([t], [r], i, [q]) for t, r, i, q in zip(taxable, rates, inter, qty)]
+    for column in ("taxable", "cgst", "sgst", "igst", "total"):
+        assert fast.rupees(column) == [s.rupees(column)[0] for s in small]
+    single = [calculate_gst(t, r, i) for t, r, i in zip(taxable[:50], rates, inter)]
+    whole = calculate_gst_columns(taxable[:50], rates[:50], inter[:50])
+    assert [b.cgst for b in single] == whole.rupees("cgst")
+    assert [b.igst for b in single] == whole.rupees("igst")
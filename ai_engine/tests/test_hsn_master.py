@@ -0,0 +1,62 @@
+"""Unit tests for the HSN/SAC rate master."""
+import sqlite3
+
+from ai_engine.ai_engine.hsn_master import (
+    DEFAULT_DB_PATH,
+    HSNMaster,
+    build_master,
+    get_hsn_master,
+    read_csv,
+)
+
+
+def test_shipped_master_matches_csv():
+    """data/hsn_master.sqlite is rebuilt from data/hsn_rates.csv (python -m ai_engine.ai_engine.hsn_master)."""
+    conn = sqlite3.connect(DEFAULT_DB_PATH)
+    rows = sorted(conn.execute("SELECT code, rate, category, description FROM hsn"))
+    conn.close()
+    assert rows == sorted((e.code, e.rate, e.category, e.description) for e in read_csv())
+
+
+def test_longest_prefix_lookup():
+    master = get_hsn_master()
+    assert master.lookup("998314").code == "998314"
+    assert master.lookup("99836110").code == "99836"
+    assert master.lookup("9983 99").code == "9983"
+    assert master.lookup("8471.30.10").rate == 18.0
+    assert master.lookup("7") is None
+    assert master.lookup("") is None
+
+
+def test_lookup_many_matches_lookup(tmp_path):
+    csv_path = tmp_path / "rates.csv"
+    csv_path.write_text(
+        "code,rate,category,description\n84,18,Equipment,Machinery\n8415,28,Equipment,AC\n30,12,Pharma,Drugs\n",
+        encoding="utf-8",
+    )
+    assert build_master(csv_path, tmp_path / "m.sqlite") == 3
+    master = HSNMaster(tmp_path / "m.sqlite")
+    codes = ["84151010", "8471", "3004", "9983", "84151010", ""]
+    batch = master.lookup_many(codes)
+    assert [e.code if e else None for e in batch] == ["8415", "84", "30", None, "8415", None]
+    master._memo.clear()
+    assert [master.lookup(c) for c in codes] == batch
+    master.close()
+
+
+def test_lookup_many_survives_memo_eviction(monkeypatch):
+    import ai_engine.ai_engine.hsn_master as hsn_master
+
+    monkeypatch.setattr(hsn_master, "MEMO_ENTRIES", 10)
+    master = HSNMaster(DEFAULT_DB_PATH)
+    master.lookup("8471")
+    master.lookup_many([f"99{n:04d}" for n in range(8)])
+    batch = master.lookup_many(["8471"] + [f"30{n:04d}" for n in range(5)])
+    assert batch[0].code == "8471"
+    assert len(master._memo) <= 10
+    master.close()
+
+
+def test_disabled_master(monkeypatch):
+    monkeypatch.setenv("HSN_MASTER", "0")
+    assert get_hsn_master() is None
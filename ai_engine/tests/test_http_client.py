@@ -0,0 +1,106 @@
+"""Unit tests for the shared pooled LLM HTTP clients."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+from ai_engine.ai_engine import http_client, llm_extractor
+
+
+def test_sync_client_is_shared_and_recreated_after_close(monkeypatch):
+    """Calls reuse one client; closing it (shutdown hook) makes the next call build a fresh one."""
+    monkeypatch.setenv("LLM_MAX_CONNECTIONS", "7")
+    http_client.close_http_clients()
+    client = http_client.get_http_client()
+    assert http_client.get_http_client() is client
+    assert client._transport._pool._max_connections == 7
+    http_client.close_http_clients()
+    assert client.is_closed
+    assert http_client.get_http_client() is not client
+    http_client.close_http_clients()
+
+
+def test_async_client_is_per_event_loop():
+    """Each event loop gets its own async client; within a loop it is reused."""
+
+    async def grab():
+        first = http_client.get_async_http_client()
+        assert http_client.get_async_http_client() is first
+        await http_client.aclose_http_clients()
+        return first
+
+    a = asyncio.run(grab())
+    b = asyncio.run(grab())
+    assert a is not b and a.is_closed and b.is_closed
+
+
+def test_complete_posts_through_pooled_client(monkeypatch):
+    """_complete sends the chat request on the shared client and parses a fenced JSON reply."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        content = '```json\n{"invoice": {"number": "INV-9"}}\n```'
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    with patch("ai_engine.ai_engine.llm_extractor.get_http_client", return_value=client):
+        raw = llm_extractor._complete("m", "schema", "Invoice No: INV-9")
+        llm_extractor._complete("m", "schema", "Invoice No: INV-9")
+    assert raw == {"invoice": {"number": "INV-9"}}
+    assert len(seen) == 2 and seen[0]["model"] == "m"
+    assert not client.is_closed
+
+
+def test_aextract_from_text_uses_async_client(monkeypatch):
+    """The async path builds the same request and parses the reply on the pooled async client."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+
+    def handler(request):
+        assert json.loads(request.content)["messages"][1]["content"].endswith("Invoice No: INV-3")
+        return httpx.Response(200, json={"choices": [{"message": {"content": '{"invoice": {"number": "INV-3"}}'}}]})
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("ai_engine.ai_engine.llm_extractor.get_async_http_client", return_value=client), patch(
+            "ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None
+        ):
+            return await llm_extractor.aextract_from_text("Invoice No: INV-3")
+
+    assert asyncio.run(run()) == {"invoice": {"number": "INV-3"}}
+
+
+def test_streamed_extraction_emits_events_before_the_reply_ends(monkeypatch):
+    """SSE deltas are parsed incrementally; items reach on_event while later deltas are pending."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    reply = json.dumps({"invoice": {"number": "INV-7"}, "line_items": [{"description": "Tea"}, {"description": "Milk"}]})
+    deltas = [reply[i : i + 7] for i in range(0, len(reply), 7)]
+    events = []
+    sent = []
+
+    def body():
+        for delta in deltas:
+            sent.append(delta)
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+
+    def on_event(kind, key, value):
+        events.append((kind, key, len(sent)))
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    with patch("ai_engine.ai_engine.llm_extractor.get_http_client", return_value=client), patch(
+        "ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None
+    ):
+        raw = llm_extractor.extract_from_text("Invoice No: INV-7", on_event=on_event)
+    assert raw["line_items"][1] == {"description": "Milk"}
+    assert [e[:2] for e in events] == [("field", "invoice"), ("item", 0), ("item", 1), ("field", "line_items")]
+    assert events[1][2] < len(deltas)  # first item arrived before the last delta was sent
@@ -40,3 +40,194 @@ def test_process_invoice_empty_text_returns_empty_result(mock_extract_text):
     assert result.raw_text == ""
     assert result.confidence.overall == 0.0
     assert result.line_items == []
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_layout_mode_skips_llm_line_items(mock_extract_from_text, mock_extract_text):
+    """When the item table is rebuilt from word boxes, the LLM is asked for header fields only."""
+    from ai_engine.ai_engine.layout import Word
+
+    def fake_extract_text(file, content_type=None, info=None, words=None):
+        rows = [
+            (10, ["ABC", "Ltd", "GSTIN", "29AABCU9603R1ZM"]),
+            (30, ["Description", "HSN", "Qty", "Rate", "Amount"]),
+            (50, ["Software", "998314", "2", "500.00", "1,000.00"]),
+            (70, ["Total", "1,180.00"]),
+        ]
+        for y, tokens in rows:
+            for i, token in enumerate(tokens):
+                words.append(Word(token, 100 * i, y, 100 * i + 50, y + 10))
+        return "ABC Ltd GSTIN 29AABCU9603R1ZM\nSoftware 998314 2 500.00 1,000.00\nTotal 1,180.00"
+
+    mock_extract_text.side_effect = fake_extract_text
+    mock_extract_from_text.return_value = {
+        "vendor": {"name": "ABC Ltd", "gstin": "29AABCU9603R1ZM"},
+        "is_inter_state": False,
+    }
+    result = process_invoice(b"fake-pdf", content_type="application/pdf", layout=True)
+    assert mock_extract_from_text.call_args.kwargs["include_line_items"] is False
+    assert "Software" not in mock_extract_from_text.call_args.args[0]
+    assert result.processing.line_items_source == "layout"
+    assert len(result.line_items) == 1
+    assert result.line_items[0].taxable_value == 1000.0
+    assert result.totals.grand_total == 1180.0
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_rules_skip_llm(mock_extract_from_text, mock_extract_text):
+    """With a clean item table and every required header field certain, the LLM is not called."""
+    from ai_engine.ai_engine.layout import Word
+
+    text_lines = [
+        "Sharma Traders Pvt Ltd",
+        "GSTIN: 29AABCU9603R1ZJ",
+        "Invoice No: ST/42 Invoice Date: 15/01/2024",
+        "Place of Supply: 29-Karnataka",
+        "Description HSN Qty Rate Amount",
+        "Software 998314 2 500.00 1,000.00",
+        "Taxable Value 1,000.00",
+        "CGST 9% 90.00",
+        "SGST 9% 90.00",
+        "Grand Total 1,180.00",
+    ]
+
+    def fake_extract_text(file, content_type=None, info=None, words=None):
+        for y, line in enumerate(text_lines):
+            for i, token in enumerate(line.split()):
+                words.append(Word(token, 100 * i, 20 * y, 100 * i + 50, 20 * y + 10))
+        return "\n".join(text_lines)
+
+    mock_extract_text.side_effect = fake_extract_text
+    result = process_invoice(b"fake-pdf", content_type="application/pdf", layout=True)
+    mock_extract_from_text.assert_not_called()
+    assert result.processing.fields_source == "rules"
+    assert result.processing.llm_fields == []
+    assert result.vendor.gstin == "29AABCU9603R1ZJ"
+    assert result.invoice.date == "2024-01-15"
+    assert result.is_inter_state is False
+    assert result.line_items[0].gst_breakdown.cgst == 90.0
+    assert result.totals.grand_total == 1180.0
+    assert result.confidence.overall >= 0.9
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_rules_narrow_llm_request(mock_extract_from_text, mock_extract_text):
+    """Without a table the LLM still reads line items, but only for the keys the rules missed."""
+    mock_extract_text.return_value = (
+        "Sharma Traders Pvt Ltd\nGSTIN: 29AABCU9603R1ZJ\nInvoice No: ST/42 Invoice Date: 15/01/2024\n"
+        "Bill To: Mehta Industries Ltd\nGSTIN: 27AAPFU0939F1ZV\nPlace of Supply: 27-Maharashtra\n"
+        "Taxable Value 1,000.00\nIGST 18% 180.00\nGrand Total 1,180.00"
+    )
+    mock_extract_from_text.return_value = {
+        "line_items": [{"description": "Widget", "qty": 2, "unit_price": 500, "taxable_value": 1000, "gst_rate": 18}],
+    }
+    result = process_invoice(b"fake-image-bytes")
+    assert mock_extract_from_text.call_args.kwargs["fields"] == ["buyer"]
+    assert result.processing.fields_source == "rules+llm"
+    assert result.processing.llm_fields == ["buyer", "line_items"]
+    assert result.buyer.name == "Mehta Industries Ltd"
+    assert result.line_items[0].gst_breakdown.igst == 180.0
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.aextract_from_text")
+def test_process_invoices_async_overlaps_llm_calls_with_limit(mock_aextract, mock_extract_text):
+    """Batch results keep input order, and no more than `concurrency` invoices are in flight."""
+    import asyncio
+
+    from ai_engine.ai_engine.invoice_processor import process_invoices_async
+
+    mock_extract_text.side_effect = lambda data, **kwargs: f"Invoice No: INV-{data.decode()}"
+    in_flight = peak = 0
+
+    async def fake_aextract(text, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"vendor": {"name": "ABC Ltd"}, "line_items": []}
+
+    mock_aextract.side_effect = fake_aextract
+    results = asyncio.run(process_invoices_async([str(i).encode() for i in range(6)], concurrency=2))
+    assert [r.invoice.number for r in results] == [f"INV-{i}" for i in range(6)]
+    assert all(r.vendor.name == "ABC Ltd" for r in results)
+    assert peak == 2
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_batch")
+def test_process_invoice_batch_shares_llm_requests(mock_extract_batch, mock_extract_text):
+    """Invoices with the same request shape go to one extract_batch call; blanks skip it."""
+    from ai_engine.ai_engine.invoice_processor import process_invoice_batch
+
+    mock_extract_text.side_effect = lambda data, **kwargs: "" if data == b"blank" else f"Bill {data.decode()}"
+    mock_extract_batch.side_effect = lambda texts, **kwargs: [
+        {"invoice": {"number": t.split()[1]}, "line_items": [{"description": "Tea", "taxable_value": 100}]}
+        for t in texts
+    ]
+    results = process_invoice_batch([b"A1", b"blank", b"A2"])
+    assert mock_extract_batch.call_count == 1
+    assert mock_extract_batch.call_args.args[0] == ["Bill A1", "Bill A2"]
+    assert [r.invoice.number for r in results] == ["A1", "", "A2"]
+    assert results[0].line_items[0].taxable_value == 100.0
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_flags_totals_mismatch(mock_extract_from_text, mock_extract_text):
+    """Items that do not add up to the printed taxable value cap confidence (e.g. a lost chunk)."""
+    mock_extract_text.return_value = "Invoice No: INV-5\nTaxable Value 15,000.00"
+    raw = {
+        "invoice": {"number": "INV-5"},
+        "is_inter_state": True,
+        "line_items": [{"description": "Cable", "qty": 1, "taxable_value": 10000, "gst_rate": 18}],
+        "totals": {"taxable_value": 15000, "grand_total": 17700},
+        "confidence": {"overall": 0.9, "fields": {}},
+    }
+    mock_extract_from_text.return_value = raw
+    result = process_invoice(b"fake")
+    assert result.processing.stated_totals.taxable_value == 15000
+    assert result.processing.totals_match is False
+    assert result.confidence.overall == 0.5
+
+    raw["line_items"].append({"description": "Plug", "qty": 1, "taxable_value": 5000, "gst_rate": 18})
+    result = process_invoice(b"fake")
+    assert result.processing.totals_match is True
+    assert result.confidence.overall == 0.9
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_text")
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_reports_partial_results(mock_extract_from_text, mock_extract_text):
+    """on_partial gets rule fields first, then streamed fields and enriched items."""
+    mock_extract_text.return_value = "GSTIN: 29AABCU9603R1ZJ\nInvoice No: INV-8"
+    raw = {
+        "is_inter_state": True,
+        "line_items": [{"description": "Laptop", "hsn_sac": "8471", "qty": 1, "taxable_value": 1000, "gst_rate": 18}],
+    }
+
+    def fake_extract(text, on_event=None, **kwargs):
+        on_event("field", "is_inter_state", True)
+        on_event("item", 0, raw["line_items"][0])
+        return raw
+
+    mock_extract_from_text.side_effect = fake_extract
+    events = []
+    result = process_invoice(b"fake", on_partial=lambda *e: events.append(e))
+    kinds = [(kind, key) for kind, key, _ in events]
+    assert kinds.index(("field", "vendor")) < kinds.index(("item", 0))
+    item = events[kinds.index(("item", 0))][2]
+    assert item.gst_breakdown.igst == 180.0
+    assert item.category == result.line_items[0].category
+
+
+def test_totals_tolerance_is_one_rupee_or_half_a_percent():
+    """The table fast path and the totals reconciliation share one tolerance."""
+    from ai_engine.ai_engine.invoice_processor import _totals_agree
+
+    assert _totals_agree(100.0, 101.0) and not _totals_agree(100.0, 101.5)
+    assert _totals_agree(100000.0, 100400.0) and not _totals_agree(100000.0, 100600.0)
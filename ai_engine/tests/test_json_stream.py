@@ -0,0 +1,59 @@
+"""Unit tests for incremental parsing of streamed LLM replies."""
+import json
+
+import pytest
+
+from ai_engine.ai_engine.json_stream import JSONStream, replay
+
+REPLY = {
+    "vendor": {"name": "ABC {Ltd}", "gstin": "29AABCU9603R1ZJ"},
+    "is_inter_state": True,
+    "line_items": [
+        {"description": 'Cable "CAT6"', "qty": 2, "taxable_value": 500},
+        {"description": "Switch, 8 port", "qty": 1, "taxable_value": 1500},
+    ],
+    "totals": {"taxable_value": 2000},
+}
+
+
+def test_stream_reports_fields_and_items_as_they_complete():
+    """Fed one character at a time, each item is reported before the next one starts."""
+    text = "```json\n" + json.dumps(REPLY, indent=2) + "\n```"
+    stream = JSONStream()
+    seen = []
+    for pos, ch in enumerate(text):
+        for event in stream.feed(ch):
+            seen.append((event, pos))
+    events = [e for e, _ in seen]
+    assert events == [
+        ("field", "vendor", REPLY["vendor"]),
+        ("field", "is_inter_state", True),
+        ("item", 0, REPLY["line_items"][0]),
+        ("item", 1, REPLY["line_items"][1]),
+        ("field", "line_items", REPLY["line_items"]),
+        ("field", "totals", REPLY["totals"]),
+    ]
+    first_item_pos = seen[2][1]
+    assert first_item_pos < text.index("Switch")
+    assert stream.done and stream.result() == REPLY
+
+
+def test_incomplete_stream_raises():
+    stream = JSONStream()
+    stream.feed('{"vendor": {"name": "A"}, "line_items": [')
+    assert not stream.done
+    with pytest.raises(ValueError):
+        stream.result()
+
+
+def test_replay_matches_stream_order():
+    events = []
+    replay(REPLY, lambda *e: events.append(e))
+    assert [e[:2] for e in events] == [
+        ("field", "vendor"),
+        ("field", "is_inter_state"),
+        ("item", 0),
+        ("item", 1),
+        ("field", "line_items"),
+        ("field", "totals"),
+    ]
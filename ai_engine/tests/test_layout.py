@@ -0,0 +1,62 @@
+"""Unit tests for layout-aware table reconstruction."""
+from ai_engine.ai_engine.layout import Word, parse_number, reconstruct_table
+
+COLUMNS = [40, 70, 250, 310, 350, 420, 470]
+
+
+def _row(y, cells):
+    """Words of one table row, each cell starting at its column's x position."""
+    words = []
+    for x, cell in zip(COLUMNS, cells):
+        for token in cell.split():
+            words.append(Word(token, x, y, x + 6 * len(token), y + 10))
+            x += 6 * len(token) + 4
+    return words
+
+
+def _invoice_words(amount_row_2="12,500.00"):
+    return [
+        *_row(20, ["TAX INVOICE ABC Traders"]),
+        *_row(40, ["Sl", "Description", "HSN/SAC", "Qty", "Rate", "GST %", "Amount"]),
+        *_row(60, ["1", "Laptop Dell", "8471", "2", "50,000.00", "18%", "1,00,000.00"]),
+        *_row(72, ["", "Inspiron 15"]),
+        *_row(84, ["2", "Software license", "998314", "1", "12,500.00", "18%", amount_row_2]),
+        *_row(110, ["Total 1,12,500.00"]),
+    ]
+
+
+def test_reconstruct_table_by_column_alignment():
+    """Rows are split into columns under the header; continuation lines extend the description."""
+    table = reconstruct_table(_invoice_words())
+    assert table.clean
+    assert [i.description for i in table.items] == ["Laptop Dell Inspiron 15", "Software license"]
+    first = table.items[0]
+    assert (first.hsn_sac, first.qty, first.unit_price, first.taxable_value, first.gst_rate) == (
+        "8471", 2.0, 50000.0, 100000.0, 18.0,
+    )
+    assert "TAX INVOICE" in table.compact_text and "Total" in table.compact_text
+    assert "Laptop" not in table.compact_text
+
+
+def test_reconstruct_table_flags_inconsistent_rows():
+    """qty x rate that does not match the amount makes the table unclean (LLM fallback)."""
+    assert not reconstruct_table(_invoice_words(amount_row_2="9,999.00")).clean
+
+
+def test_reconstruct_table_flags_unreadable_amounts():
+    """An item row whose amount does not parse is not folded into the previous description."""
+    table = reconstruct_table(_invoice_words(amount_row_2="12,5OO.OO"))
+    assert not table.clean
+    assert [i.description for i in table.items] == ["Laptop Dell Inspiron 15"]
+
+
+def test_no_table_header_means_no_items():
+    assert not reconstruct_table(_row(20, ["Thank you for your business"])).clean
+
+
+def test_parse_number():
+    assert parse_number("1,25,000.50") == 125000.5
+    assert parse_number("₹450") == 450.0
+    assert parse_number("18%") == 18.0
+    assert parse_number("(12.50)") == -12.5
+    assert parse_number("Dell") is None
@@ -0,0 +1,58 @@
+"""Unit tests for the LLM extraction result cache."""
+from unittest.mock import patch
+
+from ai_engine.ai_engine import llm_cache, llm_extractor
+from ai_engine.ai_engine.llm_cache import SQLiteLLMCache, make_llm_cache_key
+from ai_engine.ai_engine.types import LLMInfo
+
+
+def test_cache_key_normalises_text_and_tracks_model_and_prompt():
+    """Whitespace-only differences share a key; model or prompt changes do not."""
+    k = make_llm_cache_key("Invoice  No: 1\n\n  Total 100 ", "m1", "schema", version="1")
+    assert k == make_llm_cache_key("Invoice No: 1\nTotal 100", "m1", "schema", version="1")
+    assert k != make_llm_cache_key("Invoice No: 1\nTotal 100", "m2", "schema", version="1")
+    assert k != make_llm_cache_key("Invoice No: 1\nTotal 100", "m1", "schema v2", version="1")
+    assert k != make_llm_cache_key("Invoice No: 1\nTotal 100", "m1", "schema", version="2")
+
+
+def test_sqlite_cache_persists_expires_and_evicts(tmp_path):
+    """Entries survive a new instance, expire after the TTL and are capped by count (LRU)."""
+    path = tmp_path / "llm.sqlite3"
+    cache = SQLiteLLMCache(path, max_entries=2)
+    cache.put("a", {"v": 1})
+    assert SQLiteLLMCache(path).get("a") == {"v": 1}
+    cache.put("b", {"v": 2})
+    cache.get("a")  # "a" is now most recently used
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert SQLiteLLMCache(path, ttl_seconds=-1).get("a") is None
+
+
+@patch("ai_engine.ai_engine.llm_extractor._complete", return_value={"invoice": {"number": "INV-1"}})
+def test_extract_from_text_serves_repeat_from_cache(mock_complete, tmp_path):
+    """Re-processing the same text does not call the API again; hits are reported in LLMInfo."""
+    info = LLMInfo()
+    with patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=SQLiteLLMCache(tmp_path / "c.db")):
+        first = llm_extractor.extract_from_text("Invoice No: INV-1", info=info)
+        second = llm_extractor.extract_from_text("Invoice No:   INV-1\n", info=info)
+        llm_extractor.extract_from_text("Invoice No: INV-1", include_line_items=False, info=info)
+    assert first == second == {"invoice": {"number": "INV-1"}}
+    assert mock_complete.call_count == 2  # header-only prompt is a different key
+    assert info.requests == 3
+    assert info.cache_hits == 1
+
+
+def test_get_llm_cache_ignores_malformed_env(monkeypatch, tmp_path):
+    """Bad LLM_CACHE_TTL / LLM_CACHE_MAX_ENTRIES fall back to the defaults instead of raising."""
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setenv("LLM_CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "c.db"))
+    monkeypatch.setenv("LLM_CACHE_TTL", "30d")
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRIES", "")
+    cache = llm_cache.get_llm_cache()
+    assert cache.ttl_seconds == llm_cache.DEFAULT_TTL_SECONDS
+    assert cache.max_entries == llm_cache.DEFAULT_MAX_ENTRIES
+    assert cache.path == tmp_path / "c.db"
+    assert llm_cache.DEFAULT_SQLITE_PATH.is_absolute()
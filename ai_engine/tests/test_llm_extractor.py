@@ -0,0 +1,52 @@
+"""Unit tests for LLM extraction (API calls mocked)."""
+from unittest.mock import patch
+
+from ai_engine.ai_engine import llm_extractor
+from ai_engine.ai_engine.types import LLMInfo
+
+
+def _reply(number):
+    return {"invoice": {"number": number}, "totals": {"grand_total": 100}}
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_extract_batch_packs_short_invoices(mock_complete, _cache):
+    """Three short bills go out in one request and come back in input order."""
+    mock_complete.return_value = [{"id": n, **_reply(f"B{n}")} for n in (3, 1, 2)]
+    infos = [LLMInfo() for _ in range(3)]
+    raws = llm_extractor.extract_batch(["bill one", "bill two", "bill three"], infos=infos)
+    assert [r["invoice"]["number"] for r in raws] == ["B1", "B2", "B3"]
+    assert "id" not in raws[0]
+    assert mock_complete.call_count == 1
+    schema, packed = mock_complete.call_args.args[1:]
+    assert "JSON array" in schema and "line_items" in schema
+    assert packed.index("### INVOICE 1\nbill one") < packed.index("### INVOICE 3\nbill three")
+    assert all(info.batch_size == 3 for info in infos)
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_extract_batch_falls_back_for_bad_elements(mock_complete, _cache):
+    """A missing or malformed element is re-extracted with a single-invoice call."""
+    mock_complete.side_effect = [
+        [{"id": 1, **_reply("B1")}, {"id": 2, "totals": {"grand_total": "n/a"}}],
+        _reply("B2"),
+        _reply("B3"),
+    ]
+    with patch.dict("os.environ", {"LLM_BATCH_SIZE": "2"}):
+        raws = llm_extractor.extract_batch(["bill one", "bill two", "bill three"])
+    assert [r["invoice"]["number"] for r in raws] == ["B1", "B2", "B3"]
+    # one pack of two, then single calls for the bad element and the leftover invoice
+    assert mock_complete.call_count == 3
+    assert mock_complete.call_args_list[1].args[2] == "bill two"
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_extract_batch_sends_long_invoices_alone(mock_complete, _cache):
+    """Invoices above the packable size never share a request."""
+    mock_complete.side_effect = lambda model, schema, text: _reply(text[:4])
+    raws = llm_extractor.extract_batch(["long" + "x" * 5000, "tiny"])
+    assert [r["invoice"]["number"] for r in raws] == ["long", "tiny"]
+    assert mock_complete.call_count == 2
@@ -0,0 +1,92 @@
+"""Unit tests for the content-addressed OCR cache."""
+from unittest.mock import patch
+
+from ai_engine.ai_engine import ocr_service
+from ai_engine.ai_engine.layout import Word
+from ai_engine.ai_engine.ocr_cache import OCRCache, make_cache_key
+from ai_engine.ai_engine.types import OCRInfo
+
+
+def test_cache_key_depends_on_bytes_and_settings():
+    """Same bytes + settings give the same key; any change gives a new key."""
+    k = make_cache_key(b"pdf", lang="eng", zoom=2)
+    assert k == make_cache_key(b"pdf", zoom=2, lang="eng")
+    assert k != make_cache_key(b"pdf", lang="eng+hin", zoom=2)
+    assert k != make_cache_key(b"pdf2", lang="eng", zoom=2)
+
+
+def test_memory_tier_is_lru():
+    """Oldest entry is evicted once the memory tier is full."""
+    cache = OCRCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # "a" is now most recently used
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_disk_tier_survives_new_instance_and_evicts_by_size(tmp_path):
+    """Disk entries are shared across instances and trimmed to the byte budget."""
+    cache = OCRCache(max_entries=0, disk_dir=tmp_path, disk_max_bytes=25)
+    cache.put("k1", "x" * 10)
+    assert OCRCache(disk_dir=tmp_path).get("k1") == "x" * 10
+    cache.put("k2", "y" * 10)
+    cache.put("k3", "z" * 10)
+    sizes = sum(p.stat().st_size for p in tmp_path.glob("*/*.txt"))
+    assert sizes <= 25
+    assert cache.get("k3") == "z" * 10
+
+
+@patch("ai_engine.ai_engine.ocr_service.extract_text_from_image", return_value="invoice text")
+def test_extract_text_hits_cache_on_reupload(mock_ocr):
+    """Second extraction of the same bytes is served from the cache."""
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_cache", return_value=OCRCache()):
+        assert ocr_service.extract_text(b"same-bytes") == "invoice text"
+        assert ocr_service.extract_text(b"same-bytes") == "invoice text"
+    assert mock_ocr.call_count == 1
+
+
+def test_cache_hit_restores_page_count():
+    """The page counts are stored with the cached text, so cached documents report them too."""
+
+    def fake_pdf(raw, info=None, words=None):
+        info.pages_total = info.pages_ocr = 3
+        return "three pages"
+
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_cache", return_value=OCRCache()), patch(
+        "ai_engine.ai_engine.ocr_service.extract_text_from_pdf", side_effect=fake_pdf
+    ):
+        ocr_service.extract_text(b"%PDF-1.7", content_type="application/pdf")
+        info = OCRInfo()
+        assert ocr_service.extract_text(b"%PDF-1.7", content_type="application/pdf", info=info) == "three pages"
+    assert info.cache_hit and info.pages_total == info.pages_ocr == 3
+
+
+@patch("ai_engine.ai_engine.ocr_service.extract_text_from_image", return_value="invoice text")
+def test_adaptive_threshold_change_misses_cache(mock_ocr, monkeypatch):
+    """In adaptive mode the re-read threshold is part of the key."""
+    monkeypatch.setenv("OCR_LANG_MODE", "adaptive")
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_cache", return_value=OCRCache()):
+        monkeypatch.setenv("OCR_ADAPTIVE_MIN_CONF", "60")
+        ocr_service.extract_text(b"same-bytes")
+        ocr_service.extract_text(b"same-bytes")
+        monkeypatch.setenv("OCR_ADAPTIVE_MIN_CONF", "80")
+        ocr_service.extract_text(b"same-bytes")
+    assert mock_ocr.call_count == 2
+
+
+def test_cache_entry_holds_only_this_documents_words():
+    """Words the caller already collected are not stored with (or replayed from) the entry."""
+    def fake_image(raw, info=None, words=None):
+        words.append(Word("own", 0, 0, 10, 10, 90.0, 0))
+        return "text"
+
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_cache", return_value=OCRCache()), patch(
+        "ai_engine.ai_engine.ocr_service.extract_text_from_image", side_effect=fake_image
+    ):
+        words = [Word("earlier", 0, 0, 10, 10)]
+        ocr_service.extract_text(b"img", words=words)
+        replayed = []
+        ocr_service.extract_text(b"img", words=replayed)
+    assert [w.text for w in replayed] == ["own"]
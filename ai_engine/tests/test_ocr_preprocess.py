@@ -0,0 +1,50 @@
+"""Unit tests for pre-OCR image normalisation."""
+from PIL import Image, ImageDraw
+
+from ai_engine.ai_engine.ocr_preprocess import (
+    PreprocessOptions,
+    crop_margins,
+    downsample,
+    estimate_skew,
+    preprocess_image,
+)
+
+
+def _text_lines_page(width=1200, height=1600, margin=200) -> Image.Image:
+    """White page with dark horizontal 'text lines' inside the margins."""
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(margin, height - margin, 40):
+        draw.rectangle((margin, y, width - margin, y + 12), fill=0)
+    return img
+
+
+def test_downsample_caps_long_edge_to_target_dpi():
+    """A 12MP photo is shrunk to an A4 page at the target DPI; small images are untouched."""
+    photo = Image.new("RGB", (4000, 3000), "white")
+    small = downsample(photo, 200)
+    assert max(small.size) == int(200 * 11.69)
+    assert abs(small.width / small.height - 4 / 3) < 0.01
+    assert downsample(Image.new("L", (800, 600)), 200).size == (800, 600)
+
+
+def test_crop_margins_removes_blank_border():
+    """Blank margins are cropped down to the ink plus padding."""
+    cropped = crop_margins(_text_lines_page())
+    assert cropped.width < 1200 - 300 and cropped.height < 1600 - 300
+
+
+def test_estimate_skew_recovers_rotation():
+    """Projection-profile search finds the angle that levels rotated text lines."""
+    skewed = _text_lines_page().rotate(-3, expand=True, fillcolor=255)
+    assert abs(estimate_skew(skewed) - 3.0) <= 0.5
+
+
+def test_options_from_env(monkeypatch):
+    """OCR_PREPROCESS toggles individual steps; 'none' disables all of them."""
+    monkeypatch.setenv("OCR_PREPROCESS", "grayscale,deskew")
+    opts = PreprocessOptions.from_env()
+    assert opts.grayscale and opts.deskew and not opts.downsample and not opts.crop
+    monkeypatch.setenv("OCR_PREPROCESS", "none")
+    img = Image.new("RGB", (50, 50), "white")
+    assert preprocess_image(img, PreprocessOptions.from_env()).mode == "RGB"
@@ -0,0 +1,227 @@
+"""Unit tests for OCR service (Tesseract mocked)."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+from ai_engine.ai_engine import ocr_service
+from ai_engine.ai_engine.types import OCRInfo
+
+
+def _fake_ocr(img, lang=ocr_service.OCR_LANG):
+    return f"text-{img}"
+
+
+@patch("ai_engine.ai_engine.ocr_service._ocr_image", side_effect=_fake_ocr)
+def test_ocr_images_sequential_keeps_page_order(mock_ocr):
+    """workers=1 OCRs pages one after another, in order."""
+    assert ocr_service._ocr_images([1, 2, 3], workers=1) == ["text-1", "text-2", "text-3"]
+    assert mock_ocr.call_count == 3
+
+
+@patch("ai_engine.ai_engine.ocr_service._ocr_image", side_effect=_fake_ocr)
+def test_ocr_images_parallel_reassembles_page_order(mock_ocr):
+    """Parallel mode fans pages out to the pool and returns text in page order."""
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        with patch("ai_engine.ai_engine.ocr_service._get_pool", return_value=pool):
+            texts = ocr_service._ocr_images(list(range(12)), workers=4)
+    assert texts == [f"text-{i}" for i in range(12)]
+
+
+@patch("ai_engine.ai_engine.ocr_service._ocr_image", side_effect=_fake_ocr)
+@patch("ai_engine.ai_engine.ocr_service._get_pool", side_effect=OSError("no semaphores"))
+def test_ocr_images_falls_back_to_sequential(mock_pool, mock_ocr):
+    """If the process pool cannot be created, OCR runs sequentially."""
+    assert ocr_service._ocr_images(["a", "b"], workers=2) == ["text-a", "text-b"]
+
+
+class _FailingPool:
+    """A pool whose futures end broken or cancelled, as when another caller's pool dies or shuts down."""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.shutdowns = []
+
+    def submit(self, fn, *args):
+        fut = Future()
+        if self.outcome == "cancelled":
+            fut.cancel()
+        else:
+            fut.set_exception(BrokenProcessPool("worker died"))
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append(cancel_futures)
+
+
+@patch("ai_engine.ai_engine.ocr_service._ocr_image", side_effect=_fake_ocr)
+def test_ocr_images_recovers_from_broken_or_cancelled_pool(mock_ocr):
+    """Broken or cancelled pages are OCR'd sequentially; only the broken pool is dropped, without cancelling others' work."""
+    for outcome in ("broken", "cancelled"):
+        pool = _FailingPool(outcome)
+        with patch("ai_engine.ai_engine.ocr_service._get_pool", return_value=pool):
+            assert ocr_service._ocr_images(["a", "b", "c"], workers=2) == ["text-a", "text-b", "text-c"]
+        assert pool.shutdowns == ([False] if outcome == "broken" else [])
+
+
+@patch("ai_engine.ai_engine.ocr_service._ocr_image", side_effect=_fake_ocr)
+def test_ocr_images_streams_within_window(mock_ocr):
+    """Pages are pulled lazily: no more than `window` rendered pages are alive at once."""
+    alive = 0
+    peak = 0
+
+    def pages():
+        nonlocal alive, peak
+        for i in range(20):
+            alive += 1
+            peak = max(peak, alive)
+            yield i
+
+    def ocr(img, lang=ocr_service.OCR_LANG):
+        nonlocal alive
+        alive -= 1
+        return f"text-{img}"
+
+    mock_ocr.side_effect = ocr
+    texts = ocr_service._ocr_images(pages(), workers=1, window=3)
+    assert texts == [f"text-{i}" for i in range(20)]
+    assert peak <= 3
+
+
+def test_render_zoom_respects_pixel_budget():
+    """Oversized pages are rendered at a reduced zoom to fit the pixel budget."""
+    import pymupdf
+
+    doc = pymupdf.open()
+    doc.new_page()  # A4: 595 x 842 pt
+    doc.new_page(width=2384, height=3370)  # A0
+    a4, a0 = doc[0], doc[1]
+    assert ocr_service._render_zoom(a4, 8_000_000) == ocr_service.PDF_RENDER_ZOOM
+    zoom = ocr_service._render_zoom(a0, 8_000_000)
+    assert zoom < ocr_service.PDF_RENDER_ZOOM
+    assert (2384 * zoom) * (3370 * zoom) <= 8_000_000 * 1.0001
+    doc.close()
+
+
+class _ScriptBackend(ocr_service.OCRBackend):
+    """Fake engine: English pass confidence depends on whether the page is Hindi."""
+
+    name = "fake"
+
+    def image_to_string(self, img, lang=ocr_service.OCR_LANG):
+        return f"{img} [{lang}]"
+
+    def image_to_text_and_confidences(self, img, lang=ocr_service.OCR_LANG):
+        return f"{img} [{lang}]", [20.0, 35.0, 90.0] if img == "hindi" else [92.0, 88.0, 95.0]
+
+
+def test_adaptive_lang_reruns_only_unreliable_pages(monkeypatch):
+    """Adaptive mode keeps the English pass for clean pages and re-runs others with eng+hin."""
+    monkeypatch.setenv("OCR_LANG_MODE", "adaptive")
+    monkeypatch.setattr(ocr_service, "_backend", _ScriptBackend())
+    info = OCRInfo()
+    texts = ocr_service._ocr_images(["english", "hindi"], workers=1, info=info)
+    monkeypatch.setattr(ocr_service, "_backend", None)
+    assert texts == ["english [eng]", "hindi [eng+hin]"]
+    assert info.page_languages == ["eng", "eng+hin"]
+    assert len(info.page_timings_ms) == 2
+
+
+def test_fixed_lang_mode_is_default(monkeypatch):
+    """Without OCR_LANG_MODE every page is OCR'd with eng+hin."""
+    monkeypatch.delenv("OCR_LANG_MODE", raising=False)
+    monkeypatch.setattr(ocr_service, "_backend", _ScriptBackend())
+    text, lang, _, _ = ocr_service._ocr_page("english")
+    monkeypatch.setattr(ocr_service, "_backend", None)
+    assert (text, lang) == ("english [eng+hin]", "eng+hin")
+
+
+def test_text_from_tesseract_data_groups_lines_and_blocks():
+    """TSV words are rebuilt into lines, with a blank line between blocks."""
+    data = {
+        "text": ["", "TAX", "INVOICE", "Total", "100"],
+        "block_num": [1, 1, 1, 2, 2],
+        "par_num": [1, 1, 1, 1, 1],
+        "line_num": [1, 1, 1, 1, 1],
+    }
+    assert ocr_service._text_from_tesseract_data(data) == "TAX INVOICE\n\nTotal 100"
+
+
+def test_backend_auto_prefers_persistent_engine(monkeypatch):
+    """OCR_BACKEND=auto picks tesserocr when installed, else pytesseract."""
+    monkeypatch.setenv("OCR_BACKEND", "auto")
+    monkeypatch.setattr(ocr_service, "_backend", None)
+    monkeypatch.setattr(ocr_service, "tesserocr", object())
+    assert isinstance(ocr_service.get_ocr_backend(), ocr_service.TesserocrBackend)
+
+    monkeypatch.setattr(ocr_service, "_backend", None)
+    monkeypatch.setattr(ocr_service, "tesserocr", None)
+    monkeypatch.setattr(ocr_service, "pytesseract", object())
+    assert isinstance(ocr_service.get_ocr_backend(), ocr_service.PytesseractBackend)
+    monkeypatch.setattr(ocr_service, "_backend", None)
+
+
+def _mixed_pdf() -> bytes:
+    """Page 1: digital text layer; page 2: image only (scanned); page 3: blank."""
+    import pymupdf
+
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "TAX INVOICE INV-001 GSTIN 29AABCU9603R1ZM")
+    scanned = doc.new_page()
+    pix = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 50, 50), False)
+    pix.set_rect(pix.irect, (255, 255, 255))
+    scanned.insert_image(scanned.rect, pixmap=pix)
+    doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_pdf_mixed_pages_ocr_only_scanned_pages():
+    """Digital pages use the text layer; only the image-only page is rendered and OCR'd."""
+    rendered = []
+
+    def fake_ocr_images(images, workers=None, info=None, page_words=None):
+        rendered.extend(images)
+        return ["SCANNED ANNEXURE" for _ in rendered]
+
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_backend"), patch(
+        "ai_engine.ai_engine.ocr_service._ocr_images", side_effect=fake_ocr_images
+    ):
+        text = ocr_service.extract_text_from_pdf(_mixed_pdf())
+    assert len(rendered) == 1
+    assert "INV-001" in text
+    assert "SCANNED ANNEXURE" in text
+    assert text.index("INV-001") < text.index("SCANNED ANNEXURE")
+
+
+def test_pdf_layout_words_are_in_page_order():
+    """Word boxes of OCR'd pages are merged with the text-layer pages' words in page order."""
+    import pymupdf
+
+    from ai_engine.ai_engine.layout import Word
+
+    src = pymupdf.open(stream=_mixed_pdf(), filetype="pdf")
+    doc = pymupdf.open()
+    doc.insert_pdf(src, from_page=1, to_page=1)  # scanned page first
+    doc.insert_pdf(src, from_page=0, to_page=0)  # then the digital page
+    data = doc.tobytes()
+
+    def fake_ocr_images(images, workers=None, info=None, page_words=None):
+        pages = list(images)
+        page_words.extend([Word("SCANNED", 10, 10, 60, 20)] for _ in pages)
+        return ["SCANNED" for _ in pages]
+
+    words = []
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_backend"), patch(
+        "ai_engine.ai_engine.ocr_service._ocr_images", side_effect=fake_ocr_images
+    ):
+        ocr_service.extract_text_from_pdf(data, words=words)
+    assert [w.page for w in words] == sorted(w.page for w in words)
+    assert words[0].text == "SCANNED" and words[-1].page == 1
+
+
+def test_pdf_mixed_pages_without_ocr_engine_returns_text_layer():
+    """With no OCR engine installed, the digital pages of a mixed PDF are still returned."""
+    with patch("ai_engine.ai_engine.ocr_service.get_ocr_backend", side_effect=ImportError("no tesseract")):
+        text = ocr_service.extract_text_from_pdf(_mixed_pdf())
+    assert "INV-001" in text
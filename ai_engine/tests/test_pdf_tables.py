@@ -0,0 +1,62 @@
+"""Unit tests for the native PDF table fast path."""
+from unittest.mock import patch
+
+import pymupdf
+
+from ai_engine.ai_engine.invoice_processor import process_invoice
+from ai_engine.ai_engine.pdf_tables import extract_pdf_line_items
+
+COLUMN_X = [40, 65, 230, 290, 330, 400, 450, 540]
+ROWS = [
+    ["Sl", "Description", "HSN/SAC", "Qty", "Rate", "GST %", "Taxable Value"],
+    ["1", "Laptop Dell\nInspiron 15", "8471", "2", "50,000.00", "18%", "1,00,000.00"],
+    ["2", "Software license", "998314", "1", "12,500.00", "18%", "12,500.00"],
+    ["", "Total", "", "", "", "", "1,12,500.00"],
+]
+
+
+def _digital_invoice_pdf() -> bytes:
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((40, 50), "TAX INVOICE  ABC Traders  GSTIN 29AABCU9603R1ZM", fontsize=9)
+    y = 70
+    for row in ROWS:
+        for i, text in enumerate(row):
+            rect = pymupdf.Rect(COLUMN_X[i], y, COLUMN_X[i + 1], y + 30)
+            page.draw_rect(rect)
+            page.insert_textbox(rect + (2, 2, -2, -2), text, fontsize=8)
+        y += 30
+    page.insert_text((40, y + 20), "Bank details: HDFC Bank", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_extract_pdf_line_items_reads_item_grid():
+    """Item rows come straight from the PDF table; the totals row ends the table."""
+    table = extract_pdf_line_items(_digital_invoice_pdf())
+    assert table is not None and table.clean
+    assert [(i.description, i.hsn_sac, i.qty, i.taxable_value, i.gst_rate) for i in table.items] == [
+        ("Laptop Dell Inspiron 15", "8471", 2.0, 100000.0, 18.0),
+        ("Software license", "998314", 1.0, 12500.0, 18.0),
+    ]
+    assert "GSTIN 29AABCU9603R1ZM" in table.compact_text
+    assert "Laptop" not in table.compact_text
+
+
+def test_pdf_without_table_returns_none():
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Thank you for your business, see you again soon")
+    assert extract_pdf_line_items(doc.tobytes()) is None
+
+
+@patch("ai_engine.ai_engine.invoice_processor.extract_from_text")
+def test_process_invoice_uses_pdf_table_fast_path(mock_extract_from_text):
+    """Digital PDF: line items from the table, LLM asked for header fields only."""
+    mock_extract_from_text.return_value = {"vendor": {"name": "ABC Traders"}, "is_inter_state": True}
+    result = process_invoice(_digital_invoice_pdf(), content_type="application/pdf")
+    assert mock_extract_from_text.call_args.kwargs["include_line_items"] is False
+    assert result.processing.line_items_source == "pdf_table"
+    assert len(result.line_items) == 2
+    assert result.totals.taxable_value == 112500.0
+    assert result.totals.gst_total == 20250.0
@@ -0,0 +1,63 @@
+"""Unit tests for LLM prompt compaction."""
+from ai_engine.ai_engine.prompt_compaction import clean_lines, compact_text
+
+HEADER = """SHARMA TRADERS PVT LTD
+12 MG Road,   Bengaluru
+GSTIN: 29AABCU9603R1ZJ
+TAX INVOICE        Page {page} of 2
+Invoice No: ST/42   Date: 15/01/2024
+~~ -- ~~ __
+"""
+FOOTER = """Taxable Value 29,000.00
+IGST @ 18% 5,220.00
+Grand Total 34,220.00
+Terms & Conditions
+1. Goods once sold will not be taken back.
+2. Payment within 30 days.
+Bank Details
+A/c No: 50200012345678
+IFSC: HDFC0001234
+This is a computer generated invoice
+"""
+
+
+def _invoice(items=29):
+    rows = [f"{i} Widget type {i} 8471 2 500.00 1,000.00" for i in range(1, items + 1)]
+    half = len(rows) // 2
+    return (
+        HEADER.format(page=1) + "\n".join(rows[:half]) + "\n\n"
+        + HEADER.format(page=2) + "\n".join(rows[half:]) + "\n" + FOOTER
+    )
+
+
+def test_compaction_drops_boilerplate_noise_and_repeated_headers():
+    text = compact_text(_invoice(), token_budget=3000)
+    lines = text.splitlines()
+    assert lines.count("GSTIN: 29AABCU9603R1ZJ") == 1
+    assert "TAX INVOICE" in lines
+    assert "12 MG Road, Bengaluru" in lines
+    assert not any("Goods once sold" in l or "IFSC" in l or "computer generated" in l for l in lines)
+    assert not any("~~" in l or "Page" in l for l in lines)
+    assert sum("Widget type" in l for l in lines) == 29
+    assert len(text) < len(_invoice()) * 0.85
+
+
+def test_compaction_keeps_totals_and_header_before_items_when_over_budget():
+    """A tight budget drops trailing item rows but never the totals or the header."""
+    text = compact_text(_invoice(), token_budget=150)
+    assert len(text) <= 150 * 4
+    assert "Grand Total 34,220.00" in text and "IGST @ 18% 5,220.00" in text
+    assert "GSTIN: 29AABCU9603R1ZJ" in text and "Invoice No: ST/42 Date: 15/01/2024" in text
+    assert "1 Widget type 1 " in text
+    assert "29 Widget type 29 " not in text
+
+
+def test_repeated_integer_item_rows_are_kept():
+    """Only page-edge lines repeated across page breaks are dropped, never identical rows on a page."""
+    text = "ABC Hardware\nBolt M8 10 5 50\nNut M8 10 2 20\nBolt M8 10 5 50\n  washer set\n  washer set\nThank you"
+    lines = clean_lines(text)
+    assert lines.count("Bolt M8 10 5 50") == 2 and lines.count("washer set") == 2
+    two_pages = "ABC Hardware\nBolt M8 10 5 50\nEnd\n\nABC Hardware\nBolt M8 10 5 50\nEnd"
+    assert clean_lines(two_pages, keep_breaks=True) == [
+        "ABC Hardware", "Bolt M8 10 5 50", "End", "", "Bolt M8 10 5 50",
+    ]  # the repeated page header and footer go, the repeated item stays
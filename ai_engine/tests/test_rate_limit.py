@@ -0,0 +1,161 @@
+"""Unit tests for the LLM rate limiter, retry policy and circuit breaker."""
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from ai_engine.ai_engine import llm_extractor, rate_limit
+from ai_engine.ai_engine.rate_limit import CircuitBreaker, CircuitOpenError, LLMLimiter, TokenBucket
+
+
+def _status_error(code, headers=None):
+    request = httpx.Request("POST", "https://llm.test/v1/chat/completions")
+    return httpx.HTTPStatusError("err", request=request, response=httpx.Response(code, headers=headers, request=request))
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    rate_limit.reset_llm_limiter()
+    yield
+    rate_limit.reset_llm_limiter()
+
+
+def test_only_transient_errors_are_retryable():
+    assert rate_limit.is_retryable(_status_error(429))
+    assert rate_limit.is_retryable(_status_error(503))
+    assert rate_limit.is_retryable(httpx.ConnectTimeout("slow"))
+    assert not rate_limit.is_retryable(_status_error(400))
+    assert not rate_limit.is_retryable(_status_error(401))
+    assert not rate_limit.is_retryable(ValueError("bad json"))
+
+
+def test_retry_after_header_forms():
+    assert rate_limit.retry_after(_status_error(429, {"Retry-After": "7"})) == 7.0
+    soon = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 <= rate_limit.retry_after(_status_error(503, {"Retry-After": soon})) <= 31
+    assert rate_limit.retry_after(_status_error(503)) is None
+
+
+def _client(responses, seen):
+    def handler(request):
+        seen.append(request)
+        return responses.pop(0)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_complete_retries_503_after_retry_after_but_not_400():
+    ok = httpx.Response(200, json={"choices": [{"message": {"content": '{"invoice": {}}'}}]})
+    seen = []
+    client = _client([httpx.Response(503, headers={"Retry-After": "0"}), ok], seen)
+    with patch("ai_engine.ai_engine.llm_extractor.get_http_client", return_value=client):
+        assert llm_extractor._complete("m", "schema", "text") == {"invoice": {}}
+    assert len(seen) == 2
+
+    seen = []
+    client = _client([httpx.Response(400, json={"error": "bad model"})], seen)
+    with patch("ai_engine.ai_engine.llm_extractor.get_http_client", return_value=client):
+        with pytest.raises(httpx.HTTPStatusError):
+            llm_extractor._complete("m", "schema", "text")
+    assert len(seen) == 1
+    metrics = rate_limit.get_llm_metrics()
+    assert metrics["requests_sent"] == 3 and metrics["requests_failed"] == 2
+    assert metrics["circuit_state"] == "closed"
+
+
+def test_breaker_opens_fails_fast_and_recovers_after_trial():
+    breaker = CircuitBreaker(failures=2, reset=0.05)
+    for _ in range(2):
+        breaker.before()
+        breaker.record(_status_error(502))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    time.sleep(0.06)
+    breaker.before()  # the trial request
+    with pytest.raises(CircuitOpenError):
+        breaker.before()  # others still fail fast while it runs
+    breaker.record(None)
+    assert breaker.state == "closed" and breaker.trips == 1 and breaker.rejected == 2
+
+
+def test_half_open_trial_closes_only_on_success():
+    """A cancelled or 4xx trial gives no verdict: the breaker stays half-open for another trial."""
+    breaker = CircuitBreaker(failures=1, reset=0.01)
+    breaker.record(_status_error(502))
+    time.sleep(0.02)
+    for outcome in (asyncio.CancelledError(), _status_error(400), _status_error(429)):
+        breaker.before()
+        breaker.record(outcome)
+        assert breaker.state == "half_open"
+    breaker.before()
+    breaker.record(_status_error(503))
+    assert breaker.state == "open" and breaker.trips == 2
+
+
+def test_client_errors_and_throttling_do_not_trip_breaker():
+    breaker = CircuitBreaker(failures=2, reset=30)
+    for exc in (_status_error(429), _status_error(400), _status_error(429)):
+        breaker.record(exc)
+    assert breaker.state == "closed"
+
+
+def _sse_client(reply, usage=None):
+    def body():
+        yield f"data: {json.dumps({'choices': [{'delta': {'content': reply}}]})}\n\n".encode()
+        if usage:
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    def handler(request):
+        assert json.loads(request.content)["stream_options"] == {"include_usage": True}
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_streamed_calls_settle_token_usage(monkeypatch):
+    """The final usage event (or, without one, an estimate of the streamed reply) corrects the TPM booking."""
+    monkeypatch.setenv("LLM_TPM", "100000")
+    reply = '{"invoice": {"number": "INV-1"}}'
+    adjustments = []
+    for usage in ({"total_tokens": 5000}, None):
+        rate_limit.reset_llm_limiter()
+        limiter = rate_limit.get_llm_limiter()
+        monkeypatch.setattr(limiter.tokens, "adjust", adjustments.append)
+        with patch("ai_engine.ai_engine.llm_extractor.get_http_client", return_value=_sse_client(reply, usage)):
+            raw = llm_extractor._stream_complete("m", "schema", "text", lambda *event: None)
+        assert raw == {"invoice": {"number": "INV-1"}}
+    booked = 5000 - adjustments[0]
+    assert 0 < booked < 5000
+    assert adjustments[1] == llm_extractor.estimate_tokens(reply)
+
+
+def test_token_bucket_spreads_requests():
+    bucket = TokenBucket(rate=60)  # one per second, bursting to 60
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+    assert TokenBucket(rate=0).reserve(10_000) == 0.0
+
+
+def test_async_slots_cap_requests_in_flight():
+    limiter = LLMLimiter(max_in_flight=2)
+    peak = 0
+
+    async def one():
+        nonlocal peak
+        async with limiter.aslot(10):
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(one() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2 and limiter.metrics()["requests_sent"] == 6
@@ -0,0 +1,27 @@
+"""Unit tests for internal line-item records and the contract serializer."""
+import json
+
+from ai_engine.ai_engine.records import LINE_ITEMS, LineRecord
+from ai_engine.ai_engine.types import GSTBreakdown, InvoiceExtractResult, LineItem
+
+
+def test_line_record_from_reply_coerces_types():
+    record = LineRecord.from_reply({"description": "Laptop", "hsn_sac": 8471, "qty": "2", "taxable_value": 90000})
+    assert record == LineRecord("Laptop", "8471", 2.0, 0.0, 90000.0, 0.0)
+    assert not hasattr(record, "__dict__")  # slotted
+
+
+def test_to_json_dict_equals_model_dump():
+    item = LineItem(description="Laptop", hsn_sac="8471", qty=2, taxable_value=90000, gst_rate=18,
+                    gst_breakdown=GSTBreakdown(igst=16200), total=106200)
+    result = InvoiceExtractResult(line_items=[item, LineItem()], is_inter_state=True)
+    data = result.to_json_dict()
+    assert data == result.model_dump()
+    assert list(data) == list(result.model_dump())
+    assert json.dumps(data) == json.dumps(result.model_dump())
+
+
+def test_line_items_adapter_validates_once():
+    items = LINE_ITEMS.validate_python([{"description": "Pen", "qty": 1, "gst_breakdown": {"cgst": 1, "sgst": 1}}])
+    assert isinstance(items[0], LineItem)
+    assert items[0].gst_breakdown.cgst == 1.0 and items[0].gst_breakdown.igst == 0.0
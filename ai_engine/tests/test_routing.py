@@ -0,0 +1,106 @@
+"""Unit tests for tiered model routing and reply validation."""
+from unittest.mock import patch
+
+import pytest
+
+from ai_engine.ai_engine import llm_extractor
+from ai_engine.ai_engine.routing import get_model_tiers, validate_reply
+from ai_engine.ai_engine.types import LLMInfo
+
+GOOD = {
+    "vendor": {"name": "ABC", "gstin": "29AABCU9603R1ZJ"},
+    "invoice": {"number": "A1", "date": "2024-01-15"},
+    "buyer": {"name": "XYZ", "gstin": "27AAPFU0939F1ZV"},
+    "line_items": [{"description": "Cable", "qty": 2, "unit_price": 250, "taxable_value": 500}],
+    "totals": {"taxable_value": 500, "gst_total": 90, "grand_total": 590},
+    "confidence": {"overall": 0.9, "fields": {}},
+}
+
+
+def _with(**changes):
+    raw = {k: (dict(v) if isinstance(v, dict) else v) for k, v in GOOD.items()}
+    for path, value in changes.items():
+        key, _, leaf = path.partition("__")
+        if leaf:
+            raw[key][leaf] = value
+        else:
+            raw[key] = value
+    return raw
+
+
+def test_validate_accepts_consistent_reply():
+    assert validate_reply(GOOD) == []
+
+
+@pytest.mark.parametrize(
+    "raw, problem",
+    [
+        (_with(line_items=[{"description": "Cable", "taxable_value": 300}]), "line_items_total"),
+        (_with(totals__grand_total=700), "totals_arithmetic"),
+        (_with(vendor__gstin="29AABCU9603R1ZM"), "vendor.gstin"),
+        (_with(invoice__date="15/01/2024"), "invoice.date"),
+        (_with(confidence={"overall": 0.4}), "confidence"),
+    ],
+)
+def test_validate_flags_problems(raw, problem):
+    assert problem in validate_reply(raw)
+
+
+def test_validate_checks_only_requested_keys():
+    raw = _with(vendor__gstin="bad", line_items=[])
+    assert validate_reply(raw, include_line_items=False, fields=["totals"]) == []
+
+
+def test_tiers_default_to_single_model(monkeypatch):
+    monkeypatch.delenv("LLM_MODEL_TIERS", raising=False)
+    assert get_model_tiers("m") == ["m"]
+    monkeypatch.setenv("LLM_MODEL_TIERS", "cheap, strong")
+    assert get_model_tiers("m") == ["cheap", "strong"]
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_failing_reply_escalates_to_next_tier(mock_complete, _cache, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL_TIERS", "cheap,strong")
+    replies = {"cheap": _with(totals__taxable_value=900), "strong": GOOD}
+    mock_complete.side_effect = lambda model, schema, text: replies[model]
+    info = LLMInfo()
+    assert llm_extractor.extract_from_text("Invoice A1", info=info) == GOOD
+    assert [c.args[0] for c in mock_complete.call_args_list] == ["cheap", "strong"]
+    assert info.tier == 1 and info.model == "strong" and info.validation == []
+    assert info.requests == 2 and info.input_chars == len("Invoice A1")  # the strong tier's input only
+
+    mock_complete.reset_mock()
+    info = LLMInfo()
+    replies["cheap"] = GOOD
+    llm_extractor.extract_from_text("Invoice A1", info=info)
+    assert mock_complete.call_count == 1 and info.tier == 0
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_last_tier_reply_is_kept_with_its_problems(mock_complete, _cache, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL_TIERS", "cheap,strong")
+    mock_complete.return_value = _with(vendor__gstin="29AABCU9603R1ZM")
+    info = LLMInfo()
+    raw = llm_extractor.extract_from_text("Invoice A1", info=info)
+    assert raw["vendor"]["gstin"] == "29AABCU9603R1ZM"
+    assert info.tier == 1 and info.validation == ["vendor.gstin"]
+
+
+@patch("ai_engine.ai_engine.llm_extractor.get_llm_cache", return_value=None)
+@patch("ai_engine.ai_engine.llm_extractor._complete")
+def test_batch_escalates_only_failing_invoices(mock_complete, _cache, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL_TIERS", "cheap,strong")
+    bad = _with(confidence={"overall": 0.2})
+
+    def fake(model, schema, text):
+        if model == "cheap" and "INVOICE" in text:
+            return [{"id": "1", **GOOD}, {"id": "2", **bad}]
+        return GOOD
+
+    mock_complete.side_effect = fake
+    infos = [LLMInfo(), LLMInfo()]
+    assert llm_extractor.extract_batch(["Bill one", "Bill two"], infos=infos) == [GOOD, GOOD]
+    assert [c.args[0] for c in mock_complete.call_args_list] == ["cheap", "strong"]
+    assert [i.tier for i in infos] == [0, 1]
@@ -0,0 +1,92 @@
+"""Unit tests for the rule-based pre-extractor."""
+from ai_engine.ai_engine.rule_extractor import extract_fields, gstin_checksum_ok, normalize_date
+
+INVOICE_TEXT = """TAX INVOICE
+Sharma Traders Pvt Ltd
+12 MG Road, Bengaluru
+GSTIN: 29AABCU9603R1ZJ
+Invoice No: ST/2024/0042   Invoice Date: 15-Jan-2024
+Due Date: 14/02/2024
+Bill To: Mehta Industries
+GSTIN: 27AAPFU0939F1ZV
+Place of Supply: 27-Maharashtra
+Widget 8471 2 500.00 1,000.00
+Taxable Value 1,000.00
+IGST @ 18% 180.00
+Grand Total 1,180.00
+Rupees One Thousand One Hundred Eighty Only
+"""
+
+
+def test_gstin_checksum():
+    assert gstin_checksum_ok("27AAPFU0939F1ZV")
+    assert gstin_checksum_ok("29AABCU9603R1ZJ")
+    assert not gstin_checksum_ok("29AABCU9603R1ZM")
+
+
+def test_normalize_date_formats():
+    """Day-first Indian formats and month names all normalise to ISO dates."""
+    assert normalize_date("15/01/2024") == "2024-01-15"
+    assert normalize_date("15-01-24") == "2024-01-15"
+    assert normalize_date("15.1.2024") == "2024-01-15"
+    assert normalize_date("15-Jan-2024") == "2024-01-15"
+    assert normalize_date("Jan 15, 2024") == "2024-01-15"
+    assert normalize_date("2024-01-15") == "2024-01-15"
+    assert normalize_date("31/02/2024") is None
+
+
+def test_extract_fields_clean_invoice():
+    """All required fields are found with high confidence; only the buyer is left for the LLM."""
+    rules = extract_fields(INVOICE_TEXT)
+    assert rules.get("vendor.name") == "Sharma Traders Pvt Ltd"
+    assert rules.get("vendor.gstin") == "29AABCU9603R1ZJ"
+    assert rules.get("buyer.gstin") == "27AAPFU0939F1ZV"
+    assert rules.get("invoice.number") == "ST/2024/0042"
+    assert rules.get("invoice.date") == "2024-01-15"
+    assert rules.get("place_of_supply_state") == "Maharashtra"
+    assert rules.get("is_inter_state") is True
+    assert rules.get("totals.taxable_value") == 1000.0
+    assert rules.get("totals.gst_total") == 180.0
+    assert rules.get("totals.grand_total") == 1180.0
+    assert rules.missing() == []
+    assert rules.llm_keys() == ["buyer"]
+
+
+def test_extract_fields_low_confidence_goes_to_llm():
+    """A GSTIN with a bad check digit and an unlabelled total are not trusted."""
+    rules = extract_fields("ABC Ltd GSTIN 29AABCU9603R1ZM\nTotal 1,180.00")
+    assert rules.get("vendor.gstin") == "29AABCU9603R1ZM"
+    assert "vendor.gstin" in rules.missing()
+    assert "totals.grand_total" in rules.missing()
+    assert "invoice" in rules.llm_keys()
+
+
+def test_merge_into_prefers_confident_rules():
+    """Confident rule values override the LLM; uncertain ones only fill blanks."""
+    rules = extract_fields("ABC Ltd GSTIN 29AABCU9603R1ZM\nInvoice No: INV-7")
+    merged = rules.merge_into({"vendor": {"name": "ABC Limited", "gstin": ""}, "invoice": {"number": "INV-1"}})
+    assert merged["invoice"]["number"] == "INV-7"
+    assert merged["vendor"]["gstin"] == "29AABCU9603R1ZM"
+    assert merged["vendor"]["name"] == "ABC Ltd"
+    assert merged["confidence"]["fields"]["invoice.number"] == 0.95
+
+
+def test_merge_into_keeps_llm_false_and_zero():
+    """An uncertain rule does not override an LLM False or 0: only missing and blank values are gaps."""
+    text = INVOICE_TEXT.replace("Place of Supply: 27-Maharashtra\n", "").replace(
+        "IGST @ 18% 180.00", "CGST @ 9% 90.00\nSGST @ 9% 90.00"
+    )
+    rules = extract_fields(text)
+    assert rules.get("is_inter_state") is True
+    assert rules.confidence["is_inter_state"] < 0.9
+    merged = rules.merge_into({"is_inter_state": False, "totals": {"cgst": 0}})
+    assert merged["is_inter_state"] is False
+    assert rules.merge_into({})["is_inter_state"] is True
+
+
+def test_place_of_supply_covers_all_states():
+    """Every GSTN state code is known; longer state names win over names they contain."""
+    rules = extract_fields("Place of Supply: 24-Gujarat")
+    assert rules.get("place_of_supply_state") == "Gujarat"
+    rules = extract_fields("Place of Supply: Dadra and Nagar Haveli and Daman and Diu")
+    assert rules.get("place_of_supply_state") == "Dadra and Nagar Haveli and Daman and Diu"
@@ -6,10 +6,10 @@ from datetime import datetime, timezone
 from app.db.session import get_db
 from app.db.models import Invoice
 from app.schemas.invoice import InvoiceResponse, InvoiceUpdate, LineItemsPatchRequest
-from app.services.gst_utils import recalculate_line_item_totals
+from app.services.gst_utils import recalculate_line_item_totals, sum_line_items
 from app.api.deps import get_current_user_id
 from app.services.storage import save_upload, read_file, get_content_type, delete_file
-from app.services.invoice_service import process_invoice_file
+from app.services.invoice_service import process_invoice_file, process_invoice_file_async
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
@@ -83,7 +83,7 @@ async def upload_invoice(
     try:
         inv.status = "PROCESSING"
         db.commit()
-        result = process_invoice_file(file_path, content_type=content_type)
+        result = await process_invoice_file_async(file_path, content_type=content_type)
         inv.extracted_json = result
         inv.raw_text = result.get("raw_text", "")
         inv.status = "EXTRACTED"
@@ -182,19 +182,9 @@ def patch_invoice_line_items(
         item["is_corrected"] = True
         line_items[idx] = item
 
-    total_taxable = sum(float(i.get("taxable_value") or 0) for i in line_items)
-    total_gst = sum(
-        float(i.get("gst_breakdown") or {}).get("cgst", 0)
-        + float(i.get("gst_breakdown") or {}).get("sgst", 0)
-        + float(i.get("gst_breakdown") or {}).get("igst", 0)
-        for i in line_items
-    )
+    # Only the corrected lines get new GST; the others keep their stored values in the totals
     ext["line_items"] = line_items
-    ext["totals"] = {
-        "taxable_value": round(total_taxable, 2),
-        "gst_total": round(total_gst, 2),
-        "grand_total": round(total_taxable + total_gst, 2),
-    }
+    ext["totals"] = sum_line_items(line_items)
     inv.extracted_json = ext
     inv.is_corrected = True
     inv.corrected_at = datetime.now(timezone.utc)
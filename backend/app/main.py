@@ -9,13 +9,24 @@ try:
 except Exception:
     pass
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.routes import auth, businesses, invoices, reports, gst, business_gst
 from app.core.config import settings
 
-app = FastAPI(title="BharatLedger API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    from app.services.invoice_service import aclose_ai_engine_clients
+
+    await aclose_ai_engine_clients()
+
+
+app = FastAPI(title="BharatLedger API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,3 +47,10 @@ app.include_router(gst.router, prefix="/api/v1")
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/health/llm")
+def health_llm():
+    from app.services.invoice_service import ai_engine_llm_metrics
+
+    return ai_engine_llm_metrics()
@@ -1,4 +1,12 @@
-"""GST calculation utilities for invoice correction. Mirrors ai_engine logic."""
+"""GST calculation utilities for invoice correction. Uses the ai_engine GST engine, so rounding matches extraction."""
+
+
+def _calculate_gst_columns(*args, **kwargs):
+    """ai_engine's calculate_gst_columns, imported on first use so the routes load without ai_engine."""
+    import app.services.invoice_service  # noqa: F401 (puts ai_engine on sys.path)
+    from ai_engine.ai_engine.gst_engine import calculate_gst_columns
+
+    return calculate_gst_columns(*args, **kwargs)
 
 
 def calculate_gst_breakdown(
@@ -8,17 +16,41 @@ def calculate_gst_breakdown(
     Compute GST breakdown: CGST+SGST (intra) or IGST (inter).
     Returns {"cgst": float, "sgst": float, "igst": float}.
     """
-    rate = float(gst_rate or 0)
-    if rate not in (0, 5, 12, 18, 28):
-        rate = 18.0
+    columns = _calculate_gst_columns([float(taxable_value or 0)], [gst_rate], is_inter_state, [float(qty or 1.0)])
+    return {"cgst": columns.cgst[0] / 100, "sgst": columns.sgst[0] / 100, "igst": columns.igst[0] / 100}
 
-    base = float(taxable_value or 0) * float(qty or 1.0)
-    gst_amount = round(base * (rate / 100), 2)
 
-    if is_inter_state:
-        return {"cgst": 0.0, "sgst": 0.0, "igst": gst_amount}
-    half = round(gst_amount / 2, 2)
-    return {"cgst": half, "sgst": half, "igst": 0.0}
+def recalculate_line_items(line_items: list[dict], is_inter_state: bool) -> dict:
+    """
+    Recalculate gst_breakdown and total for many line items in one pass (corrections,
+    re-enrichment, report rebuilds). taxable_value is the line amount (qty x unit price),
+    as extracted. Updates the items in place and returns the invoice totals
+    {"taxable_value", "gst_total", "grand_total"} from exact paise sums.
+    """
+    columns = _calculate_gst_columns(
+        [float(i.get("taxable_value") or 0) for i in line_items],
+        [i.get("gst_rate") or 0 for i in line_items],
+        is_inter_state,
+    )
+    cgst, sgst, igst, total = (columns.rupees(c) for c in ("cgst", "sgst", "igst", "total"))
+    for n, item in enumerate(line_items):
+        item["gst_breakdown"] = {"cgst": cgst[n], "sgst": sgst[n], "igst": igst[n]}
+        item["total"] = total[n]
+    totals = columns.totals()
+    return {k: totals[k] for k in ("taxable_value", "gst_total", "grand_total")}
+
+
+def sum_line_items(line_items: list[dict]) -> dict:
+    """
+    Invoice totals {"taxable_value", "gst_total", "grand_total"} from the items' stored
+    taxable_value and gst_breakdown, summed in paise. The items are not changed.
+    """
+    taxable = gst = 0
+    for item in line_items:
+        taxable += round(float(item.get("taxable_value") or 0) * 100)
+        breakdown = item.get("gst_breakdown") or {}
+        gst += sum(round(float(breakdown.get(k) or 0) * 100) for k in ("cgst", "sgst", "igst"))
+    return {"taxable_value": taxable / 100, "gst_total": gst / 100, "grand_total": (taxable + gst) / 100}
 
 
 def recalculate_line_item_totals(line_item: dict, is_inter_state: bool) -> dict:
@@ -26,14 +58,5 @@ def recalculate_line_item_totals(line_item: dict, is_inter_state: bool) -> dict:
     Recalculate gst_breakdown and total for a line item.
     Updates in place and returns the item.
     """
-    taxable = float(line_item.get("taxable_value") or 0)
-    rate = float(line_item.get("gst_rate") or 0)
-    qty = float(line_item.get("qty") or 1.0)
-
-    breakdown = calculate_gst_breakdown(taxable, rate, is_inter_state, qty)
-    gst_total = breakdown["cgst"] + breakdown["sgst"] + breakdown["igst"]
-    total = round(taxable + gst_total, 2)
-
-    line_item["gst_breakdown"] = breakdown
-    line_item["total"] = total
+    recalculate_line_items([line_item], is_inter_state)
     return line_item
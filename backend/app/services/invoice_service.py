@@ -16,4 +16,34 @@ def process_invoice_file(file_path: str, content_type: str | None = None) -> dic
     from ai_engine import process_invoice
 
     result = process_invoice(file_path, content_type=content_type)
-    return result.model_dump()
+    return result.to_json_dict()
+
+
+async def process_invoice_file_async(file_path: str, content_type: str | None = None) -> dict:
+    """
+    Async process_invoice_file for async routes: OCR runs in a worker thread and the LLM
+    call is awaited, so the event loop keeps serving other requests meanwhile.
+    """
+    from ai_engine import process_invoice_async
+
+    result = await process_invoice_async(file_path, content_type=content_type)
+    return result.to_json_dict()
+
+
+async def aclose_ai_engine_clients() -> None:
+    """
+    Release ai_engine's pooled LLM connections (called on app shutdown): the sync client and
+    the async client of the running event loop, which the async upload route uses.
+    """
+    if "ai_engine" not in sys.modules:
+        return
+    from ai_engine import aclose_http_clients
+
+    await aclose_http_clients()
+
+
+def ai_engine_llm_metrics() -> dict:
+    """Rate limiter and circuit breaker state of ai_engine's LLM client."""
+    from ai_engine import get_llm_metrics
+
+    return get_llm_metrics()
@@ -0,0 +1,34 @@
+"""Unit tests for gst_utils (line-item GST recalculation)."""
+
+from app.services.gst_utils import calculate_gst_breakdown, recalculate_line_items, sum_line_items
+
+
+def test_calculate_gst_breakdown():
+    assert calculate_gst_breakdown(1000.0, 18.0, False) == {"cgst": 90.0, "sgst": 90.0, "igst": 0.0}
+    assert calculate_gst_breakdown(1000.0, 18.0, True) == {"cgst": 0.0, "sgst": 0.0, "igst": 180.0}
+    assert calculate_gst_breakdown(1000.0, 7.0, True)["igst"] == 180.0  # not a GST rate: 18%
+
+
+def test_recalculate_line_items_updates_items_and_totals():
+    items = [
+        {"taxable_value": 1000.0, "gst_rate": 18.0, "qty": 2},
+        {"taxable_value": 100.05, "gst_rate": 5.0},
+        {"taxable_value": None, "gst_rate": None},
+    ]
+    totals = recalculate_line_items(items, is_inter_state=False)
+    assert items[0]["gst_breakdown"] == {"cgst": 90.0, "sgst": 90.0, "igst": 0.0}
+    assert items[0]["total"] == 1180.0
+    assert items[1]["gst_breakdown"]["cgst"] == 2.5
+    assert items[2]["total"] == 0.0
+    assert totals == {"taxable_value": 1100.05, "gst_total": 185.0, "grand_total": 1285.05}
+
+
+def test_sum_line_items_leaves_items_unchanged():
+    items = [
+        {"taxable_value": 1000.0, "gst_breakdown": {"cgst": 90.0, "sgst": 90.0, "igst": 0.0}, "total": 1180.0},
+        {"taxable_value": 0.1, "gst_rate": 18.0, "gst_breakdown": {"cgst": 0.2, "sgst": 0.2}},
+        {"taxable_value": None},
+    ]
+    before = [dict(i) for i in items]
+    assert sum_line_items(items) == {"taxable_value": 1000.1, "gst_total": 180.4, "grand_total": 1180.5}
+    assert items == before
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Diagnose invoice processing failure - run from repo root."""
+"""Diagnose invoice processing failure - run from repo root: python diagnose_invoice.py [invoice.pdf]"""
 import os
 import sys
 from pathlib import Path
@@ -20,7 +20,7 @@ for env_path in [ROOT / ".env", ROOT / "backend" / ".env"]:
 sys.path.insert(0, str(ROOT / "ai_engine"))
 sys.path.insert(0, str(ROOT))
 
-test_file = r"C:\Users\Ram\Downloads\Doc1.pdf"
+test_file = sys.argv[1] if len(sys.argv) > 1 else r"C:\Users\Ram\Downloads\Doc1.pdf"
 
 def main():
     print("=== Invoice Processing Diagnostic ===\n")